@@ -0,0 +1,69 @@
+"""Measure the import time of ``command_watcher`` with
+``python -X importtime``.
+
+Every run imports the package in a fresh interpreter. The median of the
+cumulative import time of ``command_watcher`` is compared with a budget,
+the script exits with status 1 if the budget is exceeded. The slowest
+modules imported by the package are listed, to find the culprit of a
+regression.
+
+Usage::
+
+    python benchmarks/import_time.py [RUNS] [--budget=MILLISECONDS]
+"""
+
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET = 150.0
+"""The import time budget in milliseconds."""
+
+
+def import_time() -> tuple[int, list[tuple[int, str]]]:
+    """Import the package in a fresh interpreter.
+
+    :return: The cumulative import time of the package in microseconds and
+        the self time and the name of every module imported by it."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import command_watcher"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    modules: list[tuple[int, str]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        if name.strip() == "command_watcher":
+            return int(cumulative_us), modules
+        modules.append((int(self_us), name.rstrip()))
+    raise RuntimeError("command_watcher not found in the output of -X importtime")
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    runs = int(args[0]) if args else 20
+    budget = DEFAULT_BUDGET
+    for arg in sys.argv[1:]:
+        if arg.startswith("--budget="):
+            budget = float(arg.split("=", 1)[1])
+
+    import_time()  # Warm up the file system caches.
+    results = [import_time() for _ in range(runs)]
+    median = statistics.median(cumulative for cumulative, _ in results) / 1000
+    print(f"import command_watcher: {median:.1f} ms (median of {runs} runs)")
+    print("Slowest modules (self time of the last run):")
+    for self_us, name in sorted(results[-1][1], reverse=True)[:10]:
+        print(f"{self_us / 1000:>8.1f} ms {name}")
+    if median > budget:
+        print(f"The import time exceeds the budget of {budget:.0f} ms.")
+        sys.exit(1)
+    print(f"Budget: {budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare the line based and the chunk based reading of a pipe.
+
+A synthetic producer prints many short lines, like ``rsync -av`` does. The
+raw loops measure only the reading and splitting, the executor runs measure
+the complete path including the logging (the printed output is sent to
+``/dev/null``).
+
+Usage::
+
+    python benchmarks/read_modes.py [LINE_COUNT]
+"""
+
+import contextlib
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterator
+
+from command_watcher import Arg, CommandExecutor, Pump, ReadMode
+from command_watcher.stream import CHUNK_SIZE, LineSplitter
+
+
+def producer(line_count: int) -> list[Arg]:
+    return [
+        sys.executable,
+        "-c",
+        f"import sys\nfor i in range({line_count}):\n"
+        "    sys.stdout.write(f'sending incremental file list/{i}/file.txt\\n')",
+    ]
+
+
+def read_lines(args: list[Arg]) -> int:
+    process = subprocess.Popen(args, stdout=subprocess.PIPE)
+    assert process.stdout
+    count = 0
+    with process.stdout as pipe:
+        for line in iter(pipe.readline, b""):
+            if line.decode("utf-8").strip():
+                count += 1
+    process.wait()
+    return count
+
+
+def read_chunks(args: list[Arg]) -> int:
+    process = subprocess.Popen(args, stdout=subprocess.PIPE)
+    assert process.stdout
+    count = 0
+    splitter = LineSplitter()
+    with process.stdout as pipe:
+        fd = pipe.fileno()
+        for chunk in iter(lambda: os.read(fd, CHUNK_SIZE), b""):
+            for line in splitter.feed(chunk):
+                if line.decode("utf-8").strip():
+                    count += 1
+    process.wait()
+    return count
+
+
+@contextlib.contextmanager
+def silenced() -> Iterator[None]:
+    """Redirect the file descriptors 1 and 2 to ``/dev/null``."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in (*saved, devnull):
+            os.close(fd)
+
+
+def measure(name: str, function: Callable[[], int]) -> None:
+    with silenced():
+        start = time.perf_counter()
+        count = function()
+        interval = time.perf_counter() - start
+    print(f"{name:<28} {interval:8.3f}s {count:>10} lines")
+
+
+def main() -> None:
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    args = producer(line_count)
+
+    measure("raw readline loop", lambda: read_lines(args))
+    measure("raw chunked loop", lambda: read_chunks(args))
+
+    modes: list[tuple[Pump, ReadMode]] = [
+        ("thread", "line"),
+        ("thread", "chunk"),
+        ("selector", "chunk"),
+    ]
+    for pump, read_mode in modes:
+        measure(
+            f"executor {pump}/{read_mode}",
+            lambda: (
+                CommandExecutor(args, pump=pump, read_mode=read_mode).line_count_stdout
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Soak test of the logging facility of the executors.
+
+Every iteration sets up a fresh logger and handler, like every
+``CommandExecutor`` does, captures some output lines (not shown, the echo
+mode is ``none``) and drops the logger again. The memory usage and the
+number of registered loggers must stay flat.
+
+Usage::
+
+    python benchmarks/soak.py [ITERATIONS] [--commands]
+
+With ``--commands`` every iteration runs the real command ``true`` (much
+slower).
+"""
+
+import gc
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+
+from command_watcher import CommandExecutor
+from command_watcher.log import STDOUT, setup_logging
+
+
+def iteration(commands: bool) -> None:
+    if commands:
+        CommandExecutor(["true"], echo="none")
+        return
+    _, handler = setup_logging(echo="none")
+    handler.capture(STDOUT, ["line 1", "line 2", "line 3"])
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    iterations = int(args[0]) if args else 100000
+    commands = "--commands" in sys.argv
+    report_every = max(iterations // 10, 1)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    print(f"{'iterations':>10} {'traced KiB':>12} {'max RSS KiB':>12} {'loggers':>8}")
+    for i in range(1, iterations + 1):
+        iteration(commands)
+        if i % report_every == 0:
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+            print(
+                f"{i:>10} {current // 1024:>12} "
+                f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss:>12} "
+                f"{len(logging.Logger.manager.loggerDict):>8}"
+            )
+    print(f"{time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,49 +5,109 @@ Module to watch the execution of shell scripts. Both streams (`stdout` and
 
 from __future__ import annotations
 
+import importlib
+import os
 import queue
+import selectors
 import shlex
 import shutil
 import subprocess
 import threading
 import time
-from importlib import metadata
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from typing import (
     IO,
+    TYPE_CHECKING,
     Any,
     Literal,
     Optional,
     Tuple,
     TypedDict,
     Union,
+    cast,
 )
 
 from typing_extensions import Unpack
 
+from command_watcher.capture import DEFAULT_MEMORY_BUDGET
 from command_watcher.channels.base_channel import BaseChannel
-from command_watcher.channels.beep import BeepChannel
-from command_watcher.channels.email import EmailChannel
-from command_watcher.channels.icinga import IcingaChannel
-from command_watcher.config import Config, load_config
-from command_watcher.log import ExtendedLogger, LoggingHandler, setup_logging
+from command_watcher.extract import Extraction, Extractor
+from command_watcher.log import (
+    FLUSH_INTERVAL,
+    STDERR,
+    STDOUT,
+    Echo,
+    ExtendedLogger,
+    LoggingHandler,
+    setup_logging,
+)
 from command_watcher.message import (
     Message,
     MessageParams,
     MinimalMessageParams,
 )
+from command_watcher.progress import (
+    DEFAULT_PROGRESS_INTERVAL,
+    Progress,
+    ProgressMonitor,
+)
 from command_watcher.report import (
     Status,
     reporter,
 )
+from command_watcher.stream import CHUNK_SIZE, Line, LineDecoder
+from command_watcher.usage import ResourceUsage, read_proc_io
 from command_watcher.utils import (
     HOSTNAME,
 )
 
-__version__: str = metadata.version("command_watcher")
+if TYPE_CHECKING:
+    import asyncio
+
+    # The lazy attributes (see below) for the type checkers.
+    from command_watcher.channels.beep import BeepChannel as BeepChannel
+    from command_watcher.channels.email import EmailChannel as EmailChannel
+    from command_watcher.channels.icinga import IcingaChannel as IcingaChannel
+    from command_watcher.config import Config as Config
+    from command_watcher.config import load_config as load_config
+
+_LAZY_ATTRIBUTES = {
+    "BeepChannel": "command_watcher.channels.beep",
+    "EmailChannel": "command_watcher.channels.email",
+    "IcingaChannel": "command_watcher.channels.icinga",
+    "Config": "command_watcher.config",
+    "load_config": "command_watcher.config",
+}
+"""The channels and the configuration are imported on first use: their
+dependencies (for example :py:mod:`pretiac`, :py:mod:`requests` and
+:py:mod:`pydantic`) are slow to import."""
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        from importlib import metadata
+
+        return metadata.version("command_watcher")
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
 
 Stream = Literal["stdout", "stderr"]
 
+Pump = Literal["thread", "selector"]
+"""How the output of a process is read: ``thread`` starts one reader thread
+per stream, ``selector`` multiplexes both pipes in the calling thread."""
+
+ReadMode = Literal["line", "chunk"]
+"""How the reader threads read a pipe: ``line`` calls ``readline`` once per
+line, ``chunk`` reads blocks of :py:data:`command_watcher.stream.CHUNK_SIZE`
+bytes and splits them into lines."""
+
 
 class CommandWatcherError(Exception):
     """Exception raised by this module."""
@@ -61,30 +121,70 @@ class CommandWatcherError(Exception):
 
 
 class Timer:
-    """Measure the execution time of a command run."""
+    """Measure the execution time of a command run with the monotonic clock
+    :py:func:`time.perf_counter_ns`, which does not jump with adjustments of
+    the system clock."""
 
-    stop: float
-    """"The time when the timer stops. (UNIX timestamp)"""
+    stop: int
+    """"The time when the timer stops in nanoseconds (``perf_counter_ns``),
+    0 while the timer is running."""
 
-    start: float
-    """"The start time. (UNIX timestamp)"""
+    start: int
+    """"The start time in nanoseconds (``perf_counter_ns``)."""
 
     interval: float
-    """The time interval between start and stop."""
+    """The time interval between start and stop in seconds."""
 
     def __init__(self) -> None:
         self.stop = 0
-        self.start = time.time()
+        self.start = time.perf_counter_ns()
         self.interval = 0
 
-    def result(self) -> str:
+    @property
+    def elapsed(self) -> float:
+        """The time in seconds since the start, the timer keeps running."""
+        return (time.perf_counter_ns() - self.start) / 1e9
+
+    def result(self) -> float:
         """
-        Measure the time intervale
+        Stop the timer.
+
+        :return: The time interval between start and stop in seconds."""
+        self.stop = time.perf_counter_ns()
+        self.interval = (self.stop - self.start) / 1e9
+        return self.interval
+
+    def __str__(self) -> str:
+        return f"{self.interval:.3f}s"
+
 
-        :return: A formatted string displaying the result."""
-        self.stop = time.time()
-        self.interval = self.stop - self.start
-        return "{:.3f}s".format(self.interval)
+@dataclass
+class Phases:
+    """The time in seconds an executor spent in the phases of a run."""
+
+    spawn: float = 0.0
+    """From the start of the run until the process is spawned."""
+
+    first_output: Optional[float] = None
+    """From the spawn until the first output line, ``None`` if the process
+    did not print anything."""
+
+    exit_wait: float = 0.0
+    """From the end of both output streams until the process has exited."""
+
+    logging: float = 0.0
+    """The time spent capturing and logging the output lines."""
+
+    total: float = 0.0
+    """The whole run."""
+
+    def __str__(self) -> str:
+        first_output = "-" if self.first_output is None else f"{self.first_output:.3f}s"
+        return (
+            f"spawn {self.spawn:.3f}s, first output {first_output}, "
+            f"exit wait {self.exit_wait:.3f}s, logging {self.logging:.3f}s, "
+            f"total {self.total:.3f}s"
+        )
 
 
 # Main code ###################################################################
@@ -110,83 +210,114 @@ class ProcessArgs(TypedDict, total=False):
     """Defines the environment variables for the new process."""
 
 
-class CommandExecutor:
-    """Run a process.
+def normalize_args(args: Args) -> list[str]:
+    """Normalize process arguments, always a list."""
+    if isinstance(args, Path):
+        args = str(args)
+    if isinstance(args, str):
+        return shlex.split(args)
+    return [str(arg) for arg in args]
 
-    You can use all keyword arguments from
-    :py:class:`subprocess.Popen` except `bufsize`, `stderr`, `stdout`.
+
+class BaseExecutor:
+    """The parts shared by :py:class:`CommandExecutor` and
+    :py:class:`AsyncCommandExecutor`: the logging facility and the decoding
+    of the output.
 
     :param args: List, tuple or string. A sequence of
         process arguments, like `subprocess.Popen(args)`.
+    :param master_logger: Forward all log messages to this logger.
+    :param encoding: The encoding of the output. The output is decoded
+        incrementally per stream. If ``None`` the lines are kept as raw
+        bytes and are not decoded at all.
+    :param errors: The error handling scheme of the decoder, for example
+        ``strict``, ``replace`` (default) or ``backslashreplace``. If a
+        stream cannot be decoded with ``strict``, a warning is logged and the
+        rest of the stream is decoded with ``backslashreplace``.
+    :param tag: Tag the log messages forwarded to the master logger, to
+        tell apart the output of processes running side by side.
+    :param memory_budget: The memory budget of the log handler in bytes.
+        Records exceeding the budget are spilled to a temporary file.
+    :param echo: How the output lines are shown on the terminal: ``live``
+        (every line), ``summary`` (the counts and the first and last lines
+        when the process has finished) or ``none``.
+    :param extract: Extract performance data from the output lines while
+        they stream in, see :py:mod:`command_watcher.extract`.
     """
 
     args: Args
     """Process arguments in various types."""
 
-    _queue: "queue.Queue[Optional[Tuple[bytes, Stream]]]"
+    _encoding: Optional[str]
+
+    _errors: str
+
+    _echo: Echo
 
     log: ExtendedLogger
     """A ready to go and configured logger."""
 
     log_handler: LoggingHandler
 
-    subprocess: subprocess.Popen[Any]
+    usage: Optional[ResourceUsage]
+    """The resource usage of the process, set after the process has exited.
+    ``None`` if not available."""
+
+    phases: Phases
+    """Where the run spent its time."""
+
+    _spawned: int
+    """The time the process was spawned (``perf_counter_ns``)."""
+
+    _logging_ns: int
+    """The time spent in :py:meth:`_log_lines` in nanoseconds."""
+
+    _extraction: Optional[Extraction]
+
+    _decoders: list[tuple[Stream, LineDecoder]]
+    """The decoders of the output streams, to report decoding errors."""
 
     def __init__(
         self,
         args: Args,
         master_logger: Optional[ExtendedLogger] = None,
-        **kwargs: Unpack[ProcessArgs],
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        tag: Optional[str] = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        echo: Echo = "live",
+        extract: Optional[Mapping[str, Extractor]] = None,
     ) -> None:
         # self.args: typing.Union[str, list, tuple] = args
         self.args = args
-
-        self._queue = queue.Queue()
-
-        log, log_handler = setup_logging(master_logger=master_logger)
+        self._encoding = encoding
+        self._errors = errors
+        self._echo = echo
+        self.usage = None
+        self.phases = Phases()
+        self._spawned = 0
+        self._logging_ns = 0
+        self._extraction = Extraction(extract) if extract else None
+        self._decoders = []
+
+        log, log_handler = setup_logging(
+            master_logger=master_logger,
+            tag=tag,
+            memory_budget=memory_budget,
+            echo=echo,
+        )
         self.log = log
         self.log_handler = log_handler
 
-        self.log.info("Run command: {}".format(" ".join(self.args_normalized)))
-        timer = Timer()
-        # Maybe better: https://gist.github.com/nawatts/e2cdca610463200c12eac2a14efc0bfb#file-capture-and-print-subprocess-output-py
-        # instead of this solution with threads
-        self.subprocess = subprocess.Popen(
-            self.args_normalized,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            # RuntimeWarning: line buffering (buffering=1) isn't
-            # supported in binary mode, the default buffer size will be used
-            # bufsize=1,
-            **kwargs,
-        )
-
-        self._start_thread(self.subprocess.stdout, "stdout")
-        self._start_thread(self.subprocess.stderr, "stderr")
-
-        for _ in range(2):
-            for line_bytes, stream in iter(self._queue.get, None):
-                line: str = ""
-                if line_bytes:
-                    line = line_bytes.decode("utf-8").strip()
-
-                if line:
-                    if stream == "stderr":
-                        self.log.stderr(line)
-                    if stream == "stdout":
-                        self.log.stdout(line)
-        self.subprocess.wait()
-        self.log.info(f"Execution time: {timer.result()}")
-
     @property
     def args_normalized(self) -> list[str]:
         """Normalized `args`, always a list"""
-        args = self.args
-        if isinstance(args, Path):
-            args = str(args)
-        if isinstance(args, str):
-            return shlex.split(args)
-        return [str(arg) for arg in args]
+        return normalize_args(self.args)
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """The exit code of the process."""
+        raise NotImplementedError()
 
     @property
     def stdout(self) -> str:
@@ -196,8 +327,8 @@ class CommandExecutor:
 
     @property
     def line_count_stdout(self) -> int:
-        """The count of lines of the current ``stderr``."""
-        return len(self.stdout.splitlines())
+        """The count of lines of the current ``stdout``."""
+        return self.log_handler.line_count_stdout
 
     @property
     def stderr(self) -> str:
@@ -207,7 +338,250 @@ class CommandExecutor:
     @property
     def line_count_stderr(self) -> int:
         """The count of lines of the current ``stderr``."""
-        return len(self.stderr.splitlines())
+        return self.log_handler.line_count_stderr
+
+    @property
+    def performance_data(self) -> dict[str, Any]:
+        """The performance data extracted from the output, see the parameter
+        ``extract``."""
+        if self._extraction is None:
+            return {}
+        return self._extraction.values
+
+    def _decoder(self, stream: Stream) -> LineDecoder:
+        decoder = LineDecoder(self._encoding, self._errors, "backslashreplace")
+        self._decoders.append((stream, decoder))
+        return decoder
+
+    def _log_lines(self, lines: Sequence[Line], stream: Stream) -> None:
+        """Strip and capture a batch of decoded lines of one stream. Empty
+        lines are skipped. The lines are passed directly to the log handler,
+        no :py:class:`logging.LogRecord` objects are created."""
+        start = time.perf_counter_ns()
+        stripped = [line for line in (line.strip() for line in lines) if line]
+        if stripped and self.phases.first_output is None:
+            self.phases.first_output = (start - self._spawned) / 1e9
+        self.log_handler.capture(STDERR if stream == "stderr" else STDOUT, stripped)
+        if self._extraction is not None:
+            self._extraction.feed(stripped)
+        self._logging_ns += time.perf_counter_ns() - start
+
+    def _spawn_finished(self, timer: Timer) -> None:
+        self._spawned = time.perf_counter_ns()
+        self.phases.spawn = (self._spawned - timer.start) / 1e9
+
+    def _finish(self, timer: Timer, eof: int) -> None:
+        """Record the phases and log the execution time.
+
+        :param eof: The time both output streams were closed
+            (``perf_counter_ns``)."""
+        self.phases.total = timer.result()
+        self.phases.exit_wait = (timer.stop - eof) / 1e9
+        self.phases.logging = self._logging_ns / 1e9
+        for stream, decoder in self._decoders:
+            if decoder.error is not None:
+                self.log.warning(
+                    f"Could not decode {stream} ({decoder.error}), "
+                    "undecodable bytes are escaped."
+                )
+        if self._extraction is not None:
+            for name, error in self._extraction.errors.items():
+                self.log.warning(f"Extractor '{name}' failed: {error!r}")
+        self.log.info(f"Execution time: {timer}")
+        if self._echo == "summary":
+            self.log_handler.print_summary()
+
+
+class CommandExecutor(BaseExecutor):
+    """Run a process.
+
+    You can use all keyword arguments from
+    :py:class:`subprocess.Popen` except `bufsize`, `stderr`, `stdout`.
+
+    :param args: List, tuple or string. A sequence of
+        process arguments, like `subprocess.Popen(args)`.
+    :param master_logger: Forward all log messages to this logger.
+    :param pump: ``thread`` (default) reads the output in two reader
+        threads, ``selector`` multiplexes both pipes in the calling thread,
+        which is cheaper for many short running commands.
+    :param read_mode: ``line`` (default) or ``chunk``. How the reader
+        threads of the ``thread`` pump read the pipes. The ``selector`` pump
+        always reads chunks.
+    :param encoding: The encoding of the output. The output is decoded
+        incrementally per stream. If ``None`` the lines are kept as raw
+        bytes and are not decoded at all.
+    :param errors: The error handling scheme of the decoder, for example
+        ``strict``, ``replace`` (default) or ``backslashreplace``.
+    :param tag: Tag the log messages forwarded to the master logger.
+    :param memory_budget: The memory budget of the log handler in bytes.
+    :param progress: Called every ``progress_interval`` seconds with a
+        sample (:py:class:`command_watcher.progress.Progress`) of the
+        running process. The callback runs in its own thread.
+    :param progress_interval: The time in seconds between two samples.
+    :param extract: Extract performance data from the output lines, see
+        :py:mod:`command_watcher.extract`.
+    """
+
+    _queue: "queue.Queue[Optional[Tuple[Sequence[Line], Stream]]]"
+
+    subprocess: subprocess.Popen[Any]
+
+    def __init__(
+        self,
+        args: Args,
+        master_logger: Optional[ExtendedLogger] = None,
+        pump: Pump = "thread",
+        read_mode: ReadMode = "line",
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        tag: Optional[str] = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        echo: Echo = "live",
+        progress: Optional[Callable[[Progress], object]] = None,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        extract: Optional[Mapping[str, Extractor]] = None,
+        **kwargs: Unpack[ProcessArgs],
+    ) -> None:
+        super().__init__(
+            args,
+            master_logger=master_logger,
+            encoding=encoding,
+            errors=errors,
+            tag=tag,
+            memory_budget=memory_budget,
+            echo=echo,
+            extract=extract,
+        )
+
+        self._queue = queue.Queue()
+
+        self.log.info("Run command: {}".format(" ".join(self.args_normalized)))
+        timer = Timer()
+        self.subprocess = subprocess.Popen(
+            self.args_normalized,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # RuntimeWarning: line buffering (buffering=1) isn't
+            # supported in binary mode, the default buffer size will be used
+            # bufsize=1,
+            **kwargs,
+        )
+        self._spawn_finished(timer)
+
+        monitor: Optional[ProgressMonitor] = None
+        if progress is not None:
+            monitor = ProgressMonitor(
+                self.log_handler, self.subprocess.pid, progress, progress_interval
+            )
+            monitor.start()
+        try:
+            try:
+                if pump == "selector":
+                    self._pump_selector()
+                else:
+                    self._pump_threads(read_mode)
+            except BaseException:
+                # Do not leave a zombie process behind. The pipes are closed
+                # by the selector pump or drained by the reader threads.
+                self.subprocess.wait()
+                raise
+            eof = time.perf_counter_ns()
+            self._wait()
+        finally:
+            if monitor is not None:
+                monitor.stop()
+        self._finish(timer, eof)
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """The exit code of the process."""
+        return self.subprocess.returncode
+
+    def _wait(self) -> None:
+        """Wait until the process exits and collect its resource usage with
+        :py:func:`os.wait4`."""
+        pid = self.subprocess.pid
+        if not isinstance(pid, int) or not hasattr(os, "wait4"):
+            self.subprocess.wait()
+            return
+        try:
+            if hasattr(os, "waitid"):
+                # Do not reap the process yet: /proc/<pid>/io of the exited
+                # process holds the final I/O counters.
+                os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+            io = read_proc_io(pid)
+            _, status, rusage = os.wait4(pid, 0)
+        except ChildProcessError:
+            # Already reaped, for example if SIGCHLD is ignored.
+            self.subprocess.wait()
+            return
+        self.subprocess.returncode = os.waitstatus_to_exitcode(status)
+        self.usage = ResourceUsage.from_rusage(rusage, io)
+
+    def _pump_threads(self, read_mode: ReadMode) -> None:
+        """Read ``stdout`` and ``stderr`` in two reader threads and log the
+        lines in the order they arrive in the queue."""
+        # Maybe better: https://gist.github.com/nawatts/e2cdca610463200c12eac2a14efc0bfb#file-capture-and-print-subprocess-output-py
+        # instead of this solution with threads
+        self._start_thread(self.subprocess.stdout, "stdout", read_mode)
+        self._start_thread(self.subprocess.stderr, "stderr", read_mode)
+
+        running = 2
+        while running:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                # The process is silent: show the buffered output lines.
+                self.log_handler.flush()
+                continue
+            if item is None:
+                running -= 1
+            else:
+                self._log_lines(*item)
+
+    def _pump_selector(self) -> None:
+        """Multiplex ``stdout`` and ``stderr`` on the non-blocking pipes in
+        the calling thread. No reader threads and no queue are involved.
+
+        The lines of one stream are logged in the order they were written.
+        Lines of different streams are logged in the order they become
+        readable, just like in the thread pump."""
+        pipes: tuple[tuple[Optional[IO[bytes]], Stream], ...] = (
+            (self.subprocess.stdout, "stdout"),
+            (self.subprocess.stderr, "stderr"),
+        )
+        with selectors.DefaultSelector() as selector:
+            for pipe, stream in pipes:
+                if pipe is None:
+                    continue
+                os.set_blocking(pipe.fileno(), False)
+                selector.register(
+                    pipe, selectors.EVENT_READ, (stream, self._decoder(stream))
+                )
+
+            try:
+                while selector.get_map():
+                    events = selector.select(timeout=FLUSH_INTERVAL)
+                    if not events:
+                        # The process is silent: show the buffered output lines.
+                        self.log_handler.flush()
+                    for key, _ in events:
+                        stream, decoder = cast(Tuple[Stream, LineDecoder], key.data)
+                        try:
+                            chunk = os.read(key.fd, CHUNK_SIZE)
+                        except BlockingIOError:
+                            continue
+                        if not chunk:
+                            selector.unregister(key.fileobj)
+                            cast(IO[bytes], key.fileobj).close()
+                            self._log_lines(decoder.close(), stream)
+                            continue
+                        self._log_lines(decoder.feed(chunk), stream)
+            finally:
+                # After an error: the process gets SIGPIPE instead of blocking
+                # on a full pipe.
+                for key in list(selector.get_map().values()):
+                    cast(IO[bytes], key.fileobj).close()
 
     def _stdout_stderr_reader(self, pipe: IO[bytes], stream: Stream) -> None:
         """
@@ -215,18 +589,209 @@ class CommandExecutor:
         """
         try:
             with pipe:
+                decoder = self._decoder(stream)
                 for line in iter(pipe.readline, b""):
-                    self._queue.put((line, stream))
+                    self._queue.put((decoder.feed(line), stream))
+                self._queue.put((decoder.close(), stream))
+        except Exception:
+            pass
+        finally:
+            self._queue.put(None)
+
+    def _stdout_stderr_chunk_reader(self, pipe: IO[bytes], stream: Stream) -> None:
+        """Read the pipe in chunks and put the completed and decoded lines of
+        each chunk as one batch into the queue.
+
+        :param object pipe: ``process.stdout`` or ``process.stdout``
+        """
+        try:
+            with pipe:
+                fd = pipe.fileno()
+                decoder = self._decoder(stream)
+                for chunk in iter(lambda: os.read(fd, CHUNK_SIZE), b""):
+                    lines = decoder.feed(chunk)
+                    if lines:
+                        self._queue.put((lines, stream))
+                self._queue.put((decoder.close(), stream))
         except Exception:
             pass
         finally:
             self._queue.put(None)
 
-    def _start_thread(self, pipe: Optional[IO[bytes]], stream: Stream) -> None:
+    def _start_thread(
+        self, pipe: Optional[IO[bytes]], stream: Stream, read_mode: ReadMode
+    ) -> None:
         """
         :param object pipe: ``process.stdout`` or ``process.stdout``
         """
-        threading.Thread(target=self._stdout_stderr_reader, args=[pipe, stream]).start()
+        if read_mode == "chunk":
+            target = self._stdout_stderr_chunk_reader
+        else:
+            target = self._stdout_stderr_reader
+        threading.Thread(target=target, args=[pipe, stream]).start()
+
+
+class AsyncCommandExecutor(BaseExecutor):
+    """Run a process using :py:mod:`asyncio`.
+
+    The process is started by :py:func:`asyncio.create_subprocess_exec`
+    and both streams are read by stream readers in the event loop. The
+    output is logged in the same way as by :py:class:`CommandExecutor`.
+    Await the method :py:meth:`run` to execute the process.
+
+    .. code-block:: python
+
+        process = await AsyncCommandExecutor(["ls", "-l"]).run()
+
+    :param args: List, tuple or string. A sequence of
+        process arguments, like `subprocess.Popen(args)`.
+    :param master_logger: Forward all log messages to this logger.
+    :param encoding: The encoding of the output. If ``None`` the lines are
+        kept as raw bytes and are not decoded at all.
+    :param errors: The error handling scheme of the decoder, for example
+        ``strict``, ``replace`` (default) or ``backslashreplace``.
+    :param memory_budget: The memory budget of the log handler in bytes.
+    :param extract: Extract performance data from the output lines, see
+        :py:mod:`command_watcher.extract`.
+    """
+
+    _kwargs: ProcessArgs
+
+    subprocess: asyncio.subprocess.Process
+
+    def __init__(
+        self,
+        args: Args,
+        master_logger: Optional[ExtendedLogger] = None,
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        echo: Echo = "live",
+        extract: Optional[Mapping[str, Extractor]] = None,
+        **kwargs: Unpack[ProcessArgs],
+    ) -> None:
+        super().__init__(
+            args,
+            master_logger=master_logger,
+            encoding=encoding,
+            errors=errors,
+            memory_budget=memory_budget,
+            echo=echo,
+            extract=extract,
+        )
+        self._kwargs = kwargs
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """The exit code of the process."""
+        return self.subprocess.returncode
+
+    async def run(self) -> AsyncCommandExecutor:
+        """Run the process and wait until it exits.
+
+        :return: The executor itself."""
+        import asyncio
+
+        args = self.args_normalized
+        if self._kwargs.get("shell", False):
+            # The same as subprocess.Popen(args, shell=True)
+            args = ["/bin/sh", "-c", *args]
+        self.log.info("Run command: {}".format(" ".join(self.args_normalized)))
+        timer = Timer()
+        self.subprocess = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self._kwargs.get("cwd"),
+            env=self._kwargs.get("env"),
+        )
+        self._spawn_finished(timer)
+        flusher = asyncio.create_task(self._flush_periodically())
+        try:
+            await asyncio.gather(
+                self._read(self.subprocess.stdout, "stdout"),
+                self._read(self.subprocess.stderr, "stderr"),
+            )
+        except BaseException:
+            # Cancelled or failed: do not leave the process running.
+            try:
+                self.subprocess.kill()
+            except ProcessLookupError:
+                pass
+            await self.subprocess.wait()
+            raise
+        finally:
+            flusher.cancel()
+        eof = time.perf_counter_ns()
+        await self.subprocess.wait()
+        self._finish(timer, eof)
+        return self
+
+    async def _flush_periodically(self) -> None:
+        """Show the buffered output lines even if the process is silent."""
+        import asyncio
+
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self.log_handler.flush()
+
+    async def _read(
+        self, reader: Optional[asyncio.StreamReader], stream: Stream
+    ) -> None:
+        """Read one stream in chunks and log the completed lines."""
+        if reader is None:
+            return
+        decoder = self._decoder(stream)
+        while chunk := await reader.read(CHUNK_SIZE):
+            self._log_lines(decoder.feed(chunk), stream)
+        self._log_lines(decoder.close(), stream)
+
+
+def create_channels(
+    config: Config, service_name: str, service_display_name: Optional[str] = None
+) -> list[BaseChannel]:
+    """Create the report channels configured in the configuration file.
+
+    :param config: The configuration.
+    :param service_name: A name of the watched service.
+    :param service_display_name: A human readable form of the *service name*.
+    """
+    channels: list[BaseChannel] = []
+    if config.email is not None:
+        from command_watcher.channels.email import EmailChannel
+
+        channels.append(
+            EmailChannel(
+                smtp_server=config.email.smtp_server,
+                smtp_login=config.email.smtp_login,
+                smtp_password=config.email.smtp_password,
+                to_addr=config.email.to_addr,
+                from_addr=config.email.from_addr,
+                to_addr_critical=config.email.to_addr_critical,
+                starttls=config.email.starttls,
+                digest_window=config.email.digest_window,
+            )
+        )
+
+    if config.icinga is not None:
+        from command_watcher.channels.icinga import IcingaChannel
+
+        batch = config.icinga_batch
+        channels.append(
+            IcingaChannel(
+                service_name=service_name,
+                service_display_name=service_display_name,
+                config=config.icinga,
+                batch_window=batch.window if batch is not None else None,
+                batch_size=batch.size if batch is not None else 100,
+            )
+        )
+
+    if shutil.which("beep") and config.beep is not None and config.beep.activated:
+        from command_watcher.channels.beep import BeepChannel
+
+        channels.append(BeepChannel())
+    return channels
 
 
 class Watch:
@@ -241,6 +806,24 @@ class Watch:
         non-zero exit code.
     :param config_reader: A custom configuration reader. Specify this
         parameter to not use the build in configuration reader.
+    :param report_channels: Report by these channels instead of the
+        channels of the configuration. An empty list: do not report at all.
+    :param memory_budget: The memory budget of each log handler (of the
+        watch and of each process) in bytes. Records exceeding the budget
+        are spilled to a temporary file.
+    :param echo: How the output lines of the processes are shown on the
+        terminal: ``live`` (every line), ``summary`` (the counts and the
+        first and last lines when a process has finished) or ``none`` (the
+        lines are only captured, for example if the watcher runs from
+        cron).
+    :param background_reports: Deliver the reports in a background thread:
+        ``watch.report()`` and ``watch.final_report()`` return at once. Use
+        ``watch.flush_reports()`` to wait for the delivery, the pending
+        reports are delivered at the latest when the interpreter exits
+        (waiting at most 60 seconds).
+    :param config_snapshot_dir: Store a pickled snapshot of the validated
+        configuration in this directory, so that the next runs (for example
+        short cron jobs) skip parsing and validating the configuration file.
     """
 
     _hostname: str
@@ -257,18 +840,26 @@ class Watch:
 
     _log_handler: LoggingHandler
 
-    processes: list[CommandExecutor]
+    processes: list[BaseExecutor]
     """A list of completed processes
     :py:class:`Process`. Everytime you use the method
-    `run()` the process object is appened in the list."""
+    `run()` or `arun()` the process object is appened in the list."""
 
-    _config: Optional[Config]
+    _config: Config
 
     _raise_exceptions: bool
     """Raise exceptions"""
 
     _timer: Timer
 
+    _memory_budget: int
+
+    _echo: Echo
+
+    _reports: int
+    """The number of reports so far. A progress report is dropped if the
+    process it belongs to has already been reported."""
+
     def __init__(
         self,
         config_file: Optional[Union[str, Path]] = None,
@@ -277,62 +868,50 @@ class Watch:
         raise_exceptions: bool = True,
         config: Optional[Config] = None,
         report_channels: Optional[list[BaseChannel]] = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        echo: Echo = "live",
+        background_reports: bool = False,
+        config_snapshot_dir: Optional[Union[str, Path]] = None,
     ) -> None:
         self._hostname = HOSTNAME
 
         self._service_name = service_name
         self._service_display_name = service_display_name
 
-        log, log_handler = setup_logging()
+        self._memory_budget = memory_budget
+        self._echo = echo
+        log, log_handler = setup_logging(memory_budget=memory_budget, echo=echo)
 
         self.log = log
         self.log.info(f"Hostname: {self._hostname}")
 
         self._log_handler = log_handler
 
-        self._config = None
-
-        if not config and config_file:
-            self._config = load_config(config_file)
+        if config is not None:
+            self._config = config
+        else:
+            from command_watcher.config import load_config
 
-        if self._config is None:
-            self._config = load_config()
+            self._config = load_config(config_file, snapshot_dir=config_snapshot_dir)
 
         if report_channels is None:
-            if self._config.email is not None:
-                email_reporter = EmailChannel(
-                    smtp_server=self._config.email.smtp_server,
-                    smtp_login=self._config.email.smtp_login,
-                    smtp_password=self._config.email.smtp_password,
-                    to_addr=self._config.email.to_addr,
-                    from_addr=self._config.email.from_addr,
-                    to_addr_critical=self._config.email.to_addr_critical,
-                )
-                reporter.add_channel(email_reporter)
-                self.log.debug(email_reporter)
-
-            if self._config.icinga is not None:
-                icinga_reporter = IcingaChannel(
-                    service_name=self._service_name,
-                    service_display_name=self._service_display_name,
-                    config=self._config.icinga,
-                )
-                reporter.add_channel(icinga_reporter)
-                self.log.debug(icinga_reporter)
-
-            if (
-                shutil.which("beep")
-                and self._config.beep is not None
-                and self._config.beep.activated
+            for channel in create_channels(
+                self._config, self._service_name, self._service_display_name
             ):
-                beep_reporter = BeepChannel()
-                reporter.add_channel(beep_reporter)
-                self.log.debug(beep_reporter)
+                reporter.add_channel(channel)
+                self.log.debug(channel)
 
         else:
-            reporter.channels = []
+            reporter.channels = list(report_channels)
+
+        reporter.background = background_reports
+        if self._config.outbox is not None:
+            from command_watcher.outbox import outbox_from_config
+
+            reporter.outbox = outbox_from_config(self._config.outbox)
 
         self.processes = []
+        self._reports = 0
 
         self._raise_exceptions = raise_exceptions
 
@@ -353,6 +932,12 @@ class Watch:
         args: Args,
         log: bool = True,
         ignore_exceptions: list[int] = [],
+        pump: Pump = "thread",
+        read_mode: ReadMode = "line",
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        progress_interval: Optional[float] = None,
+        extract: Optional[Mapping[str, Extractor]] = None,
         **kwargs: Unpack[ProcessArgs],
     ) -> CommandExecutor:
         """
@@ -365,47 +950,312 @@ class Watch:
             to the local process logger, not to get global master logger.
         :param ignore_exceptions: A list of none-zero exit codes, which is
             ignored by this method.
+        :param pump: ``thread`` or ``selector``, see
+            :py:class:`CommandExecutor`.
+        :param read_mode: ``line`` or ``chunk``, see
+            :py:class:`CommandExecutor`.
+        :param encoding: The encoding of the output or ``None`` to keep the
+            raw bytes, see :py:class:`CommandExecutor`.
+        :param errors: The error handling scheme of the decoder, for example
+            ``strict``, ``replace`` (default) or ``backslashreplace``.
+        :param progress_interval: Report the progress of the running process
+            (line and byte counts, elapsed time, CPU time and resident set
+            size) every ``progress_interval`` seconds to the channels
+            accepting progress reports, for example Icinga. ``None``: no
+            progress reports.
+        :param extract: Extract performance data from the output lines while
+            they stream in: the names of the performance data and their
+            extractors (regular expressions or callables, see
+            :py:mod:`command_watcher.extract`). The values are added to the
+            performance data of :py:meth:`final_report`.
         """
         if log:
             master_logger = self.log
         else:
             master_logger = None
-        process = CommandExecutor(args, master_logger=master_logger, **kwargs)
+        process = CommandExecutor(
+            args,
+            master_logger=master_logger,
+            pump=pump,
+            read_mode=read_mode,
+            encoding=encoding,
+            errors=errors,
+            memory_budget=self._memory_budget,
+            echo=self._echo,
+            progress=self._progress_callback(args, progress_interval),
+            progress_interval=(
+                progress_interval
+                if progress_interval is not None
+                else DEFAULT_PROGRESS_INTERVAL
+            ),
+            extract=extract,
+            **kwargs,
+        )
         self.processes.append(process)
-        rc = process.subprocess.returncode
-        if self._raise_exceptions and rc != 0 and rc not in ignore_exceptions:
-            raise CommandWatcherError(
-                "The command '{}' exists with an non-zero return code ({}).".format(
-                    " ".join(process.args_normalized), rc
-                ),
-                service_name=self._service_name,
-                log_records=self._log_handler.all_records,
+        self._check_returncodes([process], ignore_exceptions)
+        return process
+
+    def _progress_callback(
+        self, args: Args, progress_interval: Optional[float]
+    ) -> Optional[Callable[[Progress], object]]:
+        """The callback sending the progress reports of a process, see
+        :py:meth:`run`."""
+        if progress_interval is None:
+            return None
+        command = " ".join(normalize_args(args))
+        reports = self._reports
+
+        def progress(sample: Progress) -> None:
+            if self._reports != reports:
+                # Too late, for example after a failure report.
+                return
+            reporter.report_progress(
+                status=0,
+                **self._service_params(),
+                custom_message=f"Running '{command}' ({sample.elapsed:.0f}s)",
+                performance_data=sample.performance_data,
             )
+
+        return progress
+
+    async def arun(
+        self,
+        args: Args,
+        log: bool = True,
+        ignore_exceptions: list[int] = [],
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        extract: Optional[Mapping[str, Extractor]] = None,
+        **kwargs: Unpack[ProcessArgs],
+    ) -> AsyncCommandExecutor:
+        """
+        Run a process without blocking the event loop. The awaitable
+        counterpart of :py:meth:`run` using an
+        :py:class:`AsyncCommandExecutor`.
+
+        :param args: List, tuple or string. A sequence of
+            process arguments, like ``subprocess.Popen(args)``.
+        :param log: Log the ``stderr`` and the ``stdout`` of the
+            process. If false the ``stdout`` and the ``stderr`` are logged only
+            to the local process logger, not to get global master logger.
+        :param ignore_exceptions: A list of none-zero exit codes, which is
+            ignored by this method.
+        :param encoding: The encoding of the output or ``None`` to keep the
+            raw bytes, see :py:class:`CommandExecutor`.
+        :param errors: The error handling scheme of the decoder, for example
+            ``strict``, ``replace`` (default) or ``backslashreplace``.
+        :param extract: Extract performance data from the output lines, see
+            :py:meth:`run`.
+        """
+        if log:
+            master_logger = self.log
+        else:
+            master_logger = None
+        process = AsyncCommandExecutor(
+            args,
+            master_logger=master_logger,
+            encoding=encoding,
+            errors=errors,
+            memory_budget=self._memory_budget,
+            echo=self._echo,
+            extract=extract,
+            **kwargs,
+        )
+        await process.run()
+        self.processes.append(process)
+        self._check_returncodes([process], ignore_exceptions)
         return process
 
+    def run_many(
+        self,
+        commands: Sequence[Args],
+        max_workers: Optional[int] = None,
+        log: bool = True,
+        ignore_exceptions: list[int] = [],
+        pump: Pump = "thread",
+        read_mode: ReadMode = "line",
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        progress_interval: Optional[float] = None,
+        extract: Optional[Mapping[str, Extractor]] = None,
+        **kwargs: Unpack[ProcessArgs],
+    ) -> list[CommandExecutor]:
+        """
+        Run several independent processes side by side.
+
+        Each process has its own output buffer. The lines forwarded to the
+        master logger are tagged with the index of the command, for example
+        ``[0] sending incremental file list``. The executors are appended to
+        :py:attr:`processes` in the order of ``commands``. The exit codes
+        are checked after all processes have finished. If a command cannot
+        be run (for example it is not found), the executors of the other
+        commands are appended and checked first, then the exception of the
+        first such command is raised.
+
+        :param commands: A sequence of commands. Each command is a list,
+            tuple or string, like ``subprocess.Popen(args)``.
+        :param max_workers: The maximum number of processes running at the
+            same time, see :py:class:`concurrent.futures.ThreadPoolExecutor`.
+        :param log: Log the ``stderr`` and the ``stdout`` of the
+            processes. If false the ``stdout`` and the ``stderr`` are logged
+            only to the local process loggers.
+        :param ignore_exceptions: A list of none-zero exit codes, which is
+            ignored by this method.
+
+        The remaining parameters are the same as in :py:meth:`run`. Each
+        process sends its own progress reports and has its own extractors,
+        the extracted values of the processes are merged in the order of
+        ``commands`` (see :py:attr:`performance_data`).
+        """
+        if log:
+            master_logger = self.log
+        else:
+            master_logger = None
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(
+                    CommandExecutor,
+                    args,
+                    master_logger=master_logger,
+                    pump=pump,
+                    read_mode=read_mode,
+                    encoding=encoding,
+                    errors=errors,
+                    tag=str(index),
+                    memory_budget=self._memory_budget,
+                    echo=self._echo,
+                    progress=self._progress_callback(args, progress_interval),
+                    progress_interval=(
+                        progress_interval
+                        if progress_interval is not None
+                        else DEFAULT_PROGRESS_INTERVAL
+                    ),
+                    extract=extract,
+                    **kwargs,
+                )
+                for index, args in enumerate(commands)
+            ]
+        processes: list[CommandExecutor] = []
+        failures: list[BaseException] = []
+        for future in futures:
+            failure = future.exception()
+            if failure is None:
+                processes.append(future.result())
+            else:
+                failures.append(failure)
+        self.processes.extend(processes)
+        try:
+            self._check_returncodes(processes, ignore_exceptions)
+        except CommandWatcherError as error:
+            if failures:
+                raise failures[0] from error
+            raise
+        if failures:
+            # The first command that could not be run.
+            raise failures[0]
+        return processes
+
+    def _check_returncodes(
+        self, processes: Sequence[BaseExecutor], ignore_exceptions: list[int]
+    ) -> None:
+        """Raise a :py:class:`CommandWatcherError` if processes exit with
+        a non-zero exit code that is not ignored."""
+        if not self._raise_exceptions:
+            return
+        failed = [
+            process
+            for process in processes
+            if process.returncode != 0 and process.returncode not in ignore_exceptions
+        ]
+        if not failed:
+            return
+        if len(failed) == 1:
+            msg = "The command '{}' exists with an non-zero return code ({}).".format(
+                " ".join(failed[0].args_normalized), failed[0].returncode
+            )
+        else:
+            msg = "The commands {} exit with non-zero return codes.".format(
+                ", ".join(
+                    "'{}' ({})".format(
+                        " ".join(process.args_normalized), process.returncode
+                    )
+                    for process in failed
+                )
+            )
+        raise CommandWatcherError(
+            msg,
+            **self._service_params(),
+            log_records=self._log_handler.all_records,
+        )
+
+    def _service_params(self) -> dict[str, Any]:
+        params: dict[str, Any] = {"service_name": self._service_name}
+        if self._service_display_name is not None:
+            params["service_display_name"] = self._service_display_name
+        return params
+
     def report(self, status: Status, **data: Unpack[MinimalMessageParams]) -> Message:
         """Report a message using the preconfigured channels."""
+        self._reports += 1
         message = reporter.report(
             status=status,
-            service_name=self._service_name,
+            **self._service_params(),
             log_records=self._log_handler.all_records,
             processes=self.processes,
             **data,
         )
         self.log.debug(message)
+        for result in message.channel_results:
+            if not result.ok:
+                self.log.warning(f"Report not delivered: {result!r}")
         return message
 
+    def flush_reports(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the reports queued in the background are delivered.
+
+        :param timeout: The maximum time to wait in seconds.
+
+        :return: ``False`` if the timeout expired."""
+        return reporter.flush(timeout)
+
+    @property
+    def usage(self) -> Optional[ResourceUsage]:
+        """The total resource usage of all processes run so far. ``None`` if
+        no usage is available."""
+        return ResourceUsage.total(
+            process.usage for process in self.processes if process.usage is not None
+        )
+
+    @property
+    def performance_data(self) -> dict[str, Any]:
+        """The performance data extracted from the output of all processes
+        run so far (see the parameter ``extract`` of :py:meth:`run`). A later
+        process overrides the values of an earlier one."""
+        data: dict[str, Any] = {}
+        for process in self.processes:
+            data.update(process.performance_data)
+        return data
+
     def final_report(self, **data: Unpack[MessageParams]) -> Message:
-        """The same as the ``report`` method. Adds ``execution_time`` to the
-        ``performance_data``.
+        """The same as the ``report`` method. Adds ``execution_time``, the
+        performance data extracted from the output (see
+        :py:attr:`performance_data`) and the total resource usage of the
+        processes (see :py:attr:`usage`) to the ``performance_data``. The
+        given ``performance_data`` take precedence.
         """
-        timer_result = self._timer.result()
-        self.log.info(f"Overall execution time: {timer_result}")
+        timer_result = round(self._timer.result(), 3)
+        self.log.info(f"Overall execution time: {self._timer}")
         status = data.get("status", 0)
         data_dict: dict[str, Any] = dict(data)
-        if "performance_data" not in data_dict:
-            data_dict["performance_data"] = {}
+        # A copy: the performance data of the caller are not modified.
+        data_dict["performance_data"] = dict(data.get("performance_data") or {})
         data_dict["performance_data"]["execution_time"] = timer_result
+        for key, value in self.performance_data.items():
+            data_dict["performance_data"].setdefault(key, value)
+        usage = self.usage
+        if usage is not None:
+            for key, value in usage.performance_data.items():
+                data_dict["performance_data"].setdefault(key, value)
         if "status" in data_dict:
             del data_dict["status"]
         return self.report(status=status, **data_dict)
@@ -0,0 +1,458 @@
+"""A compact store for the captured log entries.
+
+Every entry (the output lines of a process and the log messages) is
+stored in ``array`` backed columns (creation time, source, level, tag,
+offset, length) pointing into one shared ``bytearray`` holding the messages.
+:py:class:`logging.LogRecord` objects are built only on demand.
+
+A store can be shared by several log handlers: each handler writes its
+entries with its own source number and reads only its own entries.
+
+The store keeps its entries within a memory budget. If the budget is
+exceeded, the entries in the memory are spilled to an append-only temporary
+file."""
+
+import logging
+import struct
+import tempfile
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import IO, Optional, Union
+
+Line = Union[str, bytes]
+"""A message: decoded text or raw bytes."""
+
+Entry = tuple[float, int, Optional[str], Line]
+"""created, levelno, tag, message"""
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+"""The default memory budget of a log handler in bytes (64 MiB)."""
+
+ENTRY_SIZE = 8 + 4 + 1 + 1 + 2 + 8 + 4
+"""The size of the columns of one entry in bytes: creation time, source,
+level, raw bytes flag, tag, offset and length."""
+
+_HEADER = struct.Struct("<dIB?HI")
+"""created, source, levelno, raw bytes flag, length of the tag (0: no tag),
+length of the message"""
+
+
+def _encode(msg: Line) -> bytes:
+    if isinstance(msg, bytes):
+        return msg
+    return msg.encode("utf-8", errors="surrogatepass")
+
+
+def _decode(data: Union[bytes, bytearray], raw: bool) -> Line:
+    if raw:
+        return bytes(data)
+    return data.decode("utf-8", errors="surrogatepass")
+
+
+def make_record(entry: Entry) -> logging.LogRecord:
+    """Build a :py:class:`logging.LogRecord` from an entry.
+
+    :param entry: A tuple of created, levelno, tag and message.
+    """
+    created, levelno, tag, msg = entry
+    attrs: dict[str, object] = {
+        "msg": msg,
+        "levelno": levelno,
+        "levelname": logging.getLevelName(levelno),
+        "created": created,
+        "msecs": int((created - int(created)) * 1000) + 0.0,
+    }
+    if tag is not None:
+        attrs["tag"] = tag
+    return logging.makeLogRecord(attrs)
+
+
+class SpillFile:
+    """An append-only temporary file that stores the entries evicted from
+    the memory."""
+
+    _file: IO[bytes]
+
+    count: int
+    """The number of spilled entries."""
+
+    _offsets: "array[int]"
+    """The offsets of the entries in the file, for random access."""
+
+    _positions: dict[int, "array[int]"]
+    """The positions of the entries of each source."""
+
+    def __init__(self) -> None:
+        self._file = tempfile.TemporaryFile(prefix="command-watcher-")
+        self.count = 0
+        self._offsets = array("Q")
+        self._positions = {}
+
+    def append(self, entries: Iterable[tuple[int, Entry]]) -> None:
+        """Append entries to the end of the file.
+
+        :param entries: The entries to spill, each with its source.
+        """
+        chunks: list[bytes] = []
+        offset = self._file.seek(0, 2)
+        for source, (created, levelno, tag, msg) in entries:
+            msg_bytes = _encode(msg)
+            tag_bytes = tag.encode() if tag else b""
+            chunks.append(
+                _HEADER.pack(
+                    created,
+                    source,
+                    levelno,
+                    isinstance(msg, bytes),
+                    len(tag_bytes),
+                    len(msg_bytes),
+                )
+            )
+            chunks.append(tag_bytes)
+            chunks.append(msg_bytes)
+            self._offsets.append(offset)
+            positions = self._positions.get(source)
+            if positions is None:
+                positions = self._positions[source] = array("Q")
+            positions.append(self.count)
+            offset += _HEADER.size + len(tag_bytes) + len(msg_bytes)
+            self.count += 1
+        self._file.write(b"".join(chunks))
+
+    def positions(self, source: Optional[int] = None) -> Sequence[int]:
+        """The positions of the spilled entries of one source.
+
+        :param source: ``None``: the positions of all entries."""
+        if source is None:
+            return range(self.count)
+        return self._positions.get(source, ())
+
+    def _read(self) -> Entry:
+        read = self._file.read
+        created, _, levelno, raw, tag_length, msg_length = _HEADER.unpack(
+            read(_HEADER.size)
+        )
+        tag: Optional[str] = None
+        if tag_length:
+            tag = read(tag_length).decode()
+        return created, levelno, tag, _decode(read(msg_length), raw)
+
+    def entry(self, position: int) -> Entry:
+        """Read one spilled entry.
+
+        :param position: The position of the entry in the file."""
+        self._file.flush()
+        self._file.seek(self._offsets[position])
+        return self._read()
+
+    def entries(self, source: Optional[int] = None) -> Iterator[Entry]:
+        """Read the spilled entries in the order they were appended.
+
+        :param source: Read only the entries of this source. ``None``: all
+            entries."""
+        self._file.flush()
+        for position in self.positions(source):
+            # Seek every time: the file may be read or appended to in the
+            # meantime.
+            self._file.seek(self._offsets[position])
+            yield self._read()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CaptureStore:
+    """Store log entries in ``array`` backed columns pointing into one
+    shared ``bytearray``.
+
+    :param memory_budget: The maximum size of the entries in the memory in
+        bytes. If exceeded, the entries are spilled to a temporary file.
+    :param indexed_levels: Keep an index of the positions of the entries of
+        these levels, for example ``STDOUT`` and ``STDERR``.
+    """
+
+    memory_budget: int
+
+    _sources: int
+    """The number of sources. Source 0 is the owner of the store."""
+
+    _created: "array[float]"
+
+    _source: "array[int]"
+
+    _levelno: "array[int]"
+
+    _raw: "array[int]"
+    """1: The message is raw bytes, 0: The message is UTF-8 encoded text."""
+
+    _tag: "array[int]"
+    """Index in :py:attr:`_tags` plus one, 0: no tag."""
+
+    _offset: "array[int]"
+
+    _length: "array[int]"
+
+    _data: bytearray
+    """The messages of all entries in the memory."""
+
+    _tags: list[str]
+
+    _tag_ids: dict[str, int]
+
+    _index: dict[int, "array[int]"]
+    """The positions of the entries of the levels that are indexed, for
+    example ``STDOUT`` and ``STDERR``."""
+
+    _positions: dict[int, "array[int]"]
+    """The positions of the entries of each source."""
+
+    _spill: Optional[SpillFile]
+    """The temporary file, created on the first spill."""
+
+    def __init__(
+        self,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        indexed_levels: Iterable[int] = (),
+    ) -> None:
+        self.memory_budget = memory_budget
+        self._sources = 1
+        self._created = array("d")
+        self._source = array("I")
+        self._levelno = array("B")
+        self._raw = array("B")
+        self._tag = array("H")
+        self._offset = array("Q")
+        self._length = array("I")
+        self._data = bytearray()
+        self._tags = []
+        self._tag_ids = {}
+        self._index = {levelno: array("I") for levelno in indexed_levels}
+        self._positions = {}
+        self._spill = None
+
+    def __len__(self) -> int:
+        return self.spilled_count + len(self._created)
+
+    @property
+    def memory_count(self) -> int:
+        """The number of entries in the memory."""
+        return len(self._created)
+
+    @property
+    def spilled_count(self) -> int:
+        """The number of entries spilled to the disk."""
+        if self._spill is None:
+            return 0
+        return self._spill.count
+
+    @property
+    def memory(self) -> int:
+        """The size of the entries in the memory in bytes."""
+        return len(self._data) + len(self._created) * ENTRY_SIZE
+
+    def add_source(self) -> int:
+        """Register a new source, for example the log handler of a process
+        sharing the store of the log handler of the watch.
+
+        :return: The number of the new source."""
+        source = self._sources
+        self._sources += 1
+        return source
+
+    def _tag_id(self, tag: Optional[str]) -> int:
+        if tag is None:
+            return 0
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            self._tags.append(tag)
+            tag_id = self._tag_ids[tag] = len(self._tags)
+        return tag_id
+
+    def append(
+        self,
+        created: float,
+        levelno: int,
+        msg: Line,
+        tag: Optional[str] = None,
+        source: int = 0,
+    ) -> None:
+        """Append one entry.
+
+        :param created: The creation time (UNIX timestamp).
+        :param levelno: The level, for example ``logging.INFO`` or
+            ``STDOUT``.
+        :param msg: The message.
+        :param tag: The tag of the process the message was forwarded from.
+        :param source: The source of the entry, see :py:meth:`add_source`.
+        """
+        self.extend(created, levelno, (msg,), tag, source)
+
+    def extend(
+        self,
+        created: float,
+        levelno: int,
+        msgs: Iterable[Line],
+        tag: Optional[str] = None,
+        source: int = 0,
+    ) -> int:
+        """Append a batch of entries with the same creation time and level.
+
+        :param created: The creation time (UNIX timestamp).
+        :param levelno: The level, for example ``STDOUT``.
+        :param msgs: The messages.
+        :param tag: The tag of the process the messages were forwarded from.
+        :param source: The source of the entries, see :py:meth:`add_source`.
+
+        :return: The size of the UTF-8 encoded messages in bytes.
+        """
+        tag_id = self._tag_id(tag)
+        index = self._index.get(levelno)
+        positions = self._positions.get(source)
+        if positions is None:
+            positions = self._positions[source] = array("I")
+        data = self._data
+        size = len(data)
+        for msg in msgs:
+            if index is not None:
+                index.append(len(self._created))
+            positions.append(len(self._created))
+            msg_bytes = _encode(msg)
+            self._created.append(created)
+            self._source.append(source)
+            self._levelno.append(levelno)
+            self._raw.append(isinstance(msg, bytes))
+            self._tag.append(tag_id)
+            self._offset.append(len(data))
+            self._length.append(len(msg_bytes))
+            data += msg_bytes
+        size = len(data) - size
+        if self.memory > self.memory_budget:
+            self.spill()
+        return size
+
+    def _entry(self, position: int) -> Entry:
+        offset = self._offset[position]
+        tag_id = self._tag[position]
+        return (
+            self._created[position],
+            self._levelno[position],
+            self._tags[tag_id - 1] if tag_id else None,
+            _decode(
+                self._data[offset : offset + self._length[position]],
+                bool(self._raw[position]),
+            ),
+        )
+
+    def positions(self, source: Optional[int] = None) -> Sequence[int]:
+        """The positions of the entries of one source in the memory.
+
+        :param source: ``None``: the positions of all entries."""
+        if source is None:
+            return range(len(self._created))
+        return self._positions.get(source, ())
+
+    def memory_entries(self, source: Optional[int] = None) -> Iterator[Entry]:
+        """The entries in the memory.
+
+        :param source: Only the entries of this source. ``None``: all
+            entries."""
+        for position in self.positions(source):
+            yield self._entry(position)
+
+    def count(self, source: Optional[int] = None) -> int:
+        """The number of entries on the disk and in the memory.
+
+        :param source: Only the entries of this source. ``None``: all
+            entries."""
+        spilled = len(self._spill.positions(source)) if self._spill else 0
+        return spilled + len(self.positions(source))
+
+    def entry(self, index: int, source: Optional[int] = None) -> Entry:
+        """An entry on the disk or in the memory.
+
+        :param index: The index of the entry among all entries (of the
+            source), the spilled entries come first.
+        :param source: Only the entries of this source. ``None``: all
+            entries."""
+        spilled = self._spill.positions(source) if self._spill else range(0)
+        memory = self.positions(source)
+        if index < 0:
+            index += len(spilled) + len(memory)
+        if not 0 <= index < len(spilled) + len(memory):
+            raise IndexError("entry index out of range")
+        if index < len(spilled):
+            assert self._spill is not None
+            return self._spill.entry(spilled[index])
+        return self._entry(memory[index - len(spilled)])
+
+    def entries(self, source: Optional[int] = None) -> Iterator[Entry]:
+        """All entries, the spilled ones are read from the disk.
+
+        :param source: Only the entries of this source. ``None``: all
+            entries."""
+        if self._spill is not None:
+            yield from self._spill.entries(source)
+        yield from self.memory_entries(source)
+
+    def messages(self, levelno: int, source: Optional[int] = None) -> Iterator[Line]:
+        """All messages of one level.
+
+        :param levelno: For example ``STDOUT`` or ``STDERR``.
+        :param source: Only the messages of this source. ``None``: the
+            messages of all sources.
+        """
+        if self._spill is not None:
+            for _, level, _, msg in self._spill.entries(source):
+                if level == levelno:
+                    yield msg
+        index = self._index.get(levelno)
+        if index is None:
+            index = array(
+                "I",
+                (p for p, level in enumerate(self._levelno) if level == levelno),
+            )
+        data = self._data
+        sources = self._source
+        for position in index:
+            if source is not None and sources[position] != source:
+                continue
+            offset = self._offset[position]
+            yield _decode(
+                data[offset : offset + self._length[position]],
+                bool(self._raw[position]),
+            )
+
+    def records(self, source: Optional[int] = None) -> Iterator[logging.LogRecord]:
+        """Build :py:class:`logging.LogRecord` objects of all entries.
+
+        :param source: Only the entries of this source. ``None``: all
+            entries."""
+        for entry in self.entries(source):
+            yield make_record(entry)
+
+    def spill(self) -> None:
+        """Move all entries in the memory to the temporary file."""
+        if not self._created:
+            return
+        if self._spill is None:
+            self._spill = SpillFile()
+        self._spill.append(zip(self._source, self.memory_entries(), strict=True))
+        del self._created[:]
+        for column in (
+            self._source,
+            self._levelno,
+            self._raw,
+            self._tag,
+            self._offset,
+            self._length,
+            *self._index.values(),
+            *self._positions.values(),
+        ):
+            del column[:]
+        self._data.clear()
+
+    def close(self) -> None:
+        """Remove the temporary file."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
@@ -1,4 +1,6 @@
 import abc
+from collections.abc import Callable, Sequence
+from typing import Optional
 
 from command_watcher.message import BaseClass, Message
 
@@ -6,6 +8,39 @@ from command_watcher.message import BaseClass, Message
 class BaseChannel(BaseClass, metaclass=abc.ABCMeta):
     """Base class for all reporters"""
 
+    timeout: Optional[float] = None
+    """The time in seconds the channel has to deliver a message. ``None``:
+    the timeout of the reporter."""
+
+    durable: bool = False
+    """Store the messages the channel could not deliver in the outbox, see
+    :py:class:`command_watcher.outbox.Outbox`."""
+
+    progress: bool = False
+    """Deliver the progress reports of running processes, see
+    :py:meth:`command_watcher.report.Reporter.report_progress`."""
+
+    on_failure: Optional[
+        Callable[["BaseChannel", Sequence[Message], BaseException], None]
+    ] = None
+    """Called by a channel that delivers its messages later, for example in
+    the digest mode of the e-mail channel, if the delivery fails. The
+    reporter stores the messages of a durable channel in the outbox."""
+
+    @property
+    def key(self) -> str:
+        """The name of the channel in the outbox."""
+        return self.__class__.__name__
+
     @abc.abstractmethod
     def report(self, message: Message) -> None:
         raise NotImplementedError("A reporter class must have a `report` method.")
+
+    def report_batch(self, messages: Sequence[Message]) -> None:
+        """Deliver several messages, for example the pending messages of the
+        outbox. The default implementation reports the messages one by one.
+
+        :param messages: The messages in the order they were created.
+        """
+        for message in messages:
+            self.report(message)
@@ -1,14 +1,177 @@
+import atexit
+import sys
+import threading
+import time
+import weakref
+from collections.abc import Sequence
 from email.header import Header
 from email.mime.text import MIMEText
 from email.utils import formatdate
-from smtplib import SMTP
+from smtplib import SMTP, SMTPException, SMTPServerDisconnected
+from typing import Optional
 
 from command_watcher.channels.base_channel import BaseChannel
 from command_watcher.message import Message
 
+KEEPALIVE = 30.0
+"""The time in seconds a SMTP session may be idle before it is checked
+with a ``NOOP`` command."""
+
+
+class SMTPSession:
+    """A persistent SMTP session that is reused by all reports sent over
+    the same server with the same login.
+
+    The connection is opened on the first mail. Before a connection that was
+    idle longer than ``keepalive`` seconds is reused, it is checked with a
+    ``NOOP`` command. A broken connection is opened again once.
+
+    :param smtp_server: The SMTP server, for example ``smtp.example.com:587``.
+    :param smtp_login: The login name. An empty login: no authentication.
+    :param smtp_password: The password.
+    :param starttls: Encrypt the connection with ``STARTTLS``.
+    :param keepalive: See above.
+    :param timeout: The timeout of the socket operations in seconds.
+    """
+
+    smtp_server: str
+
+    smtp_login: str
+
+    smtp_password: str
+
+    starttls: bool
+
+    keepalive: float
+
+    timeout: float
+
+    connections: int
+    """The number of connections opened so far."""
+
+    _smtp: Optional[SMTP]
+
+    _last_used: float
+
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        smtp_server: str,
+        smtp_login: str,
+        smtp_password: str,
+        starttls: bool = True,
+        keepalive: float = KEEPALIVE,
+        timeout: float = 30.0,
+    ) -> None:
+        self.smtp_server = smtp_server
+        self.smtp_login = smtp_login
+        self.smtp_password = smtp_password
+        self.starttls = starttls
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.connections = 0
+        self._smtp = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> SMTP:
+        smtp = SMTP(self.smtp_server, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.smtp_login:
+                smtp.login(self.smtp_login, self.smtp_password)
+        except BaseException:
+            smtp.close()
+            raise
+        self.connections += 1
+        return smtp
+
+    def _alive(self, smtp: SMTP) -> bool:
+        if time.monotonic() - self._last_used < self.keepalive:
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except (SMTPException, OSError):
+            return False
+
+    def _discard(self) -> None:
+        if self._smtp is not None:
+            self._smtp.close()
+            self._smtp = None
+
+    def sendmail(self, from_addr: str, to_addrs: list[str], msg: str) -> None:
+        """Send a mail, open or reopen the connection if necessary."""
+        with self._lock:
+            if self._smtp is not None and not self._alive(self._smtp):
+                self._discard()
+            reused = self._smtp is not None
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.sendmail(from_addr, to_addrs, msg)
+            except (SMTPServerDisconnected, OSError):
+                self._discard()
+                if not reused:
+                    raise
+                self._smtp = self._connect()
+                self._smtp.sendmail(from_addr, to_addrs, msg)
+            self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        """Quit the session."""
+        with self._lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except (SMTPException, OSError):
+                    pass
+                self._discard()
+
+
+_sessions: dict[tuple[str, str, bool], SMTPSession] = {}
+
+_sessions_lock = threading.Lock()
+
+
+def get_session(
+    smtp_server: str, smtp_login: str, smtp_password: str, starttls: bool = True
+) -> SMTPSession:
+    """Get the shared session of a server and a login, all ``EmailChannel``
+    objects of a process use the same sessions."""
+    key = (smtp_server, smtp_login, starttls)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = SMTPSession(
+                smtp_server, smtp_login, smtp_password, starttls
+            )
+        return session
+
+
+@atexit.register
+def close_sessions() -> None:
+    """Quit all shared sessions."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
 
 class EmailChannel(BaseChannel):
-    """Send reports by e-mail."""
+    """Send reports by e-mail.
+
+    The mails are sent over a shared persistent SMTP session, see
+    :py:class:`SMTPSession`.
+
+    :param starttls: Encrypt the connection with ``STARTTLS``.
+    :param digest_window: Collect the reports for this number of seconds
+        and send them in one mail. ``None``: send every report at once.
+    """
+
+    durable = True
 
     smtp_server: str
     smtp_login: str
@@ -16,6 +179,15 @@ class EmailChannel(BaseChannel):
     to_addr: str
     from_addr: str
     to_addr_critical: str
+    starttls: bool
+    digest_window: Optional[float]
+
+    _digest: list[Message]
+    """The reports waiting for the digest mail."""
+
+    _timer: Optional[threading.Timer]
+
+    _lock: threading.Lock
 
     def __init__(
         self,
@@ -25,6 +197,8 @@ class EmailChannel(BaseChannel):
         to_addr: str,
         from_addr: str,
         to_addr_critical: str,
+        starttls: bool = True,
+        digest_window: Optional[float] = None,
     ) -> None:
         self.smtp_server = smtp_server
         self.smtp_login = smtp_login
@@ -32,6 +206,13 @@ class EmailChannel(BaseChannel):
         self.to_addr = to_addr
         self.from_addr = from_addr
         self.to_addr_critical = to_addr_critical
+        self.starttls = starttls
+        self.digest_window = digest_window
+        self._digest = []
+        self._timer = None
+        self._lock = threading.Lock()
+        if digest_window is not None:
+            _digest_channels.add(self)
 
     def __str__(self) -> str:
         return self._obj_to_str(
@@ -43,25 +224,93 @@ class EmailChannel(BaseChannel):
             ]
         )
 
-    def report(self, message: Message) -> None:
-        """Send an e-mail message.
+    @property
+    def session(self) -> SMTPSession:
+        return get_session(
+            self.smtp_server, self.smtp_login, self.smtp_password, self.starttls
+        )
 
-        :param message: A message object.
-        """
-        if message.status == 2 and self.to_addr_critical:
+    def _send(self, critical: bool, subject: str, body: str) -> None:
+        if critical and self.to_addr_critical:
             to_addr = self.to_addr_critical
         else:
             to_addr = self.to_addr
 
-        mime = MIMEText(message.body, "plain", "utf-8")
+        mime = MIMEText(body, "plain", "utf-8")
 
-        mime["Subject"] = str(Header(message.message, "utf-8"))
+        mime["Subject"] = str(Header(subject, "utf-8"))
         mime["From"] = self.from_addr
         mime["To"] = to_addr
         mime["Date"] = formatdate(localtime=True)
 
-        server = SMTP(self.smtp_server)
-        server.starttls()
-        server.login(self.smtp_login, self.smtp_password)
-        server.sendmail(self.from_addr, [to_addr], mime.as_string())
-        server.quit()
+        self.session.sendmail(self.from_addr, [to_addr], mime.as_string())
+
+    def _send_digest(self, messages: Sequence[Message]) -> None:
+        if len(messages) == 1:
+            self._send(messages[0].status == 2, messages[0].message, messages[0].body)
+            return
+        worst = max(messages, key=lambda message: message.status)
+        sections: list[str] = []
+        for message in messages:
+            sections.append(f"{message.message}\n\n{message.body}")
+        self._send(
+            any(message.status == 2 for message in messages),
+            f"[digest] {len(messages)} reports, {worst.message}",
+            ("\n\n" + "-" * 72 + "\n\n").join(sections),
+        )
+
+    def report(self, message: Message) -> None:
+        """Send an e-mail message. In the digest mode the message is sent
+        later, together with the other messages of the time window.
+
+        :param message: A message object.
+        """
+        if self.digest_window is None:
+            self._send(message.status == 2, message.message, message.body)
+            return
+        with self._lock:
+            self._digest.append(message)
+            if self._timer is None:
+                self._timer = threading.Timer(self.digest_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def report_batch(self, messages: Sequence[Message]) -> None:
+        """Send the messages in one digest mail."""
+        if messages:
+            self._send_digest(messages)
+
+    def flush(self) -> None:
+        """Send the collected reports of the digest mode at once.
+
+        If the mail cannot be sent, the reports are passed to
+        :py:attr:`on_failure` (the outbox of the reporter), without it the
+        exception is raised."""
+        with self._lock:
+            messages = self._digest
+            self._digest = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not messages:
+            return
+        try:
+            self._send_digest(messages)
+        except Exception as error:
+            if self.on_failure is None:
+                raise
+            self.on_failure(self, messages, error)
+
+
+_digest_channels: "weakref.WeakSet[EmailChannel]" = weakref.WeakSet()
+
+
+@atexit.register
+def flush_digests() -> None:
+    """Send the collected reports of all channels in the digest mode. It
+    runs before :py:func:`close_sessions` at exit."""
+    for channel in list(_digest_channels):
+        try:
+            channel.flush()
+        except Exception as error:
+            print(f"Digest mail not sent: {error!r}", file=sys.stderr)
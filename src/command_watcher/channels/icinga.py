@@ -1,5 +1,10 @@
-from typing import Optional
+import atexit
+import concurrent.futures
+import threading
+from collections.abc import Sequence
+from typing import Any, Optional
 
+import requests
 from pretiac.client import Client
 from pretiac.config import Config
 
@@ -8,7 +13,177 @@ from command_watcher.message import Message
 from command_watcher.utils import HOSTNAME
 
 
+class CheckResultBatch:
+    """Collect the check results of many services and send them over one
+    kept-alive HTTP session.
+
+    A batch is sent when it reaches ``size`` results or ``window`` seconds
+    after its first result, whatever comes first. The API endpoint accepts
+    only one check result per request, but all requests of a batch use the
+    same connection, so the TLS handshake is paid once.
+
+    :param client: The client, used for the configuration and to create
+        unknown hosts and services.
+    :param window: The time in seconds to gather check results.
+    :param size: The maximum number of check results in a batch.
+    :param url: The URL of the API endpoint, by default the URL of the
+        client.
+    """
+
+    client: Client
+
+    window: float
+
+    size: int
+
+    url: str
+
+    session: requests.Session
+
+    _pending: list[tuple[dict[str, Any], "concurrent.futures.Future[None]"]]
+
+    _timer: Optional[threading.Timer]
+
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        client: Client,
+        window: float = 0.5,
+        size: int = 100,
+        url: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.window = window
+        self.size = size
+        self.url = url if url is not None else client.raw_client.url
+        self.session = self._create_session(client.raw_client.get_client_config())
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_session(config: Config) -> requests.Session:
+        """Authenticate like :py:class:`pretiac.client.Client`."""
+        session = requests.Session()
+        if config.client_certificate and config.client_private_key:
+            session.cert = (config.client_certificate, config.client_private_key)
+        elif config.client_certificate:
+            session.cert = config.client_certificate
+        elif config.http_basic_username and config.http_basic_password:
+            session.auth = (config.http_basic_username, config.http_basic_password)
+        session.verify = config.ca_certificate if config.ca_certificate else False
+        session.headers.update(
+            {"Accept": "application/json", "X-HTTP-Method-Override": "POST"}
+        )
+        return session
+
+    def add(self, **check_result: Any) -> "concurrent.futures.Future[None]":
+        """Add a check result to the batch.
+
+        :param check_result: The keyword arguments of
+            :py:meth:`pretiac.client.Client.send_service_check_result`.
+
+        :return: A future that is resolved when the check result is sent.
+        """
+        future: concurrent.futures.Future[None] = concurrent.futures.Future()
+        with self._lock:
+            self._pending.append((check_result, future))
+            full = len(self._pending) >= self.size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+        return future
+
+    def _send(self, check_result: dict[str, Any]) -> None:
+        payload = {
+            "type": "Service",
+            "service": f"{check_result['host']}!{check_result['service']}",
+            "exit_status": check_result["exit_status"],
+            "plugin_output": check_result["plugin_output"],
+        }
+        if check_result["performance_data"]:
+            payload["performance_data"] = check_result["performance_data"]
+        response = self.session.post(
+            f"{self.url}/v1/actions/process-check-result", json=payload, timeout=30
+        )
+        if response.status_code == 404:
+            # The host or the service does not exist yet.
+            self.client.send_service_check_result(**check_result)
+            return
+        response.raise_for_status()
+
+    def flush(self) -> None:
+        """Send all gathered check results now."""
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for check_result, future in pending:
+            try:
+                self._send(check_result)
+            except Exception as error:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    def close(self) -> None:
+        self.flush()
+        self.session.close()
+
+
+_batches: dict[tuple[str, Optional[str]], CheckResultBatch] = {}
+
+_batches_lock = threading.Lock()
+
+
+def get_batch(
+    client: Client, window: float = 0.5, size: int = 100, url: Optional[str] = None
+) -> CheckResultBatch:
+    """Get the shared batch of an API endpoint and user, all
+    ``IcingaChannel`` objects of a process use the same batches."""
+    if url is None:
+        url = client.raw_client.url
+    key = (url, client.raw_client.get_client_config().http_basic_username)
+    with _batches_lock:
+        batch = _batches.get(key)
+        if batch is None:
+            batch = _batches[key] = CheckResultBatch(client, window, size, url)
+        return batch
+
+
+@atexit.register
+def close_batches() -> None:
+    """Send the pending check results and close the sessions."""
+    with _batches_lock:
+        batches = list(_batches.values())
+        _batches.clear()
+    for batch in batches:
+        batch.close()
+
+
 class IcingaChannel(BaseChannel):
+    """Send check results to the Icinga API.
+
+    :param batch_window: Gather the check results of all channels of the
+        process for this number of seconds and send them over one kept-alive
+        session, see :py:class:`CheckResultBatch`. A report waits until its
+        batch is sent. ``None``: send every check result at once.
+    :param batch_size: Send a batch at once when it has this number of check
+        results.
+    :param url: The URL of the API endpoint of the batches, by default
+        ``https://api_endpoint_host:api_endpoint_port``.
+    """
+
+    durable = True
+
+    progress = True
+
     service_name: str
 
     service_display_name: Optional[str]
@@ -22,11 +197,18 @@ class IcingaChannel(BaseChannel):
     client_private_key: Optional[str]
     ca_certificate: Optional[str]
 
+    batch_window: Optional[float]
+    batch_size: int
+    url: Optional[str]
+
     def __init__(
         self,
         service_name: str,
         config: Config,
         service_display_name: Optional[str] = None,
+        batch_window: Optional[float] = None,
+        batch_size: int = 100,
+        url: Optional[str] = None,
     ) -> None:
         self.service_name = service_name
         self.service_display_name = service_display_name
@@ -40,6 +222,9 @@ class IcingaChannel(BaseChannel):
         self.client_certificate = config.client_certificate
         self.client_private_key = config.client_private_key
         self.ca_certificate = config.ca_certificate
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.url = url
 
     def __str__(self) -> str:
         return self._obj_to_str(
@@ -53,7 +238,7 @@ class IcingaChannel(BaseChannel):
             ]
         )
 
-    def report(self, message: Message) -> None:
+    def _check_result(self, message: Message) -> dict[str, Any]:
         service_name = (
             message.service_name if message.service_name else self.service_name
         )
@@ -62,11 +247,40 @@ class IcingaChannel(BaseChannel):
             if message.service_display_name
             else self.service_display_name
         )
-        self.__client.send_service_check_result(
-            service=service_name,
-            host=HOSTNAME,
-            exit_status=message.status,
-            plugin_output=message.plugin_output,
-            performance_data=message.performance_data,
-            display_name=service_display_name,
-        )
+        return {
+            "service": service_name,
+            "host": HOSTNAME,
+            "exit_status": message.status,
+            "plugin_output": message.plugin_output,
+            "performance_data": message.performance_data,
+            "display_name": service_display_name,
+        }
+
+    @property
+    def batch(self) -> Optional[CheckResultBatch]:
+        if self.batch_window is None:
+            return None
+        return get_batch(self.__client, self.batch_window, self.batch_size, self.url)
+
+    def report(self, message: Message) -> None:
+        batch = self.batch
+        if batch is None:
+            self.__client.send_service_check_result(**self._check_result(message))
+            return
+        batch.add(**self._check_result(message)).result()
+
+    def report_batch(self, messages: Sequence[Message]) -> None:
+        """Send only the latest check result of each service. The older
+        results are outdated."""
+        latest: dict[str, Message] = {}
+        for message in messages:
+            latest.pop(message.service_name, None)
+            latest[message.service_name] = message
+        batch = self.batch
+        if batch is None:
+            for message in latest.values():
+                self.report(message)
+            return
+        futures = [batch.add(**self._check_result(m)) for m in latest.values()]
+        for future in futures:
+            future.result()
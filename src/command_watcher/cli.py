@@ -0,0 +1,197 @@
+"""The command line interface ``command-watcher``."""
+
+import argparse
+import os
+import re
+import sys
+from collections.abc import Sequence
+from typing import Optional
+
+from command_watcher.job import Job
+
+# The client (``submit``) imports only what it needs, the configuration and
+# the channels are imported by the subcommands using them. ``run`` imports
+# only the channels of the configuration.
+
+
+def _performance_pattern(value: str) -> tuple[str, str]:
+    """Parse ``NAME=REGEX``."""
+    name, sep, pattern = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=REGEX: {value!r}")
+    try:
+        re.compile(pattern)
+    except re.error as error:
+        raise argparse.ArgumentTypeError(f"{pattern!r}: {error}") from error
+    return name, pattern
+
+
+def _job(
+    args: argparse.Namespace,
+    cwd: Optional[str] = None,
+    env: Optional[dict[str, str]] = None,
+) -> Job:
+    return Job(
+        args=args.command,
+        service_name=args.service_name,
+        service_display_name=args.service_display_name,
+        ignore_exit_codes=args.ignore_exit_code,
+        extract=dict(args.performance_data),
+        cwd=cwd,
+        env=env,
+    )
+
+
+def _flush_outbox(args: argparse.Namespace) -> int:
+    from command_watcher import create_channels
+    from command_watcher.config import OutboxConfig, load_config
+    from command_watcher.outbox import outbox_from_config
+
+    config = load_config(args.config)
+    outbox_config = config.outbox if config.outbox is not None else OutboxConfig()
+    if args.outbox is not None:
+        outbox_config.path = args.outbox
+    outbox = outbox_from_config(outbox_config)
+    channels = create_channels(config, service_name="command_watcher")
+    delivered = outbox.flush(channels, force=args.force)
+    pending = len(outbox)
+    print(f"Delivered: {delivered}, pending: {pending}")
+    return 1 if pending else 0
+
+
+def _daemon(args: argparse.Namespace) -> int:
+    from command_watcher.daemon import Daemon
+
+    with Daemon(args.socket, config_file=args.config) as daemon:
+        print(f"Listening on {daemon.socket_path}", file=sys.stderr)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def _submit(args: argparse.Namespace) -> int:
+    from command_watcher.client import submit
+
+    job = _job(args, cwd=os.getcwd(), env=dict(os.environ))
+    try:
+        return submit(job, args.socket)
+    except OSError as error:
+        print(f"command-watcher: cannot reach the daemon: {error}", file=sys.stderr)
+        return 1
+    except RuntimeError as error:
+        print(f"command-watcher: {error}", file=sys.stderr)
+        return 1
+
+
+def _run(args: argparse.Namespace) -> int:
+    from command_watcher.config import load_config
+    from command_watcher.job import run_job
+
+    return run_job(_job(args), load_config(args.config), echo=args.echo)
+
+
+def _add_job_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-s",
+        "--service-name",
+        default="command_watcher",
+        help="The name of the watched service (default: command_watcher).",
+    )
+    parser.add_argument(
+        "--service-display-name",
+        help="A human readable form of the service name.",
+    )
+    parser.add_argument(
+        "-i",
+        "--ignore-exit-code",
+        type=int,
+        action="append",
+        default=[],
+        metavar="CODE",
+        help="A non-zero exit code that is not a failure (repeatable).",
+    )
+    parser.add_argument(
+        "-p",
+        "--performance-data",
+        type=_performance_pattern,
+        action="append",
+        default=[],
+        metavar="NAME=REGEX",
+        help="Report the first group of the last output line matching the "
+        "regular expression as performance data, for example: "
+        "-p 'sent_bytes=sent ([0-9,]+) bytes' (repeatable).",
+    )
+    parser.add_argument(
+        "command", nargs="+", help="The command, for example: -- rsync -a src dest"
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="command-watcher",
+        description="Watch the execution of commands and report the results.",
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="The configuration file (default: /etc/command-watcher.yml).",
+    )
+    subcommands = parser.add_subparsers(dest="subcommand", required=True)
+
+    flush_outbox = subcommands.add_parser(
+        "flush-outbox",
+        help="Deliver the messages in the outbox that could not be delivered.",
+    )
+    flush_outbox.add_argument(
+        "--outbox", help="The outbox database (default: from the configuration)."
+    )
+    flush_outbox.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Deliver all pending messages now, ignore the backoff.",
+    )
+    flush_outbox.set_defaults(func=_flush_outbox)
+
+    daemon = subcommands.add_parser(
+        "daemon",
+        help="Run the jobs submitted by 'command-watcher submit' with a warm "
+        "configuration and warm channels.",
+    )
+    daemon.add_argument(
+        "--socket",
+        help="The Unix socket (default: $XDG_RUNTIME_DIR/command-watcher.sock "
+        "or /tmp/command-watcher-<uid>.sock).",
+    )
+    daemon.set_defaults(func=_daemon)
+
+    submit = subcommands.add_parser(
+        "submit",
+        help="Let the daemon run a command and show its output.",
+    )
+    submit.add_argument("--socket", help="The Unix socket of the daemon.")
+    _add_job_arguments(submit)
+    submit.set_defaults(func=_submit)
+
+    run = subcommands.add_parser(
+        "run",
+        help="Run a command, show its output and report the result. Exit with "
+        "the exit code of the command (0 if it is ignored).",
+    )
+    run.add_argument(
+        "--echo",
+        choices=("live", "summary", "none"),
+        default="live",
+        help="How the output lines are shown: every line (default), a "
+        "summary when the command has finished or not at all.",
+    )
+    _add_job_arguments(run)
+    run.set_defaults(func=_run)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = get_parser().parse_args(argv)
+    return args.func(args)
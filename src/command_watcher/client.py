@@ -0,0 +1,66 @@
+"""The thin client of the daemon (see :py:mod:`command_watcher.daemon`).
+
+The client sends a job over a Unix socket together with its own ``stdout``
+and ``stderr`` file descriptors (``SCM_RIGHTS``), so the daemon writes the
+output of the job directly to the terminal, the pipe or the file of the
+client. Then the client waits for the exit code of the command."""
+
+import json
+import os
+import socket
+from typing import Optional
+
+from command_watcher.job import Job
+
+
+def default_socket_path() -> str:
+    """The Unix socket of the daemon: ``$XDG_RUNTIME_DIR/command-watcher.sock``
+    or ``/tmp/command-watcher-<uid>.sock``."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "command-watcher.sock")
+    return os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"command-watcher-{os.getuid()}.sock"
+    )
+
+
+def submit(
+    job: Job,
+    socket_path: Optional[str] = None,
+    stdout: int = 1,
+    stderr: int = 2,
+) -> int:
+    """Let the daemon run a job and wait until it is finished.
+
+    The job keeps running if the client is interrupted.
+
+    :param job: The job.
+    :param socket_path: The Unix socket of the daemon, see
+        :py:func:`default_socket_path`.
+    :param stdout: The file descriptor the daemon writes the ``stdout`` of
+        the watch to.
+    :param stderr: The file descriptor for the ``stderr`` of the watch.
+
+    :return: The exit code of the job, see
+        :py:func:`command_watcher.job.run_job`.
+
+    :raises OSError: If the daemon is not running.
+    :raises ConnectionError: If the daemon did not return an exit code.
+    :raises RuntimeError: If the daemon could not run the job.
+    """
+    if socket_path is None:
+        socket_path = default_socket_path()
+    request = json.dumps(job.to_dict()).encode() + b"\n"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sent = socket.send_fds(sock, [request], [stdout, stderr])
+        if sent < len(request):
+            sock.sendall(request[sent:])
+        with sock.makefile("rb") as response_file:
+            response = response_file.readline()
+    if not response:
+        raise ConnectionError("The daemon closed the connection without a result.")
+    result = json.loads(response)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result["returncode"]
@@ -1,11 +1,26 @@
+import hashlib
+import os
+import pickle
+import tempfile
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Annotated, Any, Optional, Union
 
-import yaml
-from pretiac.config import Config as IcingaConfig
-from pydantic import TypeAdapter
+from pydantic import BeforeValidator, TypeAdapter
 from pydantic.dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from pretiac.config import Config as IcingaConfig
+else:
+
+    def _validate_icinga_config(value: Any) -> Any:
+        """Import :py:mod:`pretiac` (slow) only if the configuration has an
+        ``icinga`` section."""
+        from pretiac.config import Config as IcingaConfig
+
+        return TypeAdapter(IcingaConfig).validate_python(value)
+
+    IcingaConfig = Annotated[Any, BeforeValidator(_validate_icinga_config)]
+
 
 @dataclass
 class EmailConfig:
@@ -27,6 +42,13 @@ class EmailConfig:
     from_addr: str
     """The email address of the sender."""
 
+    starttls: bool = True
+    """Encrypt the connection to the SMTP server with `STARTTLS`."""
+
+    digest_window: Optional[float] = None
+    """Collect the reports for this number of seconds and send them in one
+    mail."""
+
 
 @dataclass
 class BeepConfig:
@@ -34,25 +56,130 @@ class BeepConfig:
     """"Activate the beep channel to report auditive messages."""
 
 
+@dataclass
+class IcingaBatchConfig:
+    window: float = 0.5
+    """The time in seconds to gather the check results of all watches of a
+    process before they are sent over one kept-alive session."""
+
+    size: int = 100
+    """Send the check results at once when there are this many."""
+
+
+@dataclass
+class OutboxConfig:
+    path: str = "~/.local/state/command-watcher/outbox.sqlite"
+    """The SQLite database file storing the messages that could not be
+    delivered."""
+
+    base_delay: float = 60.0
+    """The delay in seconds before the first retry. The delay is doubled
+    after every failed attempt."""
+
+    max_delay: float = 3600.0
+    """The maximum delay in seconds between two attempts."""
+
+
 @dataclass
 class Config:
     email: Optional[EmailConfig] = None
 
     icinga: Optional[IcingaConfig] = None
 
+    icinga_batch: Optional[IcingaBatchConfig] = None
+
     beep: Optional[BeepConfig] = None
 
+    outbox: Optional[OutboxConfig] = None
+
+
+DEFAULT_CONFIG_FILE = "/etc/command-watcher.yml"
+
+_adapter = TypeAdapter(Config)
+"""Built once, not on every load."""
+
+_Stamp = tuple[int, int, int]
+"""The inode, the size and the modification time (in nanoseconds) of a
+configuration file."""
+
+_cache: dict[str, tuple[_Stamp, Config]] = {}
+"""The loaded configurations by the absolute path of the file."""
+
+
+def _stamp(path: str) -> _Stamp:
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _snapshot_file(snapshot_dir: Union[str, Path], path: str) -> Path:
+    name = hashlib.sha1(path.encode()).hexdigest()
+    return Path(snapshot_dir).expanduser() / f"config-{name}.pickle"
+
+
+def _read_snapshot(snapshot: Path, path: str, stamp: _Stamp) -> Optional[Config]:
+    try:
+        with open(snapshot, "rb") as file:
+            snapshot_path, snapshot_stamp, config = pickle.load(file)
+    except Exception:
+        return None
+    if snapshot_path != path or snapshot_stamp != stamp:
+        return None
+    if not isinstance(config, Config):
+        return None
+    return config
+
+
+def _write_snapshot(snapshot: Path, path: str, stamp: _Stamp, config: Config) -> None:
+    try:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=snapshot.parent, prefix=snapshot.name, delete=False
+        ) as file:
+            pickle.dump((path, stamp, config), file)
+        os.replace(file.name, snapshot)
+    except OSError:
+        pass
+
 
-_config: Optional[Config] = None
+def load_config(
+    config_file: Optional[Union[str, Path]] = None,
+    snapshot_dir: Optional[Union[str, Path]] = None,
+) -> Config:
+    """Load and validate a configuration file.
 
+    The configurations are cached by the path of the file. The cache entry
+    is reloaded automatically when the file changes (its inode, size or
+    modification time).
 
-def load_config(config_file: Optional[Union[str, Path]] = None) -> Config:
+    :param config_file: The configuration file, by default
+        ``/etc/command-watcher.yml``.
+    :param snapshot_dir: Store a pickled snapshot of the validated
+        configuration in this directory. A new process loads the snapshot
+        instead of parsing and validating the YAML file again, as long as
+        the file is unchanged.
+    """
     if config_file is None:
-        config_file = "/etc/command-watcher.yml"
-    global _config
-    if _config is None:
-        adapter = TypeAdapter(Config)
-        with open(config_file, "r") as file:
-            config_raw = yaml.safe_load(file)
-        _config = adapter.validate_python(config_raw)
-    return _config
+        config_file = DEFAULT_CONFIG_FILE
+    path = os.path.abspath(os.path.expanduser(config_file))
+    stamp = _stamp(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    config: Optional[Config] = None
+    snapshot: Optional[Path] = None
+    if snapshot_dir is not None:
+        snapshot = _snapshot_file(snapshot_dir, path)
+        config = _read_snapshot(snapshot, path, stamp)
+    if config is None:
+        import yaml
+
+        # The libyaml based loader is much faster.
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(path, "rb") as file:
+            config_raw = yaml.load(file, Loader=loader)
+        config = _adapter.validate_python(config_raw)
+        if snapshot is not None:
+            _write_snapshot(snapshot, path, stamp, config)
+    _cache[path] = (stamp, config)
+    return config
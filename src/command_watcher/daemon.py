@@ -0,0 +1,296 @@
+"""A long running daemon that runs the jobs submitted by the thin client
+(see :py:mod:`command_watcher.client`) over a Unix socket.
+
+The daemon has imported all modules, loaded the configuration and created
+the channels before the first job arrives. The SMTP sessions and the
+Icinga connections of the channels stay open between the jobs. Each job
+runs in its own thread with its own :py:class:`command_watcher.Watch`; the
+reports are delivered in the background, so the client gets the exit code
+as soon as the command has finished.
+
+Protocol: the client sends one JSON line (see
+:py:class:`command_watcher.job.Job`) together with its ``stdout`` and
+``stderr`` file descriptors. The daemon writes the output of the watch
+directly to these file descriptors and answers with one JSON line:
+``{"returncode": 0}`` or ``{"error": "..."}``."""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, TextIO, Union, cast
+
+from command_watcher import create_channels
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.client import default_socket_path
+from command_watcher.config import Config, load_config
+from command_watcher.job import Job, run_job
+
+MAX_REQUEST_SIZE = 1024 * 1024
+"""The maximum size of a job in bytes (including the environment)."""
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """Replaces ``sys.stdout`` or ``sys.stderr``: each thread writes to
+    the stream it has redirected the output to, the other threads to the
+    original stream.
+
+    If a redirected stream fails, for example because the client has
+    closed its pipe, the rest of the output of the thread is discarded, so
+    the job and its reports are completed anyway."""
+
+    default: TextIO
+
+    _local: threading.local
+
+    def __init__(self, default: TextIO) -> None:
+        self.default = default
+        self._local = threading.local()
+
+    @property
+    def stream(self) -> TextIO:
+        return getattr(self._local, "stream", self.default)
+
+    @contextmanager
+    def redirect(self, stream: TextIO) -> Iterator[None]:
+        """Redirect the output of the calling thread."""
+        self._local.stream = stream
+        self._local.broken = False
+        try:
+            yield
+        finally:
+            del self._local.stream
+            del self._local.broken
+
+    @property
+    def redirected(self) -> bool:
+        """The output of the calling thread is redirected."""
+        return hasattr(self._local, "stream")
+
+    def write(self, text: str) -> int:
+        if getattr(self._local, "broken", False):
+            return len(text)
+        try:
+            return self.stream.write(text)
+        except OSError:
+            if not self.redirected:
+                raise
+            self._local.broken = True
+            return len(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, "broken", False):
+            return
+        try:
+            self.stream.flush()
+        except OSError:
+            if not self.redirected:
+                raise
+            self._local.broken = True
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+    def fileno(self) -> int:
+        return self.stream.fileno()
+
+
+def _close(stream: TextIO) -> None:
+    try:
+        stream.close()
+    except OSError:
+        # The buffered output could not be written, the client is gone.
+        pass
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "Daemon"
+
+    request: socket.socket
+
+    def _receive(self) -> Optional[tuple[Job, list[int]]]:
+        """
+        :return: ``None`` if the client closed the connection at once, for
+            example to check if the daemon is running."""
+        data, fds, _, _ = socket.recv_fds(self.request, MAX_REQUEST_SIZE, 2)
+        if not data and not fds:
+            return None
+        try:
+            while not data.endswith(b"\n") and len(data) < MAX_REQUEST_SIZE:
+                chunk = self.request.recv(MAX_REQUEST_SIZE)
+                if not chunk:
+                    break
+                data += chunk
+            if len(fds) != 2:
+                raise ValueError("Expected the file descriptors of stdout and stderr")
+            return Job.from_dict(json.loads(data)), fds
+        except Exception:
+            for fd in fds:
+                os.close(fd)
+            raise
+
+    def _respond(self, **result: object) -> None:
+        try:
+            self.request.sendall(json.dumps(result).encode() + b"\n")
+        except OSError:
+            # The client is gone, for example interrupted by the user.
+            pass
+
+    def handle(self) -> None:
+        try:
+            request = self._receive()
+        except ValueError as error:
+            self._respond(error=str(error))
+            return
+        if request is None:
+            return
+        job, (stdout_fd, stderr_fd) = request
+        stdout = open(stdout_fd, "w", encoding="utf-8", errors="replace")
+        stderr = open(stderr_fd, "w", encoding="utf-8", errors="replace")
+        try:
+            with self.server.redirect(stdout, stderr):
+                returncode = self.server.run(job)
+        except Exception as error:
+            self._respond(error=f"{error.__class__.__name__}: {error}")
+            return
+        finally:
+            _close(stdout)
+            _close(stderr)
+        self._respond(returncode=returncode)
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Run the jobs submitted over a Unix socket. Use
+    :py:meth:`serve_forever` to accept the jobs.
+
+    While the daemon exists, ``sys.stdout`` and ``sys.stderr`` are replaced
+    by streams that route the output of each job to its client.
+
+    :param socket_path: The Unix socket, see
+        :py:func:`command_watcher.client.default_socket_path`. Only the
+        user running the daemon may connect.
+    :param config_file: The configuration file. It is loaded again for the
+        next job if it has changed.
+    :param channels: Report by these channels instead of the channels of
+        the configuration.
+    :param background_reports: Deliver the reports in a background thread,
+        the client does not wait for the delivery.
+
+    :raises OSError: If another daemon listens on the socket.
+    """
+
+    daemon_threads = True
+
+    socket_path: str
+
+    config_file: Optional[Union[str, Path]]
+
+    background_reports: bool
+
+    _config: Optional[Config]
+
+    _channels: Optional[list[BaseChannel]]
+
+    _fixed_channels: bool
+
+    _lock: threading.Lock
+
+    _stdout: _ThreadLocalStream
+
+    _stderr: _ThreadLocalStream
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        config_file: Optional[Union[str, Path]] = None,
+        channels: Optional[Sequence[BaseChannel]] = None,
+        background_reports: bool = True,
+    ) -> None:
+        self.socket_path = socket_path or default_socket_path()
+        self.config_file = config_file
+        self.background_reports = background_reports
+        self._config = None
+        self._channels = list(channels) if channels is not None else None
+        self._fixed_channels = channels is not None
+        self._lock = threading.Lock()
+        # Fail early on an invalid configuration and warm up the channels.
+        self.config()
+        self._remove_stale_socket()
+        umask = os.umask(0o177)
+        try:
+            super().__init__(self.socket_path, _Handler)
+        finally:
+            os.umask(umask)
+        self._stdout = _ThreadLocalStream(sys.stdout)
+        self._stderr = _ThreadLocalStream(sys.stderr)
+        self._install()
+
+    def _remove_stale_socket(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+                return
+        raise OSError(f"A daemon is already listening on {self.socket_path}")
+
+    def config(self) -> tuple[Config, list[BaseChannel]]:
+        """The current configuration and its channels. The channels are
+        created again only if the configuration file has changed."""
+        config = load_config(self.config_file)
+        with self._lock:
+            if self._channels is None or (
+                config is not self._config and not self._fixed_channels
+            ):
+                self._channels = create_channels(config, "command_watcher")
+            self._config = config
+            return config, self._channels
+
+    def _install(self) -> None:
+        """Replace ``sys.stdout`` and ``sys.stderr`` by the thread local
+        streams, again if they were replaced in the meantime."""
+        with self._lock:
+            if sys.stdout is not self._stdout:
+                self._stdout.default = sys.stdout
+                sys.stdout = cast(TextIO, self._stdout)
+            if sys.stderr is not self._stderr:
+                self._stderr.default = sys.stderr
+                sys.stderr = cast(TextIO, self._stderr)
+
+    @contextmanager
+    def redirect(self, stdout: TextIO, stderr: TextIO) -> Iterator[None]:
+        """Redirect the output of the calling thread."""
+        self._install()
+        with self._stdout.redirect(stdout), self._stderr.redirect(stderr):
+            yield
+
+    def run(self, job: Job) -> int:
+        """Run a job in the calling thread.
+
+        :return: The exit code, see :py:func:`command_watcher.job.run_job`.
+        """
+        config, channels = self.config()
+        return run_job(
+            job,
+            config,
+            channels=channels,
+            background_reports=self.background_reports,
+        )
+
+    def server_close(self) -> None:
+        """Close the socket and restore ``sys.stdout`` and ``sys.stderr``."""
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if sys.stdout is self._stdout:
+            sys.stdout = self._stdout.default
+        if sys.stderr is self._stderr:
+            sys.stderr = self._stderr.default
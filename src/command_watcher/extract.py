@@ -0,0 +1,152 @@
+"""Extract performance data from the output of a process while it streams
+through the executor, for example the transferred bytes of ``rsync`` or
+the number of processed files.
+
+.. code-block:: python
+
+    watch.run(
+        ["rsync", "-a", "--stats", "/home", "/backup"],
+        extract={
+            "sent_bytes": re.compile(r"sent ([\\d,]+) bytes"),
+            "files": count(r"^>f"),
+        },
+    )
+    watch.final_report(status=0)  # sent_bytes=1234567 files=42
+
+The extractors see the stripped, non-empty lines of ``stdout`` and
+``stderr``."""
+
+import re
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any, Optional, Union
+
+from command_watcher.stream import Line
+
+Extractor = Union[str, "re.Pattern[str]", Callable[[str], Any]]
+"""A regular expression (compiled or not) or a callable.
+
+A regular expression extracts its first group (or the whole match if it
+has no groups) of the last matching line. The value is converted to a
+number if possible, see :py:func:`to_number`.
+
+A callable is called with every line and returns the new value or ``None``
+to keep the previous value."""
+
+
+def to_number(value: str) -> Any:
+    """Convert a number like ``1,234`` or ``0.5`` to an ``int`` or a
+    ``float``, keep other values."""
+    digits = value.replace(",", "")
+    for convert in (int, float):
+        try:
+            return convert(digits)
+        except ValueError:
+            pass
+    return value
+
+
+class _Count:
+    """See :py:func:`count`. An :py:class:`Extraction` counts a whole batch
+    of lines at once instead of calling the counter for every line."""
+
+    regex: Optional["re.Pattern[str]"]
+
+    counter: int
+
+    def __init__(self, pattern: Optional[str]) -> None:
+        self.regex = re.compile(pattern) if pattern is not None else None
+        self.counter = 0
+
+    def fresh(self) -> "_Count":
+        """A new counter with the same pattern, for another process."""
+        counter = _Count(None)
+        counter.regex = self.regex
+        return counter
+
+    def add(self, lines: Sequence[str]) -> Optional[int]:
+        if self.regex is None:
+            self.counter += len(lines)
+        else:
+            search = self.regex.search
+            self.counter += sum(1 for line in lines if search(line) is not None)
+        return self.counter if self.counter else None
+
+    def __call__(self, line: str) -> Optional[int]:
+        return self.add((line,))
+
+
+def count(pattern: Optional[str] = None) -> Callable[[str], Optional[int]]:
+    """An extractor counting the lines, or only the lines matching the
+    pattern. Without matching lines there is no value. Every process counts
+    its own lines."""
+    return _Count(pattern)
+
+
+class Extraction:
+    """Apply extractors to the output lines of a process.
+
+    A callable raising an exception is disabled, the exception is kept in
+    :py:attr:`errors`.
+
+    :param extractors: The names of the performance data and their
+        extractors.
+    """
+
+    values: dict[str, Any]
+    """The extracted performance data."""
+
+    errors: dict[str, Exception]
+    """The exceptions of the disabled extractors."""
+
+    _patterns: dict[str, "re.Pattern[str]"]
+
+    _counts: dict[str, _Count]
+
+    _callables: dict[str, Callable[[str], Any]]
+
+    def __init__(self, extractors: Mapping[str, Extractor]) -> None:
+        self.values = {}
+        self.errors = {}
+        self._patterns = {}
+        self._counts = {}
+        self._callables = {}
+        for name, extractor in extractors.items():
+            if isinstance(extractor, str):
+                extractor = re.compile(extractor)
+            if isinstance(extractor, re.Pattern):
+                self._patterns[name] = extractor
+            elif isinstance(extractor, _Count):
+                self._counts[name] = extractor.fresh()
+            else:
+                self._callables[name] = extractor
+
+    def feed(self, lines: Sequence[Line]) -> None:
+        """
+        :param lines: Stripped output lines, raw lines are decoded as UTF-8.
+        """
+        if not lines:
+            return
+        texts = [
+            line.decode("utf-8", errors="replace") if isinstance(line, bytes) else line
+            for line in lines
+        ]
+        for name, regex in self._patterns.items():
+            # Only the last match of a batch counts: search backwards.
+            for text in reversed(texts):
+                match = regex.search(text)
+                if match is not None:
+                    self.values[name] = to_number(match.group(1 if regex.groups else 0))
+                    break
+        for name, counter in self._counts.items():
+            value = counter.add(texts)
+            if value is not None:
+                self.values[name] = value
+        for name, extract in list(self._callables.items()):
+            try:
+                for text in texts:
+                    value = extract(text)
+                    if value is not None:
+                        self.values[name] = value
+            except Exception as error:
+                self.errors[name] = error
+                del self._callables[name]
@@ -0,0 +1,117 @@
+"""A command to run under the supervision of a :py:class:`command_watcher.Watch`,
+for example submitted to the daemon (see :py:mod:`command_watcher.daemon`)."""
+
+import re
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from command_watcher.channels.base_channel import BaseChannel
+    from command_watcher.config import Config
+    from command_watcher.log import Echo
+
+
+@dataclass
+class Job:
+    """A command and the settings of its watch."""
+
+    args: list[str]
+    """The process arguments."""
+
+    service_name: str = "command_watcher"
+
+    service_display_name: Optional[str] = None
+
+    ignore_exit_codes: list[int] = field(default_factory=list)
+    """Non-zero exit codes that are not reported as failures."""
+
+    cwd: Optional[str] = None
+    """The working directory of the process. ``None``: the working directory
+    of the watcher."""
+
+    env: Optional[dict[str, str]] = None
+    """The environment variables of the process. ``None``: the environment
+    of the watcher."""
+
+    extract: dict[str, str] = field(default_factory=dict)
+    """Regular expressions extracting performance data from the output, for
+    example ``{"sent_bytes": "sent ([0-9,]+) bytes"}``, see
+    :py:mod:`command_watcher.extract`."""
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Job":
+        """
+        :raises ValueError: If the data does not describe a job.
+        """
+        try:
+            job = cls(**data)
+        except TypeError as error:
+            raise ValueError(f"Invalid job: {error}") from error
+        if not job.args:
+            raise ValueError("Invalid job: no command")
+        for pattern in job.extract.values():
+            try:
+                re.compile(pattern)
+            except re.error as error:
+                raise ValueError(f"Invalid job: {pattern!r}: {error}") from error
+        return job
+
+
+def run_job(
+    job: Job,
+    config: "Config",
+    channels: Optional[Sequence["BaseChannel"]] = None,
+    echo: "Echo" = "live",
+    background_reports: bool = False,
+) -> int:
+    """Run the command of a job with a :py:class:`command_watcher.Watch`: a
+    failure is reported by the watch, a success with a final report.
+
+    :param job: The job.
+    :param config: The configuration.
+    :param channels: Report by these channels. ``None``: by the channels of
+        the configuration.
+    :param echo: How the output lines are shown on the terminal.
+    :param background_reports: Deliver the reports in a background thread.
+
+    :return: The exit code of the command, 0 if it is ignored, 127 if the
+        command could not be started.
+    """
+    from command_watcher import Args, CommandWatcherError, ProcessArgs, Watch
+
+    watch = Watch(
+        config=config,
+        service_name=job.service_name,
+        service_display_name=job.service_display_name,
+        report_channels=list(channels) if channels is not None else None,
+        echo=echo,
+        background_reports=background_reports,
+    )
+    kwargs: ProcessArgs = {}
+    if job.cwd is not None:
+        kwargs["cwd"] = job.cwd
+    if job.env is not None:
+        kwargs["env"] = job.env
+    args: Args = [*job.args]
+    command = " ".join(job.args)
+    try:
+        process = watch.run(
+            args,
+            ignore_exceptions=job.ignore_exit_codes,
+            extract=job.extract,
+            **kwargs,
+        )
+    except CommandWatcherError:
+        return watch.processes[-1].returncode or 1
+    except OSError as error:
+        watch.log.error(f"The command '{command}' could not be started: {error}")
+        watch.report(status=2, custom_message=f"{error.__class__.__name__}: {error}")
+        return 127
+    watch.final_report(status=0, custom_message=f"The command '{command}' succeeded.")
+    if process.returncode in job.ignore_exit_codes:
+        return 0
+    return process.returncode or 0
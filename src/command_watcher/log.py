@@ -1,12 +1,23 @@
+import collections
+import itertools
 import logging
+import os
 import sys
 import time
 import uuid
-from logging.handlers import BufferingHandler
-from typing import Any, Optional, cast
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Literal, Optional, TextIO, Union, cast, overload
 
 import termcolor
 
+from command_watcher.capture import (
+    DEFAULT_MEMORY_BUDGET,
+    CaptureStore,
+    Entry,
+    Line,
+    make_record,
+)
+
 # Logging #####################################################################
 
 # CRITICAL 50
@@ -25,114 +36,646 @@ logging.addLevelName(STDOUT, "STDOUT")
 LOGFMT = "%(asctime)s_%(msecs)03d %(levelname)s %(message)s"
 DATEFMT = "%Y%m%d_%H%M%S"
 
+Echo = Literal["none", "summary", "live"]
+"""How the output lines of a process are shown on the terminal: ``live``
+shows every line, ``summary`` shows only the first and the last lines and
+the counts when the process has finished, ``none`` shows nothing. The output
+lines are captured in any case."""
+
+SUMMARY_LINES = 5
+"""The number of the first and of the last lines of a stream shown in the
+summary."""
+
+FLUSH_INTERVAL = 0.1
+"""Write the buffered lines at the latest after this many seconds."""
+
+FLUSH_SIZE = 64 * 1024
+"""Write the buffered lines if they exceed this number of characters."""
+
+_STYLES: dict[str, tuple[str, Optional[str]]] = {
+    "CRITICAL": ("red", "bold"),
+    "ERROR": ("red", None),
+    "STDERR": ("red", "dark"),
+    "WARNING": ("yellow", None),
+    "INFO": ("green", None),
+    "DEBUG": ("white", None),
+    "STDOUT": ("white", "dark"),
+    "NOTSET": ("grey", None),
+}
+"""The color and the attribute of each level name."""
+
+
+def _can_colorize(stream: TextIO) -> bool:
+    """Check the environment variables ``ANSI_COLORS_DISABLED``,
+    ``NO_COLOR``, ``FORCE_COLOR`` and ``TERM`` the same way
+    :py:mod:`termcolor` does. Otherwise colorize only if the stream is
+    a terminal."""
+    if "ANSI_COLORS_DISABLED" in os.environ or "NO_COLOR" in os.environ:
+        return False
+    if "FORCE_COLOR" in os.environ:
+        return True
+    if os.environ.get("TERM") == "dumb":
+        return False
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class _Style:
+    """The precomputed parts of a rendered line of one level."""
+
+    label: str
+    """The colored level name, for example ``\\x1b[7m\\x1b[32m INFO     \\x1b[0m``."""
+
+    start: str
+    """The escape sequences in front of the message."""
+
+    end: str
+    """The escape sequence after the message."""
+
+    plain_label: str
+    """The level name without escape sequences."""
+
+    def __init__(self, levelno: int) -> None:
+        level = logging.getLevelName(levelno)
+        color, attr = _STYLES.get(level, ("grey", None))
+        if attr:
+            reverse = ["reverse", attr]
+            normal = [attr]
+        else:
+            reverse = ["reverse"]
+            normal = []
+        self.plain_label = " {:<8} ".format(level)
+        self.label = termcolor.colored(
+            self.plain_label, color, attrs=reverse, force_color=True
+        )
+        self.start, self.end = termcolor.colored(
+            "\0", color, attrs=normal, force_color=True
+        ).split("\0")
+
 
-class LoggingHandler(BufferingHandler):
-    """Store of all logging records in the memory. Print all records on emit."""
+class Renderer:
+    """Render log messages on the terminal.
 
-    _master_logger: Optional[logging.Logger]
+    The escape sequences of every level are computed once and the timestamp
+    is formatted once per second. The rendered lines are written buffered
+    to ``sys.stdout`` (levels below ``STDERR``) or ``sys.stderr``: in one
+    call if a size or a time threshold is reached. If the stream is not a
+    terminal, the lines are not colorized at all.
 
-    def __init__(self, master_logger: Optional[logging.Logger] = None):
-        BufferingHandler.__init__(self, capacity=1000000)
-        self._master_logger = master_logger
+    :param flush_interval: Write the buffered lines at the latest after this
+        many seconds.
+    :param flush_size: Write the buffered lines if they exceed this number of
+        characters.
+    """
+
+    flush_interval: float
+
+    flush_size: int
+
+    _styles: dict[int, _Style]
+
+    _second: int
+    """The second of the cached timestamp."""
+
+    _timestamp: str
+    """The cached timestamp without milliseconds."""
+
+    _targets: list[Optional[TextIO]]
+    """The target streams of the buffered lines: ``[stdout, stderr]``."""
+
+    _colorize: list[bool]
+
+    _pending: list[list[str]]
+    """The buffered lines: ``[stdout, stderr]``."""
+
+    _size: int
+    """The number of buffered characters."""
+
+    _last_flush: float
+
+    def __init__(
+        self, flush_interval: float = FLUSH_INTERVAL, flush_size: int = FLUSH_SIZE
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._styles = {}
+        self._second = -1
+        self._timestamp = ""
+        self._targets = [None, None]
+        self._colorize = [False, False]
+        self._pending = [[], []]
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def _style(self, levelno: int) -> _Style:
+        style = self._styles.get(levelno)
+        if style is None:
+            style = self._styles[levelno] = _Style(levelno)
+        return style
+
+    def timestamp(self, created: float) -> str:
+        """Format a timestamp like ``20240101_120000_123``.
 
-    @staticmethod
-    def _print(record: logging.LogRecord) -> None:
+        :param created: A UNIX timestamp.
         """
-        :param logging.LogRecord record: A record object.
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._timestamp = time.strftime(DATEFMT, time.localtime(second))
+        return "{}_{:03d}".format(self._timestamp, int((created - second) * 1000))
+
+    def _target(self, levelno: int) -> int:
+        """Select the target stream. If ``sys.stdout`` or ``sys.stderr``
+        were replaced, the lines buffered for the previous stream are
+        written first."""
+        index = 1 if levelno >= STDERR else 0
+        stream = sys.stderr if index else sys.stdout
+        if self._targets[index] is not stream:
+            self._write(index)
+            self._targets[index] = stream
+            self._colorize[index] = _can_colorize(stream)
+        return index
+
+    def write(self, levelno: int, created: float, messages: Iterable[str]) -> None:
+        """Render and buffer messages of the same level and creation time.
+
+        :param levelno: The level of the messages.
+        :param created: The creation time (UNIX timestamp).
+        :param messages: The message texts.
         """
-        level = record.levelname
-        # CRITICAL 50
-        # ERROR 40
-        # -> STDERR 35
-        # WARNING 30
-        # INFO 20
-        # DEBUG 10
-        # --> STDOUT 5
-        # NOTSET 0
-        attr = None
-        if level == "CRITICAL":
-            color = "red"
-            attr = "bold"
-        elif level == "ERROR":
-            color = "red"
-        elif level == "STDERR":
-            color = "red"
-            attr = "dark"
-        elif level == "WARNING":
-            color = "yellow"
-        elif level == "INFO":
-            color = "green"
-        elif level == "DEBUG":
-            color = "white"
-        elif level == "STDOUT":
-            color = "white"
-            attr = "dark"
-        elif level == "NOTSET":
-            color = "grey"
+        index = self._target(levelno)
+        style = self._style(levelno)
+        timestamp = self.timestamp(created)
+        pending = self._pending[index]
+        if self._colorize[index]:
+            prefix = f"{timestamp} {style.label} {style.start}"
+            suffix = f"{style.end}\n"
         else:
-            color = "grey"
+            prefix = f"{timestamp} {style.plain_label} "
+            suffix = "\n"
+        for message in messages:
+            line = prefix + message + suffix
+            pending.append(line)
+            self._size += len(line)
+        if (
+            self._size >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
 
-        if attr:
-            reverse = ["reverse", attr]
-            normal = [attr]
+    def _write(self, index: int) -> None:
+        stream = self._targets[index]
+        pending = self._pending[index]
+        if not pending or stream is None:
+            return
+        stream.write("".join(pending))
+        stream.flush()
+        pending.clear()
+
+    def flush(self) -> None:
+        """Write all buffered lines."""
+        self._write(0)
+        self._write(1)
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+
+def _text(msg: object, tag: Optional[str] = None) -> str:
+    """The text of a message. Raw output lines (bytes) are decoded only
+    here, when the text is actually needed. Tagged messages are prefixed
+    with the tag of the process they were forwarded from, for example
+    ``[1] message``."""
+    if isinstance(msg, bytes):
+        text = msg.decode("utf-8", errors="replace")
+    else:
+        text = str(msg)
+    if tag is not None:
+        return f"[{tag}] {text}"
+    return text
+
+
+class Formatter(logging.Formatter):
+    """A formatter that is able to format records of raw output lines
+    (bytes) and records tagged by the process they were forwarded from."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, bytes) or hasattr(record, "tag"):
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = _text(record.msg, getattr(record, "tag", None))
+        return super().format(record)
+
+
+def _count_lines(msgs: Iterable[Line]) -> int:
+    """Count the lines of the messages."""
+    line_count = 0
+    for msg in msgs:
+        if isinstance(msg, bytes):
+            line_count += msg.count(b"\n") + 1
         else:
-            reverse = ["reverse"]
-            normal = []
+            line_count += msg.count("\n") + 1
+    return line_count
 
-        if record.levelno >= STDERR:
-            stream = sys.stderr
-        else:
-            stream = sys.stdout
 
-        created = "{}_{:03d}".format(
-            time.strftime(DATEFMT, time.localtime(record.created)),
-            int(record.msecs),
-        )
+class _StreamStats:
+    """Running line and byte counters of one stream (``STDOUT`` or
+    ``STDERR``). The joined text is cached until the next message
+    arrives."""
+
+    line_count: int
+
+    byte_count: int
+    """The number of bytes of the UTF-8 encoded messages."""
+
+    _text: Optional[str]
+
+    def __init__(self) -> None:
+        self.line_count = 0
+        self.byte_count = 0
+        self._text = None
 
-        print(
-            "{} {} {}".format(
-                created,
-                termcolor.colored(" {:<8} ".format(level), color, attrs=reverse),
-                termcolor.colored(record.msg, color, attrs=normal),
-            ),
-            file=stream,
+    def add(self, line_count: int, byte_count: int) -> None:
+        self.line_count += line_count
+        self.byte_count += byte_count
+        self._text = None
+
+    def text(self, messages: Iterable[Line]) -> str:
+        """All messages joined by line breaks.
+
+        :param messages: All messages of this stream."""
+        if self._text is None:
+            self._text = "\n".join(_text(msg) for msg in messages)
+        return self._text
+
+
+class _RecordView(Sequence[logging.LogRecord]):
+    """A read-only sequence of all records, the spilled ones are read from
+    the disk. The :py:class:`logging.LogRecord` objects are built on access.
+    The view always reflects the current content of the store.
+
+    :param source: Only the records of this source, without their tags.
+        ``None``: all records.
+    """
+
+    _store: CaptureStore
+
+    _source: Optional[int]
+
+    def __init__(self, store: CaptureStore, source: Optional[int] = None) -> None:
+        self._store = store
+        self._source = source
+
+    def _record(self, entry: Entry) -> logging.LogRecord:
+        created, levelno, tag, msg = entry
+        return make_record(
+            (created, levelno, tag if self._source is None else None, msg)
         )
 
+    def __len__(self) -> int:
+        return self._store.count(self._source)
+
+    def __iter__(self) -> Iterator[logging.LogRecord]:
+        for entry in self._store.entries(self._source):
+            yield self._record(entry)
+
+    @overload
+    def __getitem__(self, index: int) -> logging.LogRecord: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[logging.LogRecord]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[logging.LogRecord, list[logging.LogRecord]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._record(self._store.entry(index, self._source))
+
+
+class LoggingHandler(logging.Handler):
+    """Store of all logging records. Print all records on emit.
+
+    The records are stored in a compact :py:class:`CaptureStore`: one
+    entry per record in ``array`` backed columns pointing into one shared
+    ``bytearray``. The output lines of a process are passed to
+    :py:meth:`capture` without creating :py:class:`logging.LogRecord`
+    objects at all. Records are built only on demand, for example by
+    :py:attr:`buffer` and :py:attr:`all_records`.
+
+    The entries are kept in the memory as long as their size is within
+    the memory budget. If the budget is exceeded, the entries in the memory
+    are spilled to an append-only temporary file. No record is dropped.
+    :py:attr:`stdout`, :py:attr:`stderr` and :py:attr:`all_records` are
+    served from the disk and the memory.
+
+    If the only handler of the master logger is a :py:class:`LoggingHandler`
+    (the master logger of :py:class:`command_watcher.Watch`), the records
+    are not logged a second time: both handlers share one store (and its
+    memory budget). The master handler sees the records of all its child
+    handlers, each child handler only its own records. Any other master
+    logger receives the records via :py:meth:`logging.Logger.log`.
+
+    :param master_logger: Forward all log messages to this logger.
+    :param tag: Tag the log messages forwarded to the master logger.
+    :param memory_budget: The maximum size of the entries in the memory in
+        bytes.
+    :param echo: How the output lines are shown on the terminal: ``live``,
+        ``summary`` or ``none``.
+    """
+
+    echo: Echo
+
+    _master_logger: Optional[logging.Logger]
+
+    _parent: Optional["LoggingHandler"]
+    """The handler of the master logger, if the store is shared."""
+
+    _tag: Optional[str]
+    """Forward the records to the master logger tagged with this string."""
+
+    _store: CaptureStore
+
+    _source: int
+    """The source of the records of this handler in the (shared) store."""
+
+    _streams: dict[int, _StreamStats]
+    """The counters of the levels ``STDOUT`` and ``STDERR``, updated on
+    emit."""
+
+    _renderer: Renderer
+
+    def __init__(
+        self,
+        master_logger: Optional[logging.Logger] = None,
+        tag: Optional[str] = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        echo: Echo = "live",
+    ):
+        logging.Handler.__init__(self)
+        self.echo = echo
+        self._master_logger = master_logger
+        self._parent = _shared_handler(master_logger)
+        self._tag = tag
+        if self._parent is not None:
+            self._store = self._parent._store
+            self._source = self._store.add_source()
+            self.lock = self._parent.lock
+        else:
+            self._store = CaptureStore(memory_budget, indexed_levels=(STDOUT, STDERR))
+            self._source = 0
+        self._streams = {STDOUT: _StreamStats(), STDERR: _StreamStats()}
+        self._renderer = Renderer()
+
+    @property
+    def _view(self) -> Optional[int]:
+        """The source of the records visible to this handler: ``None`` for
+        all records."""
+        if self._parent is None:
+            return None
+        return self._source
+
+    @property
+    def memory_budget(self) -> int:
+        """The maximum size of the entries in the memory in bytes."""
+        return self._store.memory_budget
+
+    @property
+    def buffer(self) -> Sequence[logging.LogRecord]:
+        """All records, the spilled ones are read from the disk."""
+        return _RecordView(self._store, self._view)
+
+    def _render(
+        self,
+        levelno: int,
+        created: float,
+        msgs: Sequence[Line],
+        tag: Optional[str],
+        captured: bool,
+    ) -> None:
+        """Render the messages on the terminal.
+
+        :param captured: The messages are output lines of a process.
+        """
+        if not captured:
+            # Log messages are shown at once.
+            self._renderer.write(levelno, created, [_text(msg, tag) for msg in msgs])
+            self._renderer.flush()
+        elif self.echo == "live":
+            # Output lines are buffered.
+            self._renderer.write(levelno, created, [_text(msg, tag) for msg in msgs])
+
+    def _add(
+        self,
+        created: float,
+        levelno: int,
+        msgs: Sequence[Line],
+        tag: Optional[str],
+        captured: bool,
+    ) -> None:
+        """Store, count and render the messages or forward them to the
+        master logger.
+
+        :param captured: The messages are output lines of a process.
+        """
+        parent = self._parent
+        if parent is not None:
+            tag = self._tag
+        byte_count = self._store.extend(created, levelno, msgs, tag, self._source)
+        stream = self._streams.get(levelno)
+        if stream is not None:
+            line_count = _count_lines(msgs)
+            stream.add(line_count, byte_count)
+            if parent is not None:
+                parent._streams[levelno].add(line_count, byte_count)
+        if parent is not None:
+            parent._render(levelno, created, msgs, tag, captured)
+        elif self._master_logger:
+            extra: dict[str, object] = {"captured": captured}
+            if self._tag is not None:
+                extra["tag"] = self._tag
+            for msg in msgs:
+                self._master_logger.log(levelno, msg, extra=extra)
+        else:
+            self._render(levelno, created, msgs, tag, captured)
+
     def emit(self, record: logging.LogRecord) -> None:
         """
         :param record: A record object.
         """
-        self.buffer.append(record)
-        if not self._master_logger:
-            self._print(record)
+        msg: Line
+        if isinstance(record.msg, bytes):
+            msg = record.msg
         else:
-            self._master_logger.log(record.levelno, record.msg)
-        if self.shouldFlush(record):
-            self.flush()
+            msg = record.getMessage()
+        self._add(
+            record.created,
+            record.levelno,
+            (msg,),
+            getattr(record, "tag", None),
+            getattr(record, "captured", False),
+        )
+
+    def capture(self, levelno: int, lines: Sequence[Line]) -> None:
+        """Capture a batch of output lines of a process. This is the
+        lightweight counterpart of :py:meth:`emit`: no
+        :py:class:`logging.LogRecord` objects are created.
+
+        :param levelno: ``STDOUT`` or ``STDERR``.
+        :param lines: The stripped, non-empty lines.
+        """
+        if not lines:
+            return
+        self.acquire()
+        try:
+            self._add(time.time(), levelno, lines, None, captured=True)
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        """Write the buffered output lines to the terminal. If the handler
+        forwards to a master logger, the handlers of the master logger are
+        flushed."""
+        if self._master_logger:
+            for handler in self._master_logger.handlers:
+                handler.flush()
+            return
+        self.acquire()
+        try:
+            self._renderer.flush()
+        finally:
+            self.release()
+
+    def print_summary(self, lines: int = SUMMARY_LINES) -> None:
+        """Show the line and byte counts and the first and the last output
+        lines of ``stdout`` and ``stderr``.
+
+        :param lines: The number of the first and of the last lines shown
+            per stream.
+        """
+        renderer = (self._parent or self)._renderer
+        self.acquire()
+        try:
+            created = time.time()
+            for levelno, name in ((STDOUT, "stdout"), (STDERR, "stderr")):
+                stream = self._streams[levelno]
+                renderer.write(
+                    logging.INFO,
+                    created,
+                    (f"{name}: {stream.line_count} lines, {stream.byte_count} bytes",),
+                )
+                messages = self._store.messages(levelno, self._view)
+                excerpt = [_text(msg) for msg in itertools.islice(messages, lines)]
+                tail: collections.deque[Line] = collections.deque(maxlen=lines)
+                omitted = 0
+                for msg in messages:
+                    tail.append(msg)
+                    omitted += 1
+                omitted -= len(tail)
+                if omitted:
+                    excerpt.append(f"[... {omitted} lines omitted ...]")
+                excerpt.extend(_text(msg) for msg in tail)
+                renderer.write(levelno, created, excerpt)
+            renderer.flush()
+        finally:
+            self.release()
+
+    def spill(self) -> None:
+        """Move all entries in the memory to the temporary file."""
+        self.acquire()
+        try:
+            self._store.spill()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """Write the buffered output lines and remove the temporary file. A
+        shared store is closed by the handler of the master logger."""
+        self.acquire()
+        try:
+            self._renderer.flush()
+            if self._parent is None:
+                self._store.close()
+            logging.Handler.close(self)
+        finally:
+            self.release()
+
+    def records(self) -> Iterator[logging.LogRecord]:
+        """Iterate over all records. The records are built from the
+        entries on the disk and in the memory."""
+        if self._parent is None:
+            return self._store.records()
+        return (
+            make_record((created, levelno, None, msg))
+            for created, levelno, _, msg in self._store.entries(self._source)
+        )
+
+    def _stream_text(self, levelno: int) -> str:
+        self.acquire()
+        try:
+            return self._streams[levelno].text(
+                self._store.messages(levelno, self._view)
+            )
+        finally:
+            self.release()
 
     @property
     def stdout(self) -> str:
-        messages: list[str] = []
-        for record in self.buffer:
-            if record.levelname == "STDOUT":
-                messages.append(record.msg)
-        return "\n".join(messages)
+        """All ``STDOUT`` messages joined by line breaks."""
+        return self._stream_text(STDOUT)
+
+    @property
+    def line_count_stdout(self) -> int:
+        """The count of lines of the current ``stdout``."""
+        return self._streams[STDOUT].line_count
+
+    @property
+    def byte_count_stdout(self) -> int:
+        """The size of the current ``stdout`` in bytes (line breaks
+        excluded)."""
+        return self._streams[STDOUT].byte_count
 
     @property
     def stderr(self) -> str:
-        messages: list[str] = []
-        for record in self.buffer:
-            if record.levelname == "STDERR":
-                messages.append(record.msg)
-        return "\n".join(messages)
+        """All ``STDERR`` messages joined by line breaks."""
+        return self._stream_text(STDERR)
+
+    @property
+    def line_count_stderr(self) -> int:
+        """The count of lines of the current ``stderr``."""
+        return self._streams[STDERR].line_count
+
+    @property
+    def byte_count_stderr(self) -> int:
+        """The size of the current ``stderr`` in bytes (line breaks
+        excluded)."""
+        return self._streams[STDERR].byte_count
 
     @property
     def all_records(self) -> str:
         """All log messages joined by line breaks."""
-        messages: list[str] = []
-        for record in self.buffer:
-            messages.append(self.format(record))
-        return "\n".join(messages)
+        self.acquire()
+        try:
+            messages: list[str] = []
+            for record in self.records():
+                messages.append(self.format(record))
+            return "\n".join(messages)
+        finally:
+            self.release()
+
+
+def _shared_handler(
+    master_logger: Optional[logging.Logger],
+) -> Optional[LoggingHandler]:
+    """The handler of the master logger whose store can be shared: the only
+    handler of the master logger, a :py:class:`LoggingHandler` that does not
+    forward its records itself."""
+    if master_logger is None or len(master_logger.handlers) != 1:
+        return None
+    handler = master_logger.handlers[0]
+    if isinstance(handler, LoggingHandler) and handler._master_logger is None:
+        return handler
+    return None
 
 
 class ExtendedLogger(logging.Logger):
@@ -162,20 +705,33 @@ logging.Logger.stderr = _log_stderr  # type: ignore
 
 def setup_logging(
     master_logger: Optional[logging.Logger] = None,
+    tag: Optional[str] = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    echo: Echo = "live",
 ) -> tuple[ExtendedLogger, LoggingHandler]:
     """Setup a fresh logger for each watch action.
 
-    :param master_logger: Forward all log messages to a master logger."""
-    logger = logging.getLogger(name=str(uuid.uuid1()))
-    formatter = logging.Formatter(fmt=LOGFMT, datefmt=DATEFMT)
-    handler = LoggingHandler(master_logger=master_logger)
-    handler.setFormatter(formatter)
+    The logger is not registered in the logging module (it is not available
+    via :py:func:`logging.getLogger`) and does not propagate its records to
+    the root logger. It is garbage collected together with the executor or
+    the watch using it, so a long running process calling ``watch.run()``
+    repeatedly does not accumulate loggers.
+
+    :param master_logger: Forward all log messages to a master logger.
+    :param tag: Tag the log messages forwarded to the master logger.
+    :param memory_budget: The memory budget of the handler in bytes.
+    :param echo: How the output lines are shown on the terminal."""
     # Show all log messages: use 1 instead of 0: because:
     # From the documentation:
     # When a logger is created, the level is set to NOTSET (which causes all
     # messages to be processed when the logger is the root logger, or
     # delegation to the parent when the logger is a non-root logger). Note that
     # the root logger is created with level WARNING.
-    logger.setLevel(1)
+    logger = logging.Logger(name=str(uuid.uuid1()), level=1)
+    formatter = Formatter(fmt=LOGFMT, datefmt=DATEFMT)
+    handler = LoggingHandler(
+        master_logger=master_logger, tag=tag, memory_budget=memory_budget, echo=echo
+    )
+    handler.setFormatter(formatter)
     logger.addHandler(handler)
     return (cast(ExtendedLogger, logger), handler)
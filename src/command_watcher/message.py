@@ -7,7 +7,8 @@ from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, TypedDict
 from typing_extensions import Unpack
 
 if TYPE_CHECKING:
-    from . import CommandExecutor
+    from . import BaseExecutor
+    from .report import ChannelResult
 
 HOSTNAME = socket.gethostname()
 USERNAME = pwd.getpwuid(os.getuid()).pw_name
@@ -44,7 +45,7 @@ class MessageParams(MinimalMessageParams, total=False):
     log_records: str
     """Log records separated by new lines"""
 
-    processes: List["CommandExecutor"]
+    processes: List["BaseExecutor"]
 
 
 class BaseClass:
@@ -70,8 +71,18 @@ class Message(BaseClass):
 
     _data: MessageParams
 
+    channel_results: List["ChannelResult"]
+    """The results of the delivery by the channels, set by
+    :py:meth:`command_watcher.report.Reporter.report`."""
+
+    delivery_error: Optional[BaseException]
+    """An error of the reporter delivering the message that is not the
+    error of a channel, for example of the outbox."""
+
     def __init__(self, **data: Unpack[MessageParams]) -> None:
         self._data = data
+        self.channel_results = []
+        self.delivery_error = None
 
     def __str__(self) -> str:
         return self._obj_to_str()
@@ -0,0 +1,227 @@
+"""A durable outbox for the messages the channels could not deliver.
+
+The pending messages are stored in a SQLite database. They are delivered
+again with an exponential backoff, either by a later run of a watch or by
+the command ``command-watcher flush-outbox``."""
+
+import json
+import random
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.config import OutboxConfig
+from command_watcher.message import Message
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT
+)
+"""
+
+
+def _dump(message: Message) -> str:
+    """Serialize the data of a message. The processes are not serialized,
+    the channels do not need them."""
+    data = {key: value for key, value in message._data.items() if key != "processes"}
+    return json.dumps(data, default=str)
+
+
+def _load(payload: str) -> Message:
+    data: Any = json.loads(payload)
+    return Message(**data)
+
+
+class Outbox:
+    """Store the messages a channel could not deliver and deliver them again
+    later.
+
+    A failed delivery is retried with an exponential backoff: the delay is
+    doubled after every attempt (up to ``max_delay``) and randomized, so
+    many watches do not retry at the same moment. When a channel works
+    again, its pending messages are delivered in batches of at most
+    ``batch_size`` messages per flush (see
+    :py:meth:`command_watcher.channels.base_channel.BaseChannel.report_batch`).
+
+    :param path: The SQLite database file.
+    :param base_delay: The delay in seconds after the first failed attempt.
+    :param max_delay: The maximum delay in seconds.
+    :param batch_size: The maximum number of messages per channel delivered
+        by one flush.
+    """
+
+    path: Path
+
+    base_delay: float
+
+    max_delay: float
+
+    batch_size: int
+
+    def __init__(
+        self,
+        path: Union[str, Path] = OutboxConfig.path,
+        base_delay: float = 60.0,
+        max_delay: float = 3600.0,
+        batch_size: int = 100,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction. Every operation uses its
+        own connection, so the outbox can be used from several threads and
+        processes."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as db, db:
+            yield db
+
+    def delay(self, attempts: int) -> float:
+        """The randomized delay in seconds before the next attempt.
+
+        :param attempts: The number of failed attempts.
+        """
+        delay = min(self.base_delay * 2 ** max(attempts - 1, 0), self.max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+    def add(
+        self, channel: BaseChannel, message: Message, error: str = "", attempts: int = 1
+    ) -> None:
+        """Store a message a channel could not deliver.
+
+        :param channel: The channel that failed.
+        :param message: The message.
+        :param error: The reason of the failure.
+        :param attempts: The number of failed attempts, 0 for a message
+            queued behind the pending messages of the channel.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO messages "
+                "(channel, payload, created, attempts, next_attempt, last_error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    channel.key,
+                    _dump(message),
+                    now,
+                    attempts,
+                    now + self.delay(attempts) if attempts else now,
+                    error,
+                ),
+            )
+
+    def __len__(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def pending(self, channel: Optional[str] = None) -> list[Message]:
+        """The pending messages in the order they were stored.
+
+        :param channel: Only the messages of the channel with this key.
+        """
+        query = "SELECT payload FROM messages"
+        params: tuple[str, ...] = ()
+        if channel is not None:
+            query += " WHERE channel = ?"
+            params = (channel,)
+        with self._connect() as db:
+            rows = db.execute(query + " ORDER BY id", params).fetchall()
+        return [_load(payload) for (payload,) in rows]
+
+    def channels(self) -> set[str]:
+        """The keys of the channels with pending messages."""
+        with self._connect() as db:
+            rows = db.execute("SELECT DISTINCT channel FROM messages").fetchall()
+        return {channel for (channel,) in rows}
+
+    def _due(self, channel: BaseChannel, force: bool) -> list[tuple[int, int, str]]:
+        """The oldest pending messages of a channel. The messages of a
+        channel are delivered strictly in order: they are due when the oldest
+        one is due, so a newer message never overtakes an older one."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT id, attempts, payload, next_attempt FROM messages "
+                "WHERE channel = ? ORDER BY id LIMIT ?",
+                (channel.key, self.batch_size),
+            ).fetchall()
+        if not rows or (not force and rows[0][3] > time.time()):
+            return []
+        return [(row, attempts, payload) for row, attempts, payload, _ in rows]
+
+    def _postpone(self, rows: list[tuple[int, int, str]], error: str) -> None:
+        now = time.time()
+        with self._connect() as db:
+            db.executemany(
+                "UPDATE messages "
+                "SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                (
+                    (attempts + 1, now + self.delay(attempts + 1), error, row)
+                    for row, attempts, _ in rows
+                ),
+            )
+
+    def _deliver(
+        self, channel: BaseChannel, rows: list[tuple[int, int, str]]
+    ) -> Optional[str]:
+        """Deliver a batch of messages. Delete the delivered messages or
+        postpone the next attempt.
+
+        :return: ``None`` if the messages were delivered, else the error."""
+        try:
+            channel.report_batch([_load(payload) for _, _, payload in rows])
+        except Exception as exception:
+            error = repr(exception)
+            self._postpone(rows, error)
+            return error
+        with self._connect() as db:
+            db.executemany(
+                "DELETE FROM messages WHERE id = ?", ((row,) for row, _, _ in rows)
+            )
+        return None
+
+    def flush(self, channels: Iterable[BaseChannel], force: bool = False) -> int:
+        """Deliver the pending messages that are due.
+
+        The oldest message of a channel is delivered first, as a probe. Only
+        if it is delivered, the rest of the batch follows. Otherwise the next
+        attempt of all messages of the batch is postponed.
+
+        :param channels: The channels to deliver the messages by. Messages
+            of other channels stay in the outbox.
+        :param force: Ignore the backoff, deliver all pending messages.
+
+        :return: The number of delivered messages.
+        """
+        delivered = 0
+        for channel in channels:
+            rows = self._due(channel, force)
+            if not rows:
+                continue
+            error = self._deliver(channel, rows[:1])
+            if error is not None:
+                self._postpone(rows[1:], error)
+                continue
+            delivered += 1
+            if rows[1:] and self._deliver(channel, rows[1:]) is None:
+                delivered += len(rows) - 1
+        return delivered
+
+
+def outbox_from_config(config: OutboxConfig) -> Outbox:
+    return Outbox(config.path, base_delay=config.base_delay, max_delay=config.max_delay)
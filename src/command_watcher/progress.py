@@ -0,0 +1,189 @@
+"""Report the progress of a process while it is still running.
+
+A :py:class:`ProgressMonitor` samples the line and byte counters of the log
+handler and the CPU time, the resident set size and the I/O counters of the
+process (from ``/proc``) in its own thread and passes the samples to a
+callback, for example to send intermediate check results to Icinga. The
+threads reading the output of the process never wait for the callback."""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from command_watcher.log import LoggingHandler
+from command_watcher.usage import read_proc_io
+
+DEFAULT_PROGRESS_INTERVAL = 60.0
+"""The default time in seconds between two progress reports."""
+
+STOP_TIMEOUT = 1.0
+"""The maximum time in seconds :py:meth:`ProgressMonitor.stop` waits for a
+running callback. The process does not wait for a slow progress report:
+the reporter delivers the next report of the service after it, see
+:py:meth:`command_watcher.report.Reporter.report_progress`."""
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class Progress:
+    """A sample of a running process."""
+
+    elapsed: float
+    """The time in seconds since the process was started."""
+
+    line_count_stdout: int
+
+    line_count_stderr: int
+
+    byte_count_stdout: int
+
+    byte_count_stderr: int
+
+    cpu_time: Optional[float] = None
+    """The user and system CPU time of the process in seconds, ``None`` if
+    ``/proc`` is not available."""
+
+    rss: Optional[int] = None
+    """The resident set size of the process in bytes, ``None`` if ``/proc``
+    is not available."""
+
+    read_bytes: Optional[int] = None
+    """The bytes the process has read from the storage so far, see
+    :py:func:`command_watcher.usage.read_proc_io`."""
+
+    write_bytes: Optional[int] = None
+    """The bytes the process has written to the storage so far."""
+
+    @property
+    def performance_data(self) -> dict[str, Any]:
+        """The sample as numeric performance data (times in seconds, sizes
+        in bytes), for example ``{"elapsed": 12.345, "lines_stdout": 120,
+        ...}``."""
+        data: dict[str, Any] = {
+            "elapsed": round(self.elapsed, 3),
+            "lines_stdout": self.line_count_stdout,
+            "lines_stderr": self.line_count_stderr,
+            "bytes_stdout": self.byte_count_stdout,
+            "bytes_stderr": self.byte_count_stderr,
+        }
+        if self.cpu_time is not None:
+            data["cpu_time"] = round(self.cpu_time, 3)
+        if self.rss is not None:
+            data["rss"] = self.rss
+        if self.read_bytes is not None:
+            data["read_bytes"] = self.read_bytes
+        if self.write_bytes is not None:
+            data["write_bytes"] = self.write_bytes
+        return data
+
+
+def read_proc_stats(pid: int) -> tuple[Optional[float], Optional[int]]:
+    """Read the CPU time (user and system, in seconds) and the resident set
+    size (in bytes) of a running process from ``/proc``.
+
+    :return: ``(None, None)`` if the process has exited or ``/proc`` is not
+        available."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat_file:
+            stat = stat_file.read()
+        with open(f"/proc/{pid}/statm", "rb") as statm_file:
+            statm = statm_file.read()
+    except OSError:
+        return None, None
+    # The second field (the command name in parentheses) may contain spaces.
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / _CLOCK_TICKS, int(statm.split()[1]) * _PAGE_SIZE
+
+
+class ProgressMonitor:
+    """Sample a running process every ``interval`` seconds in a daemon
+    thread.
+
+    The callback runs in the thread of the monitor, so a slow callback (for
+    example a report over the network) only delays the next sample. Exceptions
+    raised by the callback are ignored. No callback is started after
+    :py:meth:`stop`.
+
+    :param log_handler: The log handler of the process, it holds the line and
+        byte counters.
+    :param pid: The process ID.
+    :param callback: Called with every sample.
+    :param interval: The time in seconds between two samples.
+    """
+
+    log_handler: LoggingHandler
+
+    pid: int
+
+    callback: Callable[[Progress], object]
+
+    interval: float
+
+    _start: float
+
+    _stopped: threading.Event
+
+    _thread: threading.Thread
+
+    def __init__(
+        self,
+        log_handler: LoggingHandler,
+        pid: int,
+        callback: Callable[[Progress], object],
+        interval: float = DEFAULT_PROGRESS_INTERVAL,
+    ) -> None:
+        self.log_handler = log_handler
+        self.pid = pid
+        self.callback = callback
+        self.interval = interval
+        self._start = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="command-watcher-progress", daemon=True
+        )
+
+    def sample(self) -> Progress:
+        handler = self.log_handler
+        cpu_time, rss = read_proc_stats(self.pid)
+        io = read_proc_io(self.pid) or {}
+        return Progress(
+            elapsed=time.monotonic() - self._start,
+            line_count_stdout=handler.line_count_stdout,
+            line_count_stderr=handler.line_count_stderr,
+            byte_count_stdout=handler.byte_count_stdout,
+            byte_count_stderr=handler.byte_count_stderr,
+            cpu_time=cpu_time,
+            rss=rss,
+            read_bytes=io.get("read_bytes"),
+            write_bytes=io.get("write_bytes"),
+        )
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            progress = self.sample()
+            if self._stopped.is_set():
+                break
+            try:
+                self.callback(progress)
+            except Exception:
+                pass
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = STOP_TIMEOUT) -> None:
+        """Stop sampling and wait shortly for a running callback.
+
+        :param timeout: The maximum time to wait in seconds. ``None``: wait
+            until the callback returns.
+        """
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
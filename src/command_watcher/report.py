@@ -1,28 +1,326 @@
-from typing import List, Literal
+import atexit
+import concurrent.futures
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Literal, Optional
 
 from typing_extensions import Unpack
 
 from command_watcher.channels.base_channel import BaseChannel
 from command_watcher.message import Message, MessageParams
 
+if TYPE_CHECKING:
+    from command_watcher.outbox import Outbox
+
 Status = Literal[0, 1, 2, 3]
 
+DEFAULT_TIMEOUT = 30.0
+"""The default time in seconds a channel has to deliver a message."""
+
+EXIT_TIMEOUT = 60.0
+"""The maximum time in seconds the interpreter waits at exit for the
+messages queued for the background worker."""
+
+
+@dataclass(repr=False)
+class ChannelResult:
+    """The result of the delivery of a message by one channel."""
+
+    channel: BaseChannel
+
+    latency: float
+    """The time in seconds the channel took to deliver the message (or until
+    the timeout expired)."""
+
+    error: Optional[BaseException] = None
+    """The exception raised by the channel, a :py:class:`TimeoutError` if the
+    channel did not respond in time."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        result = "OK" if self.error is None else repr(self.error)
+        return f"{self.channel.__class__.__name__}: {result} ({self.latency:.3f}s)"
+
+
+class PendingError(RuntimeError):
+    """The message was not delivered but queued in the outbox behind the
+    pending messages of the channel."""
+
+
+def _deliver(channel: BaseChannel, message: Message) -> ChannelResult:
+    start = time.perf_counter()
+    try:
+        channel.report(message)
+    except Exception as error:
+        return ChannelResult(channel, time.perf_counter() - start, error)
+    return ChannelResult(channel, time.perf_counter() - start)
+
 
 class Reporter:
-    """Collect all channels."""
+    """Collect all channels.
+
+    :param timeout: The time in seconds a channel has to deliver a message.
+        A channel can override it with its attribute ``timeout``. ``None``:
+        wait forever.
+    :param background: Deliver the messages in a background thread:
+        :py:meth:`report` returns at once. The queued messages are delivered
+        at the latest when the interpreter exits (waiting at most
+        :py:data:`EXIT_TIMEOUT` seconds), see :py:meth:`flush`. An error of
+        the reporter itself, for example of the outbox, is recorded in
+        :py:attr:`Message.delivery_error`.
+    :param outbox: Store the messages the durable channels could not
+        deliver in this outbox and deliver the pending messages of the
+        outbox that are due on every report.
+    """
 
     channels: List[BaseChannel]
 
-    def __init__(self) -> None:
+    timeout: Optional[float]
+
+    background: bool
+
+    outbox: Optional["Outbox"]
+
+    _queue: "queue.Queue[Message]"
+    """The messages waiting for the background worker."""
+
+    _worker: Optional[threading.Thread]
+
+    _lock: threading.Lock
+
+    _flushing: set[str]
+    """The keys of the channels whose pending messages are being delivered,
+    maybe still by a flush that timed out."""
+
+    _progress: dict[str, int]
+    """The number of progress reports in delivery per service name."""
+
+    _progress_done: threading.Condition
+
+    def __init__(
+        self,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        background: bool = False,
+        outbox: Optional["Outbox"] = None,
+    ) -> None:
         self.channels = []
+        self.timeout = timeout
+        self.background = background
+        self.outbox = outbox
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._flushing = set()
+        self._progress = {}
+        self._progress_done = threading.Condition()
 
     def add_channel(self, channel: BaseChannel) -> None:
         self.channels.append(channel)
 
+    def dispatch(
+        self, message: Message, channels: Optional[Sequence[BaseChannel]] = None
+    ) -> List[ChannelResult]:
+        """Deliver a message by all channels concurrently. A slow channel
+        does not delay the other channels: the whole dispatch takes as long
+        as the slowest channel (at most its timeout). Exceptions raised by
+        the channels are recorded in the results.
+
+        :param channels: Deliver the message only by these channels.
+            ``None``: all channels.
+
+        :return: One result per channel, in the order of the channels.
+        """
+        return self._run(
+            self.channels if channels is None else channels,
+            lambda channel: _deliver(channel, message),
+        )
+
+    def _run(
+        self,
+        channels: Sequence[BaseChannel],
+        deliver: Callable[[BaseChannel], ChannelResult],
+    ) -> List[ChannelResult]:
+        """Run a delivery per channel concurrently, each within the timeout
+        of its channel."""
+        channels = list(channels)
+        if not channels:
+            return []
+        pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(channels), thread_name_prefix="command-watcher-report"
+        )
+        start = time.perf_counter()
+        futures = [pool.submit(deliver, channel) for channel in channels]
+        results: List[ChannelResult] = []
+        for channel, future in zip(channels, futures):
+            timeout = channel.timeout if channel.timeout is not None else self.timeout
+            remaining = None
+            if timeout is not None:
+                remaining = max(start + timeout - time.perf_counter(), 0)
+            try:
+                results.append(future.result(timeout=remaining))
+            except concurrent.futures.TimeoutError:
+                results.append(
+                    ChannelResult(
+                        channel,
+                        time.perf_counter() - start,
+                        TimeoutError(f"No response within {timeout} seconds."),
+                    )
+                )
+        # Do not wait for the channels that timed out.
+        pool.shutdown(wait=False)
+        return results
+
+    def _wait_for_progress(self, service_name: str) -> None:
+        """Wait until the progress reports of a service in delivery are
+        delivered (or timed out)."""
+        with self._progress_done:
+            self._progress_done.wait_for(lambda: not self._progress.get(service_name))
+
+    def _deliver(self, message: Message) -> None:
+        """Dispatch a message. Store it in the outbox for every durable
+        channel that failed.
+
+        The pending messages of a channel are delivered first (within the
+        timeout of the channel), so an older message never overwrites the
+        state reported by a newer one. If they are not due yet or cannot be
+        delivered, the message is queued behind them in the outbox (a
+        :py:class:`PendingError`)."""
+        self._wait_for_progress(message.service_name)
+        if self.outbox is None:
+            message.channel_results = self.dispatch(message)
+            return
+        outbox = self.outbox
+        for channel in self.channels:
+            if channel.durable:
+                channel.on_failure = self._spool
+        pending = outbox.channels()
+
+        def deliver(channel: BaseChannel) -> ChannelResult:
+            if channel.key in pending:
+                with self._lock:
+                    if channel.key in self._flushing:
+                        return ChannelResult(
+                            channel, 0.0, PendingError("Pending messages in delivery.")
+                        )
+                    self._flushing.add(channel.key)
+                try:
+                    outbox.flush([channel])
+                finally:
+                    with self._lock:
+                        self._flushing.discard(channel.key)
+                if channel.key in outbox.channels():
+                    return ChannelResult(
+                        channel, 0.0, PendingError("Pending messages in the outbox.")
+                    )
+            return _deliver(channel, message)
+
+        message.channel_results = self._run(self.channels, deliver)
+        for result in message.channel_results:
+            if isinstance(result.error, PendingError):
+                outbox.add(result.channel, message, repr(result.error), attempts=0)
+            elif not result.ok and result.channel.durable:
+                outbox.add(result.channel, message, repr(result.error))
+
+    def _spool(
+        self,
+        channel: BaseChannel,
+        messages: Sequence[Message],
+        error: BaseException,
+    ) -> None:
+        """Store the messages a channel failed to deliver later in the
+        outbox, see :py:attr:`BaseChannel.on_failure`."""
+        if self.outbox is None:
+            raise error
+        for message in messages:
+            self.outbox.add(channel, message, repr(error))
+
+    def _work(self) -> None:
+        while True:
+            message = self._queue.get()
+            try:
+                self._deliver(message)
+            except Exception as error:
+                # Keep the worker alive, for example if the outbox is locked.
+                message.delivery_error = error
+            finally:
+                self._queue.task_done()
+
+    def _enqueue(self, message: Message) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._work, name="command-watcher-reporter", daemon=True
+                )
+                self._worker.start()
+                atexit.register(self.flush, EXIT_TIMEOUT)
+        self._queue.put(message)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all messages queued for the background worker are
+        delivered.
+
+        :param timeout: The maximum time to wait in seconds. ``None``: wait
+            until the queue is drained.
+
+        :return: ``True`` if all messages are delivered, ``False`` if the
+            timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if deadline is None:
+                    self._queue.all_tasks_done.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
     def report(self, **data: Unpack[MessageParams]) -> Message:
+        """Deliver a message by all channels.
+
+        In the background mode the message is queued and returned at once,
+        its :py:attr:`Message.channel_results` are set after the delivery.
+        """
         message = Message(**data)
-        for channel in self.channels:
-            channel.report(message)
+        if self.background:
+            self._enqueue(message)
+        else:
+            self._deliver(message)
+        return message
+
+    def report_progress(self, **data: Unpack[MessageParams]) -> Message:
+        """Deliver an intermediate message about a running process by the
+        channels accepting progress reports (see
+        :py:attr:`BaseChannel.progress`), for example Icinga.
+
+        The message is delivered in the calling thread, also in the
+        background mode, and is never stored in the outbox: an outdated
+        progress report is worthless. The next report of the service is
+        delivered after the progress report, so it cannot overwrite a
+        final report.
+        """
+        message = Message(**data)
+        name = message.service_name
+        with self._progress_done:
+            self._progress[name] = self._progress.get(name, 0) + 1
+        try:
+            message.channel_results = self.dispatch(
+                message, [channel for channel in self.channels if channel.progress]
+            )
+        finally:
+            with self._progress_done:
+                self._progress[name] -= 1
+                if not self._progress[name]:
+                    del self._progress[name]
+                self._progress_done.notify_all()
         return message
 
 
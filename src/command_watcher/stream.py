@@ -0,0 +1,142 @@
+"""Read the output streams of a process in chunks, decode them and split
+them into lines."""
+
+import codecs
+from collections.abc import Sequence
+from typing import Optional, Union
+
+CHUNK_SIZE = 65536
+"""Number of bytes read at once from a pipe."""
+
+
+class LineSplitter:
+    """Split a stream of byte chunks into lines.
+
+    A partial line at the end of a chunk is carried over and completed by the
+    next chunk."""
+
+    _rest: bytes
+    """The incomplete last line of the previous chunk."""
+
+    def __init__(self) -> None:
+        self._rest = b""
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Feed a chunk of bytes.
+
+        :param chunk: A chunk of bytes read from a pipe.
+
+        :return: All lines completed by this chunk, without line breaks.
+        """
+        if self._rest:
+            chunk = self._rest + chunk
+        lines = chunk.split(b"\n")
+        self._rest = lines.pop()
+        return lines
+
+    def close(self) -> list[bytes]:
+        """Signal the end of the stream.
+
+        :return: The last line, if the stream does not end with a line
+          break."""
+        rest = self._rest
+        self._rest = b""
+        if rest:
+            return [rest]
+        return []
+
+
+Line = Union[str, bytes]
+"""A line of output: decoded text or raw bytes."""
+
+
+class LineDecoder:
+    """Decode chunks of bytes incrementally and split them into lines.
+
+    The chunks are decoded by an incremental decoder from
+    :py:func:`codecs.getincrementaldecoder`, so multibyte sequences split
+    between two chunks are decoded correctly.
+
+    :param encoding: The encoding of the stream. If ``None`` the lines are
+      not decoded and returned as raw bytes.
+    :param errors: The error handling scheme of the decoder, for example
+      ``strict``, ``replace`` or ``backslashreplace``.
+    :param fallback: If the decoding fails (``errors="strict"``), keep the
+      error in :py:attr:`error` and decode the rest of the stream with this
+      error handling scheme instead of raising the error.
+    """
+
+    error: Optional[UnicodeDecodeError]
+    """The first decoding error, if a ``fallback`` is given."""
+
+    _decoder: Optional[codecs.IncrementalDecoder]
+
+    _encoding: Optional[str]
+
+    _fallback: Optional[str]
+
+    _splitter: LineSplitter
+
+    _rest: str
+    """The incomplete last decoded line of the previous chunk."""
+
+    def __init__(
+        self,
+        encoding: Optional[str] = "utf-8",
+        errors: str = "replace",
+        fallback: Optional[str] = None,
+    ):
+        if encoding is None:
+            self._decoder = None
+        else:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self.error = None
+        self._encoding = encoding
+        self._fallback = fallback
+        self._splitter = LineSplitter()
+        self._rest = ""
+
+    def _decode(self, chunk: bytes, final: bool = False) -> str:
+        assert self._decoder is not None
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError as error:
+            if self._fallback is None or self._encoding is None:
+                raise
+            self.error = error
+            # Continue with the bytes the failed decoder had buffered.
+            state = self._decoder.getstate()
+            self._decoder = codecs.getincrementaldecoder(self._encoding)(
+                errors=self._fallback
+            )
+            self._decoder.setstate(state)
+            return self._decoder.decode(chunk, final)
+
+    def feed(self, chunk: bytes) -> Sequence[Line]:
+        """Feed a chunk of bytes.
+
+        :param chunk: A chunk of bytes read from a pipe.
+
+        :return: All lines completed by this chunk, without line breaks.
+        """
+        if self._decoder is None:
+            return self._splitter.feed(chunk)
+        text = self._decode(chunk)
+        if self._rest:
+            text = self._rest + text
+        lines = text.split("\n")
+        self._rest = lines.pop()
+        return lines
+
+    def close(self) -> Sequence[Line]:
+        """Signal the end of the stream.
+
+        :return: The last line, if the stream does not end with a line
+          break."""
+        if self._decoder is None:
+            return self._splitter.close()
+        rest = self._rest + self._decode(b"", final=True)
+        self._rest = ""
+        if rest:
+            return [rest]
+        return []
@@ -0,0 +1,130 @@
+"""The resource usage of the watched processes: CPU time, memory, block
+I/O and context switches (from :py:func:`os.wait4`) and the bytes read and
+written (from ``/proc/<pid>/io``)."""
+
+import resource
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass, fields, replace
+from typing import Any, Optional
+
+_MAX_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+"""``ru_maxrss`` is in bytes on macOS and in kilobytes on Linux."""
+
+
+@dataclass
+class ResourceUsage:
+    """The resource usage of a process and its reaped children."""
+
+    user_time: float
+    """The CPU time spent in user mode in seconds."""
+
+    system_time: float
+    """The CPU time spent in kernel mode in seconds."""
+
+    max_rss: int
+    """The maximum resident set size in bytes."""
+
+    block_input: int
+    """The number of block input operations."""
+
+    block_output: int
+    """The number of block output operations."""
+
+    voluntary_context_switches: int
+
+    involuntary_context_switches: int
+
+    read_bytes: Optional[int] = None
+    """The bytes fetched from the storage layer, ``None`` if
+    ``/proc/<pid>/io`` is not available."""
+
+    write_bytes: Optional[int] = None
+    """The bytes sent to the storage layer, ``None`` if ``/proc/<pid>/io``
+    is not available."""
+
+    @classmethod
+    def from_rusage(
+        cls, rusage: resource.struct_rusage, io: Optional[dict[str, int]] = None
+    ) -> "ResourceUsage":
+        """
+        :param rusage: The resource usage returned by :py:func:`os.wait4`.
+        :param io: The counters of ``/proc/<pid>/io``, see
+            :py:func:`read_proc_io`.
+        """
+        return cls(
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            max_rss=rusage.ru_maxrss * _MAX_RSS_UNIT,
+            block_input=rusage.ru_inblock,
+            block_output=rusage.ru_oublock,
+            voluntary_context_switches=rusage.ru_nvcsw,
+            involuntary_context_switches=rusage.ru_nivcsw,
+            read_bytes=io.get("read_bytes") if io is not None else None,
+            write_bytes=io.get("write_bytes") if io is not None else None,
+        )
+
+    @classmethod
+    def total(cls, usages: Iterable["ResourceUsage"]) -> Optional["ResourceUsage"]:
+        """Sum up the usage of several processes. ``max_rss`` is the maximum
+        of the processes.
+
+        :return: ``None`` if there are no usages."""
+        total: Optional[ResourceUsage] = None
+        for usage in usages:
+            if total is None:
+                total = replace(usage)
+                continue
+            for field in fields(cls):
+                value = getattr(usage, field.name)
+                current = getattr(total, field.name)
+                if value is None or current is None:
+                    setattr(total, field.name, None)
+                elif field.name == "max_rss":
+                    total.max_rss = max(current, value)
+                else:
+                    setattr(total, field.name, current + value)
+        return total
+
+    @property
+    def cpu_time(self) -> float:
+        """The user and system CPU time in seconds."""
+        return self.user_time + self.system_time
+
+    @property
+    def performance_data(self) -> dict[str, Any]:
+        """The usage as numeric performance data (times in seconds, sizes
+        in bytes), for example ``{"user_time": 0.12, "max_rss": 13807616,
+        ...}``."""
+        data: dict[str, Any] = {
+            "user_time": round(self.user_time, 3),
+            "system_time": round(self.system_time, 3),
+            "max_rss": self.max_rss,
+            "block_input": self.block_input,
+            "block_output": self.block_output,
+            "voluntary_context_switches": self.voluntary_context_switches,
+            "involuntary_context_switches": self.involuntary_context_switches,
+        }
+        if self.read_bytes is not None:
+            data["read_bytes"] = self.read_bytes
+        if self.write_bytes is not None:
+            data["write_bytes"] = self.write_bytes
+        return data
+
+
+def read_proc_io(pid: int) -> Optional[dict[str, int]]:
+    """Read the I/O counters of a process from ``/proc/<pid>/io``, for
+    example ``read_bytes`` and ``write_bytes``.
+
+    :return: ``None`` if the file is not available, for example on other
+        platforms than Linux or if the process has been reaped."""
+    try:
+        with open(f"/proc/{pid}/io") as io_file:
+            lines = io_file.read().splitlines()
+    except OSError:
+        return None
+    counters: dict[str, int] = {}
+    for line in lines:
+        key, _, value = line.partition(":")
+        counters[key] = int(value)
+    return counters
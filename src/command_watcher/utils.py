@@ -5,7 +5,6 @@ import pwd
 import shutil
 import socket
 import stat
-import urllib.request
 
 HOSTNAME = socket.gethostname()
 USERNAME = pwd.getpwuid(os.getuid()).pw_name
@@ -17,6 +16,8 @@ def download(url: str, dest: str) -> None:
     :param url: The URL of the file to download.
     :param dest: The path of the destination file.
     """
+    import urllib.request
+
     with urllib.request.urlopen(url) as response, open(dest, "wb") as out_file:
         shutil.copyfileobj(response, out_file)
 
@@ -0,0 +1,3 @@
+#! /bin/sh
+
+printf 'Gr\374\337e\n'
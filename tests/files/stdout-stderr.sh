@@ -0,0 +1,6 @@
+#! /bin/sh
+
+echo 'Line 1 to stdout'
+echo 'Line 1 to stderr' >&2
+echo 'Line 2 to stdout'
+printf 'Line 3 to stdout without a newline'
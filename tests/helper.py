@@ -1,7 +1,155 @@
+import http.server
+import json
+import socket
+import socketserver
+import threading
 from pathlib import Path
+from typing import Any
 
 DIR_FILES = Path(__file__).resolve().parent / "files"
 """Directory ``tests/files``"""
 
 CONF = DIR_FILES / "conf.yml"
 """Minimal configuration file"""
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """A minimal local SMTP server recording the received mails.
+
+    It speaks just enough SMTP for :py:mod:`smtplib`: ``EHLO``, ``AUTH PLAIN``,
+    ``MAIL``, ``RCPT``, ``DATA``, ``NOOP``, ``RSET`` and ``QUIT``, no TLS."""
+
+    daemon_threads = True
+
+    allow_reuse_address = True
+
+    mails: list[tuple[str, list[str], str]]
+    """from address, recipients, data"""
+
+    commands: list[str]
+
+    connections: int
+
+    _sockets: list[socket.socket]
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _SMTPStubHandler)
+        self.mails = []
+        self.commands = []
+        self.connections = 0
+        self._sockets = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host!s}:{port}"
+
+    def drop_connections(self) -> None:
+        """Close all open connections, like a server dropping idle clients."""
+        for sock in self._sockets:
+            sock.shutdown(socket.SHUT_RDWR)
+        self._sockets.clear()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _SMTPStubHandler(socketserver.StreamRequestHandler):
+    server: SMTPStub
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        self.server.connections += 1
+        self.server._sockets.append(self.request)
+        self.reply("220 localhost stub")
+        from_addr = ""
+        to_addrs: list[str] = []
+        while line := self.rfile.readline():
+            command = line.decode().rstrip("\r\n")
+            verb = command.split(" ", 1)[0].upper()
+            self.server.commands.append(verb)
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                from_addr = command.split(":", 1)[1].strip("<> ").split(">")[0]
+                to_addrs = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                to_addrs.append(command.split(":", 1)[1].strip("<> "))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data: list[str] = []
+                while (line := self.rfile.readline()) not in (b".\r\n", b""):
+                    data.append(line.decode())
+                self.server.mails.append((from_addr, to_addrs, "".join(data)))
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class IcingaStub(http.server.ThreadingHTTPServer):
+    """A fake Icinga API endpoint recording the check results it receives
+    with ``POST /v1/actions/process-check-result``."""
+
+    daemon_threads = True
+
+    check_results: list[dict[str, Any]]
+
+    connections: int
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _IcingaStubHandler)
+        self.check_results = []
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _IcingaStubHandler(http.server.BaseHTTPRequestHandler):
+    server: IcingaStub
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        length = int(self.headers["Content-Length"])
+        payload = json.loads(self.rfile.read(length))
+        body: dict[str, Any]
+        if self.path == "/v1/actions/process-check-result":
+            self.server.check_results.append(payload)
+            status = 200
+            body = {"results": [{"code": 200, "status": "Successfully processed"}]}
+        else:
+            status = 404
+            body = {"error": 404, "status": "Not found"}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
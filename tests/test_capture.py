@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+
+from command_watcher.capture import ENTRY_SIZE, CaptureStore, SpillFile
+from command_watcher.log import STDERR, STDOUT
+
+
+class TestClassSpillFile:
+    def setup_method(self) -> None:
+        self.spill = SpillFile()
+
+    def teardown_method(self) -> None:
+        self.spill.close()
+
+    def test_entries(self) -> None:
+        self.spill.append([(0, (1700000000.5, STDOUT, "1", "Grüße"))])
+        self.spill.append([(1, (1700000001.0, logging.INFO, None, "info"))])
+        entries = list(self.spill.entries())
+        assert self.spill.count == 2
+        assert entries[0] == (1700000000.5, STDOUT, "1", "Grüße")
+        assert entries[1] == (1700000001.0, logging.INFO, None, "info")
+        assert list(self.spill.entries(source=1)) == [entries[1]]
+
+    def test_raw_bytes(self) -> None:
+        self.spill.append([(0, (0.0, STDOUT, None, b"\xfc"))])
+        assert list(self.spill.entries())[0][3] == b"\xfc"
+
+
+class TestClassCaptureStore:
+    def setup_method(self) -> None:
+        self.store = CaptureStore(indexed_levels=(STDOUT, STDERR))
+
+    def teardown_method(self) -> None:
+        self.store.close()
+
+    def test_extend(self) -> None:
+        self.store.extend(1700000000.5, STDOUT, ["out 1", "out 2"])
+        self.store.append(1700000001.0, STDERR, "err", tag="1")
+        assert len(self.store) == 3
+        assert self.store.entry(0) == (1700000000.5, STDOUT, None, "out 1")
+        assert self.store.entry(-1) == (1700000001.0, STDERR, "1", "err")
+        assert self.store.memory == 3 * ENTRY_SIZE + 13
+
+    def test_extend_size(self) -> None:
+        assert self.store.extend(0.0, STDOUT, ["Grüße", b"\xff"]) == 8
+
+    def test_entry_index_error(self) -> None:
+        with pytest.raises(IndexError):
+            self.store.entry(0)
+
+    def test_messages(self) -> None:
+        self.store.extend(0.0, STDOUT, ["out 1"])
+        self.store.extend(0.0, STDERR, ["err"])
+        self.store.extend(0.0, STDOUT, [b"\xfc"])
+        self.store.append(0.0, logging.INFO, "info")
+        assert list(self.store.messages(STDOUT)) == ["out 1", b"\xfc"]
+        assert list(self.store.messages(STDERR)) == ["err"]
+        assert list(self.store.messages(logging.INFO)) == ["info"]
+
+    def test_sources(self) -> None:
+        source = self.store.add_source()
+        self.store.extend(0.0, STDOUT, ["watch"])
+        self.store.extend(0.0, STDOUT, ["process"], tag="1", source=source)
+        assert list(self.store.messages(STDOUT)) == ["watch", "process"]
+        assert list(self.store.messages(STDOUT, source)) == ["process"]
+        assert list(self.store.positions(source)) == [1]
+        self.store.spill()
+        assert list(self.store.entries(source)) == [(0.0, STDOUT, "1", "process")]
+        self.store.extend(1.0, STDOUT, ["process 2"], tag="1", source=source)
+        assert self.store.count(source) == 2
+        assert self.store.entry(0, source) == (0.0, STDOUT, "1", "process")
+        assert self.store.entry(-1, source) == (1.0, STDOUT, "1", "process 2")
+
+    def test_records(self) -> None:
+        self.store.append(1700000000.5, STDOUT, "Grüße", tag="1")
+        record = list(self.store.records())[0]
+        assert record.msg == "Grüße"
+        assert record.levelname == "STDOUT"
+        assert record.msecs == 500
+        assert record.tag == "1"  # type: ignore
+
+    def test_spill(self) -> None:
+        store = CaptureStore(memory_budget=2 * ENTRY_SIZE, indexed_levels=(STDOUT,))
+        store.extend(0.0, STDOUT, ["line 1", "line 2"])
+        store.extend(0.0, STDOUT, ["line 3"])
+        assert store.spilled_count == 2
+        assert store.memory_count == 1
+        assert list(store.messages(STDOUT)) == ["line 1", "line 2", "line 3"]
+        assert [entry[3] for entry in store.entries()] == [
+            "line 1",
+            "line 2",
+            "line 3",
+        ]
+        store.close()
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from command_watcher import cli
+from tests.helper import CONF, DIR_FILES
+
+
+class TestFlushOutbox:
+    def test_empty_outbox(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        outbox = tmp_path / "outbox.sqlite"
+        assert (
+            cli.main(["--config", str(CONF), "flush-outbox", "--outbox", str(outbox)])
+            == 0
+        )
+        assert capsys.readouterr().out == "Delivered: 0, pending: 0\n"
+        assert outbox.exists()
+
+    def test_subcommand_required(self) -> None:
+        with pytest.raises(SystemExit):
+            cli.main([])
+
+
+class TestRun:
+    argv = ["--config", str(DIR_FILES / "conf-beep.yml"), "run", "--echo", "none"]
+
+    def test_success(self) -> None:
+        assert cli.main(self.argv + ["--", "true"]) == 0
+
+    def test_exit_code(self) -> None:
+        assert cli.main(self.argv + ["--", "sh", "-c", "exit 3"]) == 3
+
+    def test_ignore_exit_code(self) -> None:
+        assert cli.main(self.argv + ["-i", "3", "--", "sh", "-c", "exit 3"]) == 0
+
+    def test_command_not_found(self) -> None:
+        assert cli.main(self.argv + ["--", "command-not-found-xyz"]) == 127
+
+    def test_output(self, capfd: pytest.CaptureFixture[str]) -> None:
+        argv = self.argv[:-1] + ["live", "--", "echo", "hello"]
+        assert cli.main(argv) == 0
+        assert "hello" in capfd.readouterr().out
+
+    @pytest.mark.parametrize("pattern", ["no-equal-sign", "=x", "name=("])
+    def test_invalid_performance_data(self, pattern: str) -> None:
+        with pytest.raises(SystemExit):
+            cli.main(self.argv + ["-p", pattern, "--", "true"])
+
+    def test_performance_data(self) -> None:
+        args = cli.get_parser().parse_args(
+            ["run", "-p", "sent=sent ([0-9,]+) bytes", "-p", "a=b=c", "--", "true"]
+        )
+        assert cli._job(args).extract == {"sent": "sent ([0-9,]+) bytes", "a": "b=c"}
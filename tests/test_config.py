@@ -0,0 +1,90 @@
+import os
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from command_watcher import Watch
+from command_watcher.config import Config, load_config
+from tests.helper import CONF
+
+
+@pytest.fixture
+def conf(tmp_path: Path) -> Path:
+    path = tmp_path / "conf.yml"
+    shutil.copy(CONF, path)
+    return path
+
+
+def change(path: Path, old: str, new: str) -> None:
+    stat = path.stat()
+    path.write_text(path.read_text().replace(old, new))
+    # Make sure the change is visible even on coarse file system clocks.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestLoadConfig:
+    def test_cached(self, conf: Path) -> None:
+        config = load_config(conf)
+        assert isinstance(config, Config)
+        assert load_config(str(conf)) is config
+
+    def test_cache_by_path(self, conf: Path, tmp_path: Path) -> None:
+        other = tmp_path / "other.yml"
+        other.write_text("beep:\n  activated: false\n")
+        assert load_config(conf).email is not None
+        assert load_config(other).email is None
+
+    def test_reload_on_change(self, conf: Path) -> None:
+        config = load_config(conf)
+        assert config.email is not None
+        assert config.email.to_addr == "to@example.com"
+        change(conf, "to@example.com", "new@example.com")
+        config = load_config(conf)
+        assert config.email is not None
+        assert config.email.to_addr == "new@example.com"
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        with pytest.raises(FileNotFoundError):
+            load_config(tmp_path / "missing.yml")
+
+    def test_snapshot(self, conf: Path, tmp_path: Path) -> None:
+        snapshots = tmp_path / "snapshots"
+        config = load_config(conf, snapshot_dir=snapshots)
+        assert len(list(snapshots.iterdir())) == 1
+        with (
+            mock.patch.dict("command_watcher.config._cache", clear=True),
+            mock.patch("command_watcher.config._adapter") as adapter,
+        ):
+            assert load_config(conf, snapshot_dir=snapshots) == config
+        adapter.validate_python.assert_not_called()
+
+    def test_snapshot_outdated(self, conf: Path, tmp_path: Path) -> None:
+        snapshots = tmp_path / "snapshots"
+        load_config(conf, snapshot_dir=snapshots)
+        change(conf, "to@example.com", "new@example.com")
+        with mock.patch.dict("command_watcher.config._cache", clear=True):
+            config = load_config(conf, snapshot_dir=snapshots)
+        assert config.email is not None
+        assert config.email.to_addr == "new@example.com"
+
+    def test_snapshot_broken(self, conf: Path, tmp_path: Path) -> None:
+        snapshots = tmp_path / "snapshots"
+        load_config(conf, snapshot_dir=snapshots)
+        for snapshot in snapshots.iterdir():
+            snapshot.write_bytes(b"broken")
+        with mock.patch.dict("command_watcher.config._cache", clear=True):
+            assert load_config(conf, snapshot_dir=snapshots).email is not None
+
+
+def test_watch_config_file(conf: Path, tmp_path: Path) -> None:
+    other = tmp_path / "other.yml"
+    other.write_text("beep:\n  activated: false\n")
+    assert Watch(config_file=conf, report_channels=[])._config.email is not None
+    assert Watch(config_file=other, report_channels=[])._config.email is None
+
+
+def test_watch_config() -> None:
+    config = Config()
+    assert Watch(config=config, report_channels=[])._config is config
@@ -0,0 +1,200 @@
+import os
+import socket
+import sys
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from command_watcher import Message, cli
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.client import default_socket_path, submit
+from command_watcher.daemon import Daemon
+from command_watcher.job import Job
+from tests.helper import CONF
+
+
+class RecordingChannel(BaseChannel):
+    def __init__(self) -> None:
+        self.messages: list[Message] = []
+
+    def report(self, message: Message) -> None:
+        self.messages.append(message)
+
+
+@pytest.fixture(autouse=True)
+def no_color(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("NO_COLOR", "1")
+
+
+@pytest.fixture
+def channel() -> RecordingChannel:
+    return RecordingChannel()
+
+
+@pytest.fixture
+def daemon(tmp_path: Path, channel: RecordingChannel) -> Iterator[Daemon]:
+    server = Daemon(
+        str(tmp_path / "daemon.sock"),
+        config_file=CONF,
+        channels=[channel],
+        background_reports=False,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def run(daemon: Daemon, tmp_path: Path, job: Job) -> tuple[int, str, str]:
+    stdout_file = tmp_path / "stdout"
+    stderr_file = tmp_path / "stderr"
+    with open(stdout_file, "w") as stdout, open(stderr_file, "w") as stderr:
+        returncode = submit(job, daemon.socket_path, stdout.fileno(), stderr.fileno())
+    return returncode, stdout_file.read_text(), stderr_file.read_text()
+
+
+def test_default_socket_path(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+    assert default_socket_path() == "/run/user/1000/command-watcher.sock"
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert default_socket_path().endswith(f"/command-watcher-{os.getuid()}.sock")
+
+
+class TestClassDaemon:
+    def test_success(
+        self, daemon: Daemon, tmp_path: Path, channel: RecordingChannel
+    ) -> None:
+        returncode, stdout, stderr = run(
+            daemon,
+            tmp_path,
+            Job(
+                [
+                    sys.executable,
+                    "-c",
+                    "print('out'); import sys; print('err', file=sys.stderr)",
+                ]
+            ),
+        )
+        assert returncode == 0
+        assert "STDOUT    out" in stdout
+        assert "STDERR    err" in stderr
+        assert "STDOUT    out" not in stderr
+        assert len(channel.messages) == 1
+        assert channel.messages[0].status == 0
+
+    def test_failure(
+        self, daemon: Daemon, tmp_path: Path, channel: RecordingChannel
+    ) -> None:
+        job = Job(["sh", "-c", "exit 3"], service_name="backup")
+        assert run(daemon, tmp_path, job)[0] == 3
+        assert channel.messages[0].status == 2
+        assert channel.messages[0].service_name == "backup"
+
+    def test_ignored_exit_code(self, daemon: Daemon, tmp_path: Path) -> None:
+        job = Job(["sh", "-c", "exit 3"], ignore_exit_codes=[3])
+        assert run(daemon, tmp_path, job)[0] == 0
+
+    def test_command_not_found(
+        self, daemon: Daemon, tmp_path: Path, channel: RecordingChannel
+    ) -> None:
+        assert run(daemon, tmp_path, Job(["command-not-found-xyz"]))[0] == 127
+        assert channel.messages[0].status == 2
+
+    def test_cwd_and_env(self, daemon: Daemon, tmp_path: Path) -> None:
+        job = Job(
+            ["sh", "-c", "pwd; echo $GREETING"],
+            cwd=str(tmp_path),
+            env={"GREETING": "hello"},
+        )
+        returncode, stdout, _ = run(daemon, tmp_path, job)
+        assert returncode == 0
+        assert f"STDOUT    {tmp_path}" in stdout
+        assert "STDOUT    hello" in stdout
+
+    def test_concurrent_jobs(self, daemon: Daemon, tmp_path: Path) -> None:
+        results: dict[int, str] = {}
+
+        def job(index: int) -> None:
+            directory = tmp_path / str(index)
+            directory.mkdir()
+            returncode, stdout, _ = run(
+                daemon, directory, Job(["sh", "-c", f"sleep 0.2; echo job-{index}"])
+            )
+            assert returncode == 0
+            results[index] = stdout
+
+        threads = [threading.Thread(target=job, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index, stdout in results.items():
+            assert f"job-{index}" in stdout
+            assert stdout.count("STDOUT    job-") == 1
+
+    def test_invalid_job(self, daemon: Daemon, tmp_path: Path) -> None:
+        with pytest.raises(RuntimeError, match="no command"):
+            run(daemon, tmp_path, Job([]))
+
+    def test_client_output_closed(
+        self, daemon: Daemon, tmp_path: Path, channel: RecordingChannel
+    ) -> None:
+        read_fd, write_fd = os.pipe()
+        os.close(read_fd)
+        with open(tmp_path / "stderr", "w") as stderr:
+            returncode = submit(
+                Job(["sh", "-c", "echo out; exit 3"], service_name="closed"),
+                daemon.socket_path,
+                write_fd,
+                stderr.fileno(),
+            )
+        os.close(write_fd)
+        assert returncode == 3
+        assert channel.messages[0].service_name == "closed"
+        assert channel.messages[0].status == 2
+
+    def test_sys_stdout_restored(self, tmp_path: Path) -> None:
+        stdout = sys.stdout
+        server = Daemon(str(tmp_path / "daemon.sock"), config_file=CONF, channels=[])
+        assert sys.stdout is not stdout
+        server.server_close()
+        assert sys.stdout is stdout
+        assert not (tmp_path / "daemon.sock").exists()
+
+    def test_already_running(self, daemon: Daemon) -> None:
+        with pytest.raises(OSError, match="already listening"):
+            Daemon(daemon.socket_path, config_file=CONF, channels=[])
+
+    def test_stale_socket(self, tmp_path: Path) -> None:
+        path = tmp_path / "daemon.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(path))
+        assert path.exists()
+        server = Daemon(str(path), config_file=CONF, channels=[])
+        server.server_close()
+
+
+class TestClassCli:
+    def test_submit(
+        self,
+        daemon: Daemon,
+        channel: RecordingChannel,
+        capfd: pytest.CaptureFixture[str],
+    ) -> None:
+        argv = ["submit", "--socket", daemon.socket_path, "-s", "cli"]
+        assert cli.main(argv + ["--", "sh", "-c", "echo hello; exit 4"]) == 4
+        assert "STDOUT    hello" in capfd.readouterr().out
+        assert channel.messages[0].service_name == "cli"
+
+    def test_submit_no_daemon(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        argv = ["submit", "--socket", str(tmp_path / "missing.sock"), "--", "true"]
+        assert cli.main(argv) == 1
+        assert "cannot reach the daemon" in capsys.readouterr().err
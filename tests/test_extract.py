@@ -0,0 +1,150 @@
+import asyncio
+import re
+import sys
+from pathlib import Path
+from typing import Union
+
+import pytest
+
+from command_watcher import AsyncCommandExecutor, CommandExecutor, Watch
+from command_watcher.extract import Extraction, Extractor, count, to_number
+from tests.helper import CONF
+
+RSYNC_OUTPUT: list[Union[str, Path]] = [
+    "sh",
+    "-c",
+    "echo sending incremental file list; echo processed 2 files; "
+    "echo 'sent 1,234,567 bytes  received 89 bytes  2,469,312.00 bytes/sec'; "
+    "echo processed 5 files; echo 'total size is 10,000  speedup is 0.01' >&2",
+]
+
+EXTRACTORS: dict[str, Extractor] = {
+    "sent": re.compile(r"sent ([\d,]+) bytes"),
+    "rate": r"([\d,.]+) bytes/sec",
+    "speedup": re.compile(r"speedup is (\S+)"),
+    "files": re.compile(r"processed (\d+) files"),
+}
+
+EXPECTED = {"sent": 1234567, "rate": 2469312.0, "speedup": 0.01, "files": 5}
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("12", 12), ("1,234", 1234), ("0.5", 0.5), ("1.5e3", 1500.0), ("ok", "ok")],
+)
+def test_to_number(value: str, expected: object) -> None:
+    assert to_number(value) == expected
+
+
+class TestClassExtraction:
+    def test_last_match_wins(self) -> None:
+        extraction = Extraction({"files": re.compile(r"processed (\d+)")})
+        extraction.feed(["processed 1 files", "processed 2 files"])
+        extraction.feed(["done"])
+        assert extraction.values == {"files": 2}
+
+    def test_no_group(self) -> None:
+        extraction = Extraction({"state": "ok|failed"})
+        extraction.feed(["state: ok"])
+        assert extraction.values == {"state": "ok"}
+
+    def test_no_match(self) -> None:
+        extraction = Extraction({"files": r"(\d+) files"})
+        extraction.feed(["nothing"])
+        assert extraction.values == {}
+
+    def test_callable(self) -> None:
+        extraction = Extraction(
+            {"length": lambda line: len(line) if line.startswith("x") else None}
+        )
+        extraction.feed(["xx", "y", "xxxx", "yyyyyy"])
+        assert extraction.values == {"length": 4}
+
+    def test_bytes(self) -> None:
+        extraction = Extraction({"files": re.compile(r"(\d+) files")})
+        extraction.feed([b"3 files"])
+        assert extraction.values == {"files": 3}
+
+    def test_count(self) -> None:
+        extraction = Extraction({"lines": count(), "installed": count(r"^i ")})
+        extraction.feed(["i a", "b", "i c"])
+        extraction.feed(["d"])
+        assert extraction.values == {"lines": 4, "installed": 2}
+
+    def test_failing_extractor(self) -> None:
+        def fail(line: str) -> None:
+            raise ValueError(line)
+
+        extraction = Extraction({"fail": fail, "lines": count()})
+        extraction.feed(["a", "b"])
+        extraction.feed(["c"])
+        assert extraction.values == {"lines": 3}
+        assert repr(extraction.errors["fail"]) == "ValueError('a')"
+
+
+class TestClassCommandExecutor:
+    @pytest.mark.parametrize("pump", ["thread", "selector"])
+    def test_extract(self, pump: str) -> None:
+        process = CommandExecutor(
+            RSYNC_OUTPUT,
+            echo="none",
+            pump=pump,  # type: ignore
+            extract=EXTRACTORS,
+        )
+        assert process.performance_data == EXPECTED
+
+    def test_raw_bytes(self) -> None:
+        process = CommandExecutor(
+            RSYNC_OUTPUT, echo="none", encoding=None, extract=EXTRACTORS
+        )
+        assert process.performance_data == EXPECTED
+
+    def test_without_extract(self) -> None:
+        assert CommandExecutor(["true"], echo="none").performance_data == {}
+
+    def test_failing_extractor_logged(self) -> None:
+        process = CommandExecutor(
+            RSYNC_OUTPUT, echo="none", extract={"fail": lambda line: 1 / 0}
+        )
+        assert (
+            "Extractor 'fail' failed: ZeroDivisionError"
+            in process.log_handler.all_records
+        )
+
+    def test_async(self) -> None:
+        process = asyncio.run(
+            AsyncCommandExecutor(RSYNC_OUTPUT, echo="none", extract=EXTRACTORS).run()
+        )
+        assert process.performance_data == EXPECTED
+
+
+def test_watch_final_report() -> None:
+    watch = Watch(
+        config_file=CONF, service_name="test", report_channels=[], echo="none"
+    )
+    watch.run(RSYNC_OUTPUT, extract=EXTRACTORS)
+    watch.run(
+        [sys.executable, "-c", "print('\\n'.join(['i a', 'b', 'i c']))"],
+        extract={"installed": count(r"^i "), "files": count()},
+    )
+    assert watch.performance_data == {**EXPECTED, "installed": 2, "files": 3}
+    message = watch.final_report(status=0, performance_data={"sent": "custom"})
+    assert "sent=custom" in message.performance_data
+    assert "rate=2469312.0" in message.performance_data
+    assert "installed=2" in message.performance_data
+    assert "files=3" in message.performance_data
+    assert "execution_time=" in message.performance_data
+
+
+def test_watch_run_many() -> None:
+    watch = Watch(
+        config_file=CONF, service_name="test", report_channels=[], echo="none"
+    )
+    lines = count()
+    first, second = watch.run_many(
+        [["printf", "a\\nsent 1 bytes\\n"], ["printf", "sent 2 bytes\\n"]],
+        extract={"sent": r"sent (\d+) bytes", "lines": lines},
+    )
+    assert first.performance_data == {"sent": 1, "lines": 2}
+    assert second.performance_data == {"sent": 2, "lines": 1}
+    assert watch.performance_data == {"sent": 2, "lines": 1}
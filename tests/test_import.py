@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+from tests.helper import DIR_FILES
+
+HEAVY_MODULES = ("pretiac", "requests", "smtplib", "yaml", "pydantic", "asyncio")
+
+
+def imported_modules(code: str) -> set[str]:
+    """Run the code in a fresh interpreter and return the heavy modules
+    imported afterwards."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"{code}\nimport sys\nprint(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return set(output.split()) & set(HEAVY_MODULES)
+
+
+def test_import() -> None:
+    assert imported_modules("import command_watcher") == set()
+
+
+def test_lazy_attribute() -> None:
+    assert imported_modules(
+        "from command_watcher import EmailChannel; import command_watcher\n"
+        "assert command_watcher.__version__"
+    ) == {"smtplib"}
+
+
+def test_watch_without_icinga() -> None:
+    assert "pretiac" not in imported_modules(
+        "from command_watcher import Watch\n"
+        f"Watch(config_file='{DIR_FILES / 'conf-beep.yml'}', echo='none')"
+    )
+
+
+def test_watch_with_icinga() -> None:
+    modules = imported_modules(
+        "from command_watcher import Watch\n"
+        f"Watch(config_file='{DIR_FILES / 'conf.yml'}', echo='none')"
+    )
+    assert {"pretiac", "requests", "smtplib", "yaml", "pydantic"} <= modules
+
+
+def test_client() -> None:
+    assert (
+        imported_modules(
+            "from command_watcher import cli\n"
+            "cli.get_parser().parse_args(['submit', '--', 'true'])"
+        )
+        == set()
+    )
@@ -0,0 +1,43 @@
+import pytest
+
+from command_watcher import Message
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.config import Config
+from command_watcher.job import Job, run_job
+
+
+class RecordingChannel(BaseChannel):
+    def __init__(self) -> None:
+        self.messages: list[Message] = []
+
+    def report(self, message: Message) -> None:
+        self.messages.append(message)
+
+
+class TestClassJob:
+    def test_round_trip(self) -> None:
+        job = Job(["ls", "-l"], service_name="list", extract={"files": "(\\d+)"})
+        assert Job.from_dict(job.to_dict()) == job
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"args": []},
+            {"args": ["ls"], "unknown": 1},
+            {"args": ["ls"], "extract": {"a": "("}},
+        ],
+    )
+    def test_invalid(self, data: dict[str, object]) -> None:
+        with pytest.raises(ValueError, match="Invalid job"):
+            Job.from_dict(data)
+
+
+class TestRunJob:
+    def test_performance_data(self) -> None:
+        channel = RecordingChannel()
+        job = Job(
+            ["sh", "-c", "echo processed 3 files; echo processed 7 files"],
+            extract={"files": r"processed (\d+) files"},
+        )
+        assert run_job(job, Config(), channels=[channel], echo="none") == 0
+        assert "files=7" in channel.messages[0].performance_data
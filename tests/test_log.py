@@ -1,8 +1,11 @@
+import logging
 import os
 
+import pytest
 from stdout_stderr_capturing import Capturing
 
 import command_watcher
+import command_watcher.capture
 import command_watcher.log
 
 os.environ["FORCE_COLOR"] = "1"
@@ -17,6 +20,10 @@ class TestLogging:
     def test_initialisation(self) -> None:
         assert len(self.logger.name) == 36
 
+    def test_not_registered(self) -> None:
+        assert self.logger.name not in logging.Logger.manager.loggerDict
+        assert self.logger.parent is None
+
     def test_log_stdout(self) -> None:
         self.logger.stdout("stdout")
         assert len(self.handler.buffer) == 1
@@ -41,6 +48,25 @@ class TestLogging:
         self.logger.stdout("stdout")
         assert self.handler.stderr == "line 1\nline 2"
 
+    def test_property_line_count(self) -> None:
+        self.logger.stdout("line 1")
+        self.logger.stdout("line 2\nline 3")
+        self.logger.stderr("stderr")
+        assert self.handler.line_count_stdout == 3
+        assert self.handler.line_count_stderr == 1
+
+    def test_property_byte_count(self) -> None:
+        self.logger.stdout("äöü")
+        self.logger.stdout(b"raw")
+        assert self.handler.byte_count_stdout == 9
+        assert self.handler.byte_count_stderr == 0
+
+    def test_property_stdout_cached(self) -> None:
+        self.logger.stdout("line 1")
+        assert self.handler.stdout is self.handler.stdout
+        self.logger.stdout("line 2")
+        assert self.handler.stdout == "line 1\nline 2"
+
     def test_property_all_records(self) -> None:
         self.logger.stderr("stderr")
         self.logger.stdout("stdout")
@@ -52,6 +78,90 @@ class TestLogging:
         assert "debug" in self.handler.all_records
 
 
+class TestSharedStore:
+    def setup_method(self) -> None:
+        self.master, self.master_handler = command_watcher.log.setup_logging(
+            echo="none"
+        )
+        self.logger, self.handler = command_watcher.log.setup_logging(
+            master_logger=self.master, tag="1"
+        )
+
+    def test_shared(self) -> None:
+        assert self.handler._store is self.master_handler._store  # type: ignore
+
+    def test_views(self) -> None:
+        self.master.info("master")
+        self.handler.capture(command_watcher.log.STDOUT, ["line 1", "line 2"])
+        self.logger.info("process")
+        assert self.handler.stdout == "line 1\nline 2"
+        assert self.master_handler.stdout == "line 1\nline 2"
+        assert self.master_handler.line_count_stdout == 2
+        assert len(self.handler.buffer) == 3
+        assert len(self.master_handler.buffer) == 4
+        assert "[1] line 1" not in self.handler.all_records
+        assert "STDOUT [1] line 1" in self.master_handler.all_records
+
+    def test_foreign_master_logger(self) -> None:
+        master = logging.getLogger("foreign")
+        master.addHandler(logging.NullHandler())
+        _, handler = command_watcher.log.setup_logging(master_logger=master)
+        assert handler._parent is None  # type: ignore
+
+
+class TestSpillToDisk:
+    def setup_method(self) -> None:
+        logger, handler = command_watcher.log.setup_logging(
+            memory_budget=2 * command_watcher.capture.ENTRY_SIZE + 20
+        )
+        self.logger = logger
+        self.handler = handler
+
+    def test_spill(self) -> None:
+        for i in range(10):
+            self.logger.stdout(f"line {i}")
+        self.logger.stderr("stderr")
+        assert self.handler._store.memory_count < 3  # type: ignore
+        assert len(self.handler.buffer) == 11
+        assert self.handler.buffer[0].msg == "line 0"
+        assert self.handler.buffer[-1].msg == "stderr"
+        assert [r.msg for r in self.handler.buffer][9] == "line 9"
+        assert self.handler.stdout == "\n".join(f"line {i}" for i in range(10))
+        assert self.handler.stderr == "stderr"
+        assert self.handler.line_count_stdout == 10
+        records = self.handler.all_records.splitlines()
+        assert len(records) == 11
+        assert records[0].endswith("STDOUT line 0")
+        assert records[-1].endswith("STDERR stderr")
+
+    def test_view_after_spill(self) -> None:
+        self.logger.stdout("line 0")
+        view = self.handler.buffer
+        assert len(view) == 1
+        for i in range(1, 10):
+            self.logger.stdout(f"line {i}")
+        assert len(view) == 10
+        assert view[0].msg == "line 0"
+        assert [record.msg for record in view[-2:]] == ["line 8", "line 9"]
+
+    def test_shared_store_spill(self) -> None:
+        _, child = command_watcher.log.setup_logging(master_logger=self.logger, tag="1")
+        for i in range(5):
+            self.logger.stdout(f"master {i}")
+            child.capture(command_watcher.log.STDOUT, [f"child {i}"])
+        assert [record.msg for record in child.buffer] == [
+            f"child {i}" for i in range(5)
+        ]
+        assert child.buffer[0].msg == "child 0"
+        assert len(self.handler.buffer) == 10
+
+    def test_close(self) -> None:
+        for i in range(10):
+            self.logger.stdout(f"line {i}")
+        self.handler.close()
+        assert self.handler._store._spill is None  # type: ignore
+
+
 class TestColorizedPrint:
     def setup_method(self) -> None:
         self.logger, _ = command_watcher.log.setup_logging()
@@ -115,3 +225,34 @@ class TestColorizedPrint:
         assert (
             output[0][20:] == "\x1b[7m\x1b[30m Level 1  \x1b[0m \x1b[30mNOTSET 0\x1b[0m"
         )
+
+
+class TestRenderer:
+    def setup_method(self) -> None:
+        self.renderer = command_watcher.log.Renderer(flush_interval=60)
+
+    def test_buffered(self) -> None:
+        with Capturing() as output:
+            self.renderer.write(command_watcher.log.STDOUT, 0.0, ["line 1", "line 2"])
+            assert output == []
+            self.renderer.flush()
+        assert len(output) == 2
+        assert output[1].endswith("line 2\x1b[0m")
+
+    def test_flush_size(self) -> None:
+        self.renderer.flush_size = 10
+        with Capturing() as output:
+            self.renderer.write(command_watcher.log.STDOUT, 0.0, ["long line"])
+        assert len(output) == 1
+
+    def test_no_color(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("FORCE_COLOR")
+        with Capturing(stream="stderr") as output:
+            self.renderer.write(command_watcher.log.STDERR, 0.0, ["line"])
+            self.renderer.flush()
+        assert output[0][20:] == " STDERR    line"
+
+    def test_timestamp(self) -> None:
+        timestamp = self.renderer.timestamp(1700000000.5)
+        assert timestamp.endswith("_500")
+        assert self.renderer.timestamp(1700000000.25)[:-3] == timestamp[:-3]
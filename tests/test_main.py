@@ -1,4 +1,7 @@
+import asyncio
 import os
+import sys
+import time
 from typing import Any
 from unittest import mock
 
@@ -6,7 +9,7 @@ import pytest
 from stdout_stderr_capturing import Capturing
 
 import command_watcher
-from command_watcher import CommandExecutor, Watch
+from command_watcher import AsyncCommandExecutor, CommandExecutor, Timer, Watch
 from command_watcher.message import Message
 from command_watcher.utils import HOSTNAME, USERNAME
 from tests.helper import CONF, DIR_FILES
@@ -44,6 +47,329 @@ class TestClassCommandExecutor:
         assert process.line_count_stderr == 1
 
 
+class TestClassCommandExecutorPumpSelector:
+    cmd_stdout_stderr = DIR_FILES / "stdout-stderr.sh"
+
+    def test_stdout(self) -> None:
+        process = CommandExecutor(DIR_FILES / "stdout.sh", pump="selector")
+        assert process.stdout == "One line to stdout!"
+        assert process.subprocess.returncode == 0
+
+    def test_stderr(self) -> None:
+        process = CommandExecutor(DIR_FILES / "stderr.sh", pump="selector")
+        assert process.stderr == "One line to stderr!"
+        assert process.subprocess.returncode == 1
+
+    def test_same_output_as_thread_pump(self) -> None:
+        selector = CommandExecutor(self.cmd_stdout_stderr, pump="selector")
+        thread = CommandExecutor(self.cmd_stdout_stderr, pump="thread")
+        assert selector.stdout == thread.stdout
+        assert selector.stderr == thread.stderr
+        assert selector.stdout == (
+            "Line 1 to stdout\nLine 2 to stdout\nLine 3 to stdout without a newline"
+        )
+
+    def test_watch_run(self) -> None:
+        watch = Watch(config_file=CONF, service_name="test", report_channels=[])
+        process = watch.run(DIR_FILES / "stdout.sh", pump="selector")
+        assert watch.stdout == "One line to stdout!"
+        assert process.line_count_stdout == 1
+
+
+class TestClassCommandExecutorReadModeChunk:
+    def test_stdout_stderr(self) -> None:
+        process = CommandExecutor(DIR_FILES / "stdout-stderr.sh", read_mode="chunk")
+        assert process.stdout == (
+            "Line 1 to stdout\nLine 2 to stdout\nLine 3 to stdout without a newline"
+        )
+        assert process.stderr == "Line 1 to stderr"
+
+    def test_many_lines(self) -> None:
+        process = CommandExecutor(["seq", "10000"], read_mode="chunk")
+        assert process.line_count_stdout == 10000
+        assert process.stdout.endswith("9999\n10000")
+
+
+class TestClassCommandExecutorEncoding:
+    cmd = DIR_FILES / "latin-1.sh"
+
+    def test_invalid_bytes_are_replaced(self) -> None:
+        process = CommandExecutor(self.cmd)
+        assert process.stdout == "Gr\ufffd\ufffde"
+
+    def test_encoding(self) -> None:
+        process = CommandExecutor(self.cmd, encoding="latin-1")
+        assert process.stdout == "Grüße"
+
+    def test_encoding_selector(self) -> None:
+        process = CommandExecutor(self.cmd, encoding="latin-1", pump="selector")
+        assert process.stdout == "Grüße"
+
+    def test_raw_bytes(self) -> None:
+        process = CommandExecutor(self.cmd, encoding=None, read_mode="chunk")
+        assert process.log_handler.buffer[1].msg == b"Gr\xfc\xdfe"
+        assert process.stdout == "Gr\ufffd\ufffde"
+        assert "STDOUT Gr\ufffd\ufffde" in process.log_handler.all_records
+
+    def test_watch_run(self) -> None:
+        watch = Watch(config_file=CONF, service_name="test", report_channels=[])
+        watch.run(self.cmd, encoding="latin-1")
+        assert watch.stdout == "Grüße"
+
+    @pytest.mark.parametrize("pump", ["thread", "selector"])
+    @pytest.mark.parametrize("read_mode", ["line", "chunk"])
+    def test_errors_strict(self, pump: str, read_mode: str) -> None:
+        process = CommandExecutor(
+            ["printf", "a\\n\\377\\nb\\nc\\n"],
+            errors="strict",
+            pump=pump,  # type: ignore
+            read_mode=read_mode,  # type: ignore
+        )
+        assert process.stdout == "a\n\\xff\nb\nc"
+        assert process.returncode == 0
+        assert "WARNING Could not decode stdout" in process.log_handler.all_records
+
+    def test_errors_strict_async(self) -> None:
+        process = asyncio.run(
+            AsyncCommandExecutor(["printf", "a\\377\\n"], errors="strict").run()
+        )
+        assert process.stdout == "a\\xff"
+        assert "WARNING Could not decode stdout" in process.log_handler.all_records
+
+
+@pytest.mark.parametrize("pump", ["thread", "selector"])
+def test_process_reaped_on_error(pump: str) -> None:
+    processes: list[CommandExecutor] = []
+
+    def fail(self: CommandExecutor, *args: Any) -> None:
+        processes.append(self)
+        raise RuntimeError("failed")
+
+    with mock.patch.object(CommandExecutor, "_log_lines", fail):
+        with pytest.raises(RuntimeError):
+            CommandExecutor(
+                ["sh", "-c", "echo 1; yes | head -c 1000000"],
+                pump=pump,  # type: ignore
+            )
+    assert processes[0].subprocess.returncode is not None
+
+
+class TestClassAsyncCommandExecutor:
+    def run(self, args: Any, **kwargs: Any) -> AsyncCommandExecutor:
+        return asyncio.run(AsyncCommandExecutor(args, **kwargs).run())
+
+    def test_stdout(self) -> None:
+        process = self.run(DIR_FILES / "stdout.sh")
+        assert process.stdout == "One line to stdout!"
+        assert process.returncode == 0
+
+    def test_stderr(self) -> None:
+        process = self.run(DIR_FILES / "stderr.sh")
+        assert process.stderr == "One line to stderr!"
+        assert process.returncode == 1
+
+    def test_same_output_as_command_executor(self) -> None:
+        cmd = DIR_FILES / "stdout-stderr.sh"
+        process = self.run(cmd)
+        assert process.stdout == CommandExecutor(cmd).stdout
+        assert process.stderr == CommandExecutor(cmd).stderr
+
+    def test_log_records(self) -> None:
+        process = self.run(DIR_FILES / "stdout.sh")
+        levels = [record.levelname for record in process.log_handler.buffer]
+        assert levels == ["INFO", "STDOUT", "INFO"]
+
+    def test_shell(self) -> None:
+        process = self.run(["echo $((1 + 2))"], shell=True)
+        assert process.stdout == "3"
+
+    def test_cwd(self) -> None:
+        process = self.run("pwd", cwd="/")
+        assert process.stdout == "/"
+
+    def test_cancelled(self) -> None:
+        executor = AsyncCommandExecutor(["sleep", "7"])
+
+        async def main() -> None:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(executor.run(), 0.3)
+
+        start = time.monotonic()
+        asyncio.run(main())
+        assert time.monotonic() - start < 5
+        assert executor.subprocess.returncode == -9
+
+
+class TestClassWatchMethodArun:
+    def setup_method(self) -> None:
+        self.watch = Watch(config_file=CONF, service_name="test", report_channels=[])
+
+    def test_stdout(self) -> None:
+        process = asyncio.run(self.watch.arun(DIR_FILES / "stdout.sh"))
+        assert process.returncode == 0
+        assert self.watch.stdout == "One line to stdout!"
+        assert self.watch.processes == [process]
+
+    def test_log_false(self) -> None:
+        process = asyncio.run(self.watch.arun(DIR_FILES / "stdout.sh", log=False))
+        assert self.watch.stdout == ""
+        assert process.stdout == "One line to stdout!"
+
+    def test_exception(self) -> None:
+        with pytest.raises(command_watcher.CommandWatcherError):
+            asyncio.run(self.watch.arun(DIR_FILES / "stderr.sh"))
+
+    def test_ignore_exceptions(self) -> None:
+        process = asyncio.run(
+            self.watch.arun(DIR_FILES / "stderr.sh", ignore_exceptions=[1])
+        )
+        assert process.returncode == 1
+
+    def test_concurrent(self) -> None:
+        async def main() -> list[AsyncCommandExecutor]:
+            return await asyncio.gather(
+                *(self.watch.arun(["echo", str(i)]) for i in range(10))
+            )
+
+        processes = asyncio.run(main())
+        assert [process.stdout for process in processes] == [str(i) for i in range(10)]
+        assert len(self.watch.processes) == 10
+
+
+class TestClassWatchMethodRunMany:
+    def setup_method(self) -> None:
+        self.watch = Watch(config_file=CONF, service_name="test", report_channels=[])
+
+    def test_processes_in_order(self) -> None:
+        commands: list[Any] = [
+            ["sh", "-c", f"sleep 0.0{9 - i}; echo {i}"] for i in range(5)
+        ]
+        processes = self.watch.run_many(commands, max_workers=5)
+        assert self.watch.processes == processes
+        assert [process.stdout for process in processes] == [
+            "0",
+            "1",
+            "2",
+            "3",
+            "4",
+        ]
+
+    def test_separate_buffers(self) -> None:
+        stdout, stderr = self.watch.run_many(
+            [DIR_FILES / "stdout.sh", DIR_FILES / "stderr.sh"], ignore_exceptions=[1]
+        )
+        assert stdout.stdout == "One line to stdout!"
+        assert stdout.stderr == ""
+        assert stderr.stdout == ""
+        assert stderr.stderr == "One line to stderr!"
+
+    def test_tagged_forwarding(self) -> None:
+        with Capturing() as output:
+            self.watch.run_many([DIR_FILES / "stdout.sh"])
+        assert "[0] One line to stdout!" in output.tostring()
+        assert "STDOUT [0] One line to stdout!" in self.watch._log_handler.all_records  # type: ignore
+        assert self.watch.stdout == "One line to stdout!"
+
+    def test_exception_after_all_finished(self) -> None:
+        with pytest.raises(command_watcher.CommandWatcherError):
+            self.watch.run_many(
+                [
+                    DIR_FILES / "stderr.sh",
+                    DIR_FILES / "exit-2.sh",
+                    DIR_FILES / "stdout.sh",
+                ]
+            )
+        assert len(self.watch.processes) == 3
+
+    def test_command_not_found(self) -> None:
+        with pytest.raises(FileNotFoundError) as error:
+            self.watch.run_many(
+                [
+                    DIR_FILES / "stderr.sh",
+                    "command-watcher-not-found",
+                    DIR_FILES / "stdout.sh",
+                ]
+            )
+        assert [process.returncode for process in self.watch.processes] == [1, 0]
+        assert isinstance(error.value.__cause__, command_watcher.CommandWatcherError)
+
+    def test_ignore_exceptions(self) -> None:
+        processes = self.watch.run_many(
+            [DIR_FILES / "stderr.sh", DIR_FILES / "stdout.sh"], ignore_exceptions=[1]
+        )
+        assert [process.returncode for process in processes] == [1, 0]
+
+
+class TestClassWatchEcho:
+    def run(self, echo: Any, args: Any) -> tuple[Watch, str]:
+        watch = Watch(
+            config_file=CONF, service_name="test", report_channels=[], echo=echo
+        )
+        with mock.patch.dict(os.environ, {"NO_COLOR": "1"}), Capturing() as output:
+            watch.run(args)
+        return watch, output.tostring()
+
+    def test_none(self) -> None:
+        watch, output = self.run("none", DIR_FILES / "stdout.sh")
+        assert "One line to stdout!" not in output
+        assert "Execution time" in output
+        assert watch.stdout == "One line to stdout!"
+
+    def test_summary(self) -> None:
+        watch, output = self.run("summary", ["seq", "20"])
+        assert "stdout: 20 lines, 31 bytes" in output
+        assert "[... 10 lines omitted ...]" in output
+        lines = [line.split()[-1] for line in output.splitlines() if "STDOUT" in line]
+        assert lines == ["1", "2", "3", "4", "5", "...]", "16", "17", "18", "19", "20"]
+        assert watch.processes[0].line_count_stdout == 20
+
+    def test_live(self) -> None:
+        _, output = self.run("live", DIR_FILES / "stdout.sh")
+        assert "One line to stdout!" in output
+
+
+class TestClassTimer:
+    def test_result(self) -> None:
+        timer = Timer()
+        time.sleep(0.01)
+        assert 0 < timer.elapsed
+        result = timer.result()
+        assert isinstance(result, float)
+        assert 0.01 <= result < 1
+        assert timer.interval == result
+        assert str(timer) == f"{result:.3f}s"
+
+    def test_monotonic(self) -> None:
+        with mock.patch("time.time", return_value=0.0):
+            timer = Timer()
+            assert timer.result() >= 0
+
+
+class TestClassPhases:
+    def test_command_executor(self) -> None:
+        process = CommandExecutor(
+            [sys.executable, "-c", "import time; time.sleep(0.2); print('line')"]
+        )
+        phases = process.phases
+        assert 0 < phases.spawn < phases.total
+        assert phases.first_output is not None
+        assert 0.2 <= phases.first_output < phases.total
+        assert 0 <= phases.exit_wait < phases.total
+        assert 0 < phases.logging < phases.total
+
+    def test_no_output(self) -> None:
+        process = CommandExecutor("true", pump="selector")
+        assert process.phases.first_output is None
+        assert "first output -," in str(process.phases)
+
+    def test_async_command_executor(self) -> None:
+        process = asyncio.run(
+            AsyncCommandExecutor(TestClassCommandExecutor.cmd_stdout).run()
+        )
+        assert process.phases.first_output is not None
+        assert 0 < process.phases.spawn < process.phases.total
+
+
 class TestClassWatch:
     def setup_method(self) -> None:
         self.cmd_stderr = os.path.join(DIR_FILES, "stderr.sh")
@@ -233,16 +559,23 @@ class TestClassWatchMethodFinalReport:
     def final_report(self, **data: Any) -> Message:
         watch = Watch(config_file=CONF, service_name="test", report_channels=[])
         watch._timer.result = mock.Mock()  # type: ignore
-        watch._timer.result.return_value = "11.123s"  # type: ignore
+        watch._timer.result.return_value = 11.123  # type: ignore
         return watch.final_report(**data)
 
     def test_without_arguments(self) -> None:
         message = self.final_report()
         assert message.status == 0
         assert message.message == "# TEST OK"
-        assert message.message_monitoring == "TEST OK | execution_time=11.123s"
+        assert message.message_monitoring == "TEST OK | execution_time=11.123"
 
     def test_with_arguments(self) -> None:
         message = self.final_report(status=1, custom_message="test")
         assert message.status == 1
         assert message.message == "# TEST WARNING - test"
+
+    def test_performance_data_not_modified(self) -> None:
+        performance_data = {"files": 3}
+        message = self.final_report(performance_data=performance_data)
+        assert performance_data == {"files": 3}
+        assert "files=3" in message.performance_data
+        assert "execution_time=11.123" in message.performance_data
@@ -0,0 +1,122 @@
+import time
+from pathlib import Path
+from typing import Sequence
+
+import pytest
+
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.message import Message
+from command_watcher.outbox import Outbox
+from command_watcher.report import PendingError, Reporter
+
+
+class FlakyChannel(BaseChannel):
+    durable = True
+
+    def __init__(self) -> None:
+        self.down = True
+        self.batches: list[list[str]] = []
+        self.delivered: list[tuple[str, int]] = []
+
+    def report(self, message: Message) -> None:
+        if self.down:
+            raise ConnectionError("Server down")
+        self.delivered.append((message.custom_message, message.status))
+
+    def report_batch(self, messages: Sequence[Message]) -> None:
+        super().report_batch(messages)
+        self.batches.append([message.custom_message for message in messages])
+
+
+@pytest.fixture
+def outbox(tmp_path: Path) -> Outbox:
+    return Outbox(tmp_path / "outbox.sqlite", base_delay=0, max_delay=0)
+
+
+class TestClassOutbox:
+    def test_add(self, outbox: Outbox) -> None:
+        channel = FlakyChannel()
+        outbox.add(channel, Message(status=2, custom_message="1"), "error")
+        assert len(outbox) == 1
+        message = outbox.pending("FlakyChannel")[0]
+        assert message.status == 2
+        assert message.custom_message == "1"
+
+    def test_backoff(self, tmp_path: Path) -> None:
+        outbox = Outbox(tmp_path / "outbox.sqlite", base_delay=10, max_delay=60)
+        assert 5 <= outbox.delay(1) <= 10
+        assert 10 <= outbox.delay(2) <= 20
+        assert 30 <= outbox.delay(10) <= 60
+        channel = FlakyChannel()
+        channel.down = False
+        outbox.add(channel, Message(custom_message="1"))
+        assert outbox.flush([channel]) == 0
+        assert outbox.flush([channel], force=True) == 1
+
+    def test_flush_batches(self, outbox: Outbox) -> None:
+        channel = FlakyChannel()
+        for i in range(3):
+            outbox.add(channel, Message(custom_message=str(i)))
+        assert outbox.flush([channel]) == 0
+        assert len(outbox) == 3
+        channel.down = False
+        assert outbox.flush([channel]) == 3
+        assert channel.batches == [["0"], ["1", "2"]]
+        assert len(outbox) == 0
+
+    def test_other_channels_untouched(self, outbox: Outbox) -> None:
+        outbox.add(FlakyChannel(), Message())
+        assert outbox.flush([]) == 0
+        assert len(outbox) == 1
+
+
+class TestClassReporterOutbox:
+    def test_spool_and_retry(self, outbox: Outbox) -> None:
+        channel = FlakyChannel()
+        reporter = Reporter(outbox=outbox)
+        reporter.channels = [channel]
+        reporter.report(custom_message="first")
+        assert [m.custom_message for m in outbox.pending()] == ["first"]
+        channel.down = False
+        reporter.report(custom_message="second")
+        assert len(outbox) == 0
+        assert channel.batches == [["first"]]
+
+    def test_pending_messages_first(self, outbox: Outbox) -> None:
+        channel = FlakyChannel()
+        reporter = Reporter(outbox=outbox)
+        reporter.channels = [channel]
+        reporter.report(status=2, custom_message="backup")
+        message = reporter.report(status=1, custom_message="backup")
+        assert isinstance(message.channel_results[0].error, PendingError)
+        assert [m.status for m in outbox.pending()] == [2, 1]
+        channel.down = False
+        message = reporter.report(status=0, custom_message="backup")
+        assert message.channel_results[0].ok
+        assert channel.delivered == [("backup", 2), ("backup", 1), ("backup", 0)]
+        assert len(outbox) == 0
+
+    def test_backoff_respected(self, tmp_path: Path) -> None:
+        outbox = Outbox(tmp_path / "outbox.sqlite", base_delay=60, max_delay=60)
+        channel = FlakyChannel()
+        reporter = Reporter(outbox=outbox)
+        reporter.channels = [channel]
+        reporter.report(status=2, custom_message="backup")
+        channel.down = False
+        message = reporter.report(status=0, custom_message="backup")
+        assert isinstance(message.channel_results[0].error, PendingError)
+        assert channel.delivered == []
+        assert [m.status for m in outbox.pending()] == [2, 0]
+
+    def test_flush_timeout(self, outbox: Outbox) -> None:
+        channel = FlakyChannel()
+        channel.timeout = 0.3
+        reporter = Reporter(outbox=outbox)
+        reporter.channels = [channel]
+        reporter.report(custom_message="first")
+        channel.down = False
+        channel.report_batch = lambda messages: time.sleep(2)  # type: ignore
+        start = time.monotonic()
+        message = reporter.report(custom_message="second")
+        assert time.monotonic() - start < 1
+        assert isinstance(message.channel_results[0].error, TimeoutError)
@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Union
+
+from command_watcher import CommandExecutor, Message, Watch
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.log import LoggingHandler
+from command_watcher.progress import Progress, ProgressMonitor, read_proc_stats
+from command_watcher.report import reporter
+from tests.helper import CONF
+
+SLOW_COMMAND: list[Union[str, Path]] = [
+    sys.executable,
+    "-c",
+    "import time; print('line', flush=True); time.sleep(0.5)",
+]
+
+
+class RecordingChannel(BaseChannel):
+    def __init__(self, progress: bool) -> None:
+        self.progress = progress
+        self.messages: list[Message] = []
+
+    def report(self, message: Message) -> None:
+        self.messages.append(message)
+
+
+def test_read_proc_stats() -> None:
+    cpu_time, rss = read_proc_stats(os.getpid())
+    if not os.path.exists("/proc"):
+        assert (cpu_time, rss) == (None, None)
+        return
+    assert cpu_time is not None and cpu_time > 0
+    assert rss is not None and rss > 1024 * 1024
+
+
+def test_read_proc_stats_no_process() -> None:
+    assert read_proc_stats(2**22 + 1) == (None, None)
+
+
+def test_performance_data() -> None:
+    progress = Progress(1.5, 10, 2, 300, 40, cpu_time=0.25, rss=4096)
+    assert progress.performance_data == {
+        "elapsed": 1.5,
+        "lines_stdout": 10,
+        "lines_stderr": 2,
+        "bytes_stdout": 300,
+        "bytes_stderr": 40,
+        "cpu_time": 0.25,
+        "rss": 4096,
+    }
+    assert "cpu_time" not in Progress(1.5, 10, 2, 300, 40).performance_data
+
+
+class TestClassCommandExecutorProgress:
+    def test_samples(self) -> None:
+        samples: list[Progress] = []
+        CommandExecutor(
+            SLOW_COMMAND, echo="none", progress=samples.append, progress_interval=0.05
+        )
+        assert len(samples) >= 3
+        assert samples[0].elapsed < samples[-1].elapsed
+        assert samples[-1].line_count_stdout == 1
+        assert samples[-1].byte_count_stdout == 4
+
+    def test_slow_callback(self) -> None:
+        events: list[str] = []
+
+        def callback(progress: Progress) -> None:
+            time.sleep(0.3)
+            events.append("progress")
+
+        CommandExecutor(
+            SLOW_COMMAND, echo="none", progress=callback, progress_interval=0.05
+        )
+        events.append("finished")
+        time.sleep(0.5)
+        assert events[-1] == "finished"
+        assert 1 <= len(events) - 1 <= 2
+
+    def test_failing_callback(self) -> None:
+        def callback(progress: Progress) -> None:
+            raise ValueError("failed")
+
+        process = CommandExecutor(
+            SLOW_COMMAND, echo="none", progress=callback, progress_interval=0.05
+        )
+        assert process.returncode == 0
+
+
+class TestClassProgressMonitor:
+    def test_stop_timeout(self) -> None:
+        monitor = ProgressMonitor(
+            LoggingHandler(), os.getpid(), lambda progress: time.sleep(2), 0.01
+        )
+        monitor.start()
+        time.sleep(0.1)
+        start = time.monotonic()
+        monitor.stop(timeout=0.1)
+        assert time.monotonic() - start < 1
+
+    def test_no_callback_after_stop(self) -> None:
+        samples: list[Progress] = []
+        monitor = ProgressMonitor(LoggingHandler(), os.getpid(), samples.append, 0.01)
+        monitor.start()
+        time.sleep(0.1)
+        monitor.stop()
+        count = len(samples)
+        time.sleep(0.1)
+        assert len(samples) == count
+
+
+def test_watch_progress_reports() -> None:
+    watch = Watch(
+        config_file=CONF, service_name="test", report_channels=[], echo="none"
+    )
+    icinga_like = RecordingChannel(progress=True)
+    email_like = RecordingChannel(progress=False)
+    reporter.channels = [icinga_like, email_like]
+    try:
+        watch.run(SLOW_COMMAND, progress_interval=0.1)
+    finally:
+        reporter.channels = []
+    assert email_like.messages == []
+    assert len(icinga_like.messages) >= 2
+    message = icinga_like.messages[-1]
+    assert message.service_name == "test"
+    assert message.status == 0
+    assert "Running '" in message.custom_message
+    assert "lines_stdout=1" in message.performance_data
+
+
+def test_watch_run_many_progress_reports() -> None:
+    watch = Watch(
+        config_file=CONF, service_name="test", report_channels=[], echo="none"
+    )
+    channel = RecordingChannel(progress=True)
+    reporter.channels = [channel]
+    try:
+        watch.run_many([SLOW_COMMAND, ["sleep", "0.5"]], progress_interval=0.1)
+    finally:
+        reporter.channels = []
+    messages = [message.custom_message for message in channel.messages]
+    assert any("sleep 0.5" in message for message in messages)
+    assert any(sys.executable in message for message in messages)
+
+
+class SlowProgressChannel(RecordingChannel):
+    def report(self, message: Message) -> None:
+        if message.custom_message.startswith("Running"):
+            time.sleep(2)
+        super().report(message)
+
+
+def test_watch_final_report_last() -> None:
+    watch = Watch(
+        config_file=CONF, service_name="test", report_channels=[], echo="none"
+    )
+    channel = SlowProgressChannel(progress=True)
+    reporter.channels = [channel]
+    try:
+        start = time.monotonic()
+        watch.run(SLOW_COMMAND, progress_interval=0.1)
+        # The process does not wait for the progress report over the network.
+        assert time.monotonic() - start < 1.9
+        watch.final_report(status=0, custom_message="FINAL")
+        time.sleep(0.3)
+    finally:
+        reporter.channels = []
+    assert len(channel.messages) == 2
+    assert channel.messages[-1].custom_message == "FINAL"
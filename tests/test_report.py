@@ -1,12 +1,26 @@
-from typing import Any
+import concurrent.futures
+import sqlite3
+import time
+from collections.abc import Iterator
+from email import message_from_string
+from email.message import Message as EmailMessage
+from pathlib import Path
+from typing import Any, Optional
 from unittest import mock
 
 import pytest
+import requests
+from pretiac.config import Config as IcingaConfig
 
 import command_watcher
 from command_watcher import Message
-from command_watcher.report import Status
+from command_watcher.channels.base_channel import BaseChannel
+from command_watcher.channels.email import EmailChannel, close_sessions
+from command_watcher.channels.icinga import IcingaChannel, close_batches
+from command_watcher.outbox import Outbox
+from command_watcher.report import Reporter, Status
 from command_watcher.utils import HOSTNAME, USERNAME
+from tests.helper import IcingaStub, SMTPStub
 
 
 class TestClassMessage:
@@ -142,6 +156,189 @@ class TestClassEmailChannel:
         )
 
 
+@pytest.fixture
+def smtp() -> Iterator[SMTPStub]:
+    server = SMTPStub()
+    yield server
+    close_sessions()
+    server.stop()
+
+
+def email_channel(smtp: SMTPStub, **kwargs: Any) -> EmailChannel:
+    return EmailChannel(
+        smtp_server=smtp.address,
+        smtp_login="jf",
+        smtp_password="123",
+        to_addr="logs@example.com",
+        from_addr="from@example.com",
+        to_addr_critical="critical@example.com",
+        starttls=False,
+        **kwargs,
+    )
+
+
+def mail_body(mail: EmailMessage) -> str:
+    payload = mail.get_payload(decode=True)
+    assert isinstance(payload, bytes)
+    return payload.decode()
+
+
+class TestClassEmailChannelSMTP:
+    def test_session_reused(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp)
+        email.report(Message(status=0, service_name="test", custom_message="1"))
+        email_channel(smtp).report(Message(status=2, service_name="test"))
+        assert smtp.connections == 1
+        assert smtp.commands.count("AUTH") == 1
+        assert [mail[1] for mail in smtp.mails] == [
+            ["logs@example.com"],
+            ["critical@example.com"],
+        ]
+        mail = message_from_string(smtp.mails[0][2])
+        assert mail["Subject"] == "# TEST OK - 1"
+        assert "Service name: test" in mail_body(mail)
+
+    def test_keepalive(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp)
+        email.report(Message())
+        email.session.keepalive = 0
+        email.report(Message())
+        assert "NOOP" in smtp.commands
+        assert smtp.connections == 1
+        assert len(smtp.mails) == 2
+
+    def test_reconnect(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp)
+        email.report(Message())
+        smtp.drop_connections()
+        email.report(Message())
+        assert smtp.connections == 2
+        assert email.session.connections == 2
+        assert len(smtp.mails) == 2
+
+    def test_connection_refused(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp)
+        smtp.stop()
+        with pytest.raises(OSError):
+            email.report(Message())
+
+    def test_digest(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp, digest_window=60)
+        email.report(Message(status=0, service_name="test", custom_message="1"))
+        email.report(Message(status=2, service_name="test", custom_message="2"))
+        assert smtp.mails == []
+        email.flush()
+        assert len(smtp.mails) == 1
+        _, to_addrs, data = smtp.mails[0]
+        assert to_addrs == ["critical@example.com"]
+        mail = message_from_string(data)
+        assert mail["Subject"] == "[digest] 2 reports, # TEST CRITICAL - 2"
+        assert "# TEST OK - 1" in mail_body(mail)
+
+    def test_digest_window(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp, digest_window=0.05)
+        email.report(Message())
+        email.report(Message())
+        time.sleep(0.5)
+        assert len(smtp.mails) == 1
+
+    def test_digest_failure_spooled(self, smtp: SMTPStub, tmp_path: Path) -> None:
+        email = email_channel(smtp, digest_window=60)
+        outbox = Outbox(tmp_path / "outbox.sqlite")
+        reporter = Reporter(outbox=outbox)
+        reporter.channels = [email]
+        reporter.report(status=2, service_name="test", custom_message="1")
+        reporter.report(status=0, service_name="test", custom_message="2")
+        smtp.stop()
+        email.flush()
+        assert [m.custom_message for m in outbox.pending()] == ["1", "2"]
+
+    def test_digest_failure_without_outbox(self, smtp: SMTPStub) -> None:
+        email = email_channel(smtp, digest_window=60)
+        email.report(Message())
+        smtp.stop()
+        with pytest.raises(OSError):
+            email.flush()
+
+    def test_report_batch(self, smtp: SMTPStub) -> None:
+        email_channel(smtp).report_batch([Message(), Message(), Message()])
+        assert len(smtp.mails) == 1
+        assert "[digest] 3 reports" in smtp.mails[0][2]
+
+
+@pytest.fixture
+def icinga() -> Iterator[IcingaStub]:
+    server = IcingaStub()
+    yield server
+    close_batches()
+    server.stop()
+
+
+def icinga_channel(
+    icinga: IcingaStub, service_name: str, **kwargs: Any
+) -> IcingaChannel:
+    host, port = icinga.server_address[:2]
+    return IcingaChannel(
+        service_name=service_name,
+        config=IcingaConfig(
+            api_endpoint_host=str(host),
+            api_endpoint_port=port,
+            http_basic_username="user",
+            http_basic_password="1234",
+        ),
+        url=icinga.url,
+        **kwargs,
+    )
+
+
+class TestClassIcingaChannelBatch:
+    def test_many_services(self, icinga: IcingaStub) -> None:
+        channels = [
+            icinga_channel(icinga, f"service_{i}", batch_window=0.2) for i in range(10)
+        ]
+
+        def report(channel: IcingaChannel) -> None:
+            channel.report(Message(status=1, service_name=channel.service_name))
+
+        with concurrent.futures.ThreadPoolExecutor(10) as pool:
+            list(pool.map(report, channels))
+        assert icinga.connections == 1
+        assert sorted(result["service"] for result in icinga.check_results) == sorted(
+            f"{HOSTNAME}!service_{i}" for i in range(10)
+        )
+        assert icinga.check_results[0]["exit_status"] == 1
+
+    def test_flush_on_size(self, icinga: IcingaStub) -> None:
+        channel = icinga_channel(icinga, "service", batch_window=60, batch_size=3)
+        batch = channel.batch
+        assert batch is not None
+        futures = [batch.add(**channel._check_result(Message())) for _ in range(2)]
+        assert icinga.check_results == []
+        futures.append(batch.add(**channel._check_result(Message())))
+        assert all(future.done() for future in futures)
+        assert len(icinga.check_results) == 3
+
+    def test_report_batch(self, icinga: IcingaStub) -> None:
+        channel = icinga_channel(icinga, "service", batch_window=0.01)
+        channel.report_batch(
+            [
+                Message(service_name="a", custom_message="1"),
+                Message(service_name="b", custom_message="2"),
+                Message(service_name="a", custom_message="3"),
+            ]
+        )
+        assert [result["plugin_output"] for result in icinga.check_results] == [
+            "B OK - 2",
+            "A OK - 3",
+        ]
+
+    def test_error(self, icinga: IcingaStub) -> None:
+        channel = icinga_channel(icinga, "service", batch_window=0.01)
+        icinga.stop()
+        with pytest.raises(requests.ConnectionError):
+            channel.report(Message())
+
+
 @pytest.mark.skip
 class TestClassIcingaChannel:
     icinga: command_watcher.IcingaChannel
@@ -237,3 +434,93 @@ class TestClassBeepChannel:
     def test_status_unkown(self) -> None:
         subprocess_run = self.report(3)
         subprocess_run.assert_called_with(["beep", "-f", "32.7032", "-l", "200.0"])
+
+
+class SlowChannel(BaseChannel):
+    def __init__(self, delay: float, timeout: Optional[float] = None) -> None:
+        self.delay = delay
+        self.timeout = timeout
+        self.messages: list[Message] = []
+
+    def report(self, message: Message) -> None:
+        time.sleep(self.delay)
+        self.messages.append(message)
+
+
+class FailingChannel(BaseChannel):
+    def report(self, message: Message) -> None:
+        raise ConnectionError("Server down")
+
+
+class TestClassReporter:
+    def setup_method(self) -> None:
+        self.reporter = Reporter(timeout=5)
+
+    def test_concurrent(self) -> None:
+        channels = [SlowChannel(0.2), SlowChannel(0.2), SlowChannel(0.2)]
+        self.reporter.channels = list(channels)
+        start = time.perf_counter()
+        message = self.reporter.report(status=0)
+        assert time.perf_counter() - start < 0.5
+        assert all(channel.messages == [message] for channel in channels)
+        assert [result.ok for result in message.channel_results] == [True] * 3
+        assert all(result.latency >= 0.2 for result in message.channel_results)
+
+    def test_error(self) -> None:
+        channel = SlowChannel(0)
+        self.reporter.channels = [FailingChannel(), channel]
+        message = self.reporter.report(status=0)
+        failed, ok = message.channel_results
+        assert isinstance(failed.error, ConnectionError)
+        assert ok.ok
+        assert ok.channel is channel
+        assert repr(failed).startswith("FailingChannel: ConnectionError")
+
+    def test_timeout(self) -> None:
+        self.reporter.channels = [SlowChannel(1, timeout=0.1), SlowChannel(0)]
+        start = time.perf_counter()
+        message = self.reporter.report(status=0)
+        assert time.perf_counter() - start < 0.5
+        slow, fast = message.channel_results
+        assert isinstance(slow.error, TimeoutError)
+        assert fast.ok
+
+    def test_no_channels(self) -> None:
+        assert self.reporter.report(status=0).channel_results == []
+
+
+class TestClassReporterBackground:
+    def setup_method(self) -> None:
+        self.channel = SlowChannel(0.2)
+        self.reporter = Reporter(background=True)
+        self.reporter.channels = [self.channel]
+
+    def test_report_returns_at_once(self) -> None:
+        start = time.perf_counter()
+        message = self.reporter.report(status=0)
+        assert time.perf_counter() - start < 0.1
+        assert message.channel_results == []
+        assert self.reporter.flush(timeout=5)
+        assert self.channel.messages == [message]
+        assert message.channel_results[0].ok
+
+    def test_flush_timeout(self) -> None:
+        self.reporter.report(status=0)
+        assert not self.reporter.flush(timeout=0.01)
+        assert self.reporter.flush()
+
+    def test_worker_survives_errors(self, tmp_path: Path) -> None:
+        class BrokenOutbox(Outbox):
+            def add(self, *args: Any, **kwargs: Any) -> None:
+                raise sqlite3.OperationalError("database is locked")
+
+        class DurableFailingChannel(FailingChannel):
+            durable = True
+
+        self.reporter.channels = [DurableFailingChannel(), self.channel]
+        self.reporter.outbox = BrokenOutbox(tmp_path / "outbox.sqlite")
+        first = self.reporter.report(status=2)
+        second = self.reporter.report(status=0)
+        assert self.reporter.flush(timeout=5)
+        assert isinstance(first.delivery_error, sqlite3.OperationalError)
+        assert self.channel.messages == [first, second]
@@ -0,0 +1,64 @@
+import pytest
+
+from command_watcher.stream import LineDecoder, LineSplitter
+
+
+class TestClassLineSplitter:
+    def setup_method(self) -> None:
+        self.splitter = LineSplitter()
+
+    def test_complete_lines(self) -> None:
+        assert self.splitter.feed(b"line 1\nline 2\n") == [b"line 1", b"line 2"]
+        assert self.splitter.close() == []
+
+    def test_partial_line_is_carried_over(self) -> None:
+        assert self.splitter.feed(b"line 1\nli") == [b"line 1"]
+        assert self.splitter.feed(b"ne ") == []
+        assert self.splitter.feed(b"2\nline 3") == [b"line 2"]
+        assert self.splitter.close() == [b"line 3"]
+
+    def test_empty_lines(self) -> None:
+        assert self.splitter.feed(b"\n\nline\n") == [b"", b"", b"line"]
+
+    def test_close_resets(self) -> None:
+        self.splitter.feed(b"rest")
+        assert self.splitter.close() == [b"rest"]
+        assert self.splitter.close() == []
+
+
+class TestClassLineDecoder:
+    def test_multibyte_sequence_split_between_chunks(self) -> None:
+        decoder = LineDecoder()
+        data = "Grüße\n".encode("utf-8")
+        assert decoder.feed(data[:3]) == []
+        assert decoder.feed(data[3:]) == ["Grüße"]
+
+    def test_errors_replace(self) -> None:
+        decoder = LineDecoder()
+        assert decoder.feed(b"Gr\xfc\xdfe\n") == ["Gr��e"]
+
+    def test_errors_strict(self) -> None:
+        decoder = LineDecoder(errors="strict")
+        with pytest.raises(UnicodeDecodeError):
+            decoder.feed(b"Gr\xfc\xdfe\n")
+
+    def test_fallback(self) -> None:
+        decoder = LineDecoder(errors="strict", fallback="backslashreplace")
+        assert decoder.feed(b"a\nGr\xfc\xdfe\n\xc3") == ["a", "Gr\\xfc\\xdfe"]
+        assert decoder.feed(b"\xbc\n") == ["\u00fc"]
+        assert isinstance(decoder.error, UnicodeDecodeError)
+
+    def test_encoding(self) -> None:
+        decoder = LineDecoder(encoding="latin-1")
+        assert decoder.feed(b"Gr\xfc\xdfe\n") == ["Grüße"]
+
+    def test_raw_bytes(self) -> None:
+        decoder = LineDecoder(encoding=None)
+        assert decoder.feed(b"Gr\xfc\xdfe\nrest") == [b"Gr\xfc\xdfe"]
+        assert decoder.close() == [b"rest"]
+
+    def test_close(self) -> None:
+        decoder = LineDecoder()
+        assert decoder.feed(b"line 1\nline 2") == ["line 1"]
+        assert decoder.close() == ["line 2"]
+        assert decoder.close() == []
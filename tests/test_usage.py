@@ -0,0 +1,104 @@
+import os
+import sys
+from pathlib import Path
+from typing import Any, Union
+
+from command_watcher import CommandExecutor, Watch
+from command_watcher.usage import ResourceUsage, read_proc_io
+from tests.helper import CONF
+
+BUSY_COMMAND: list[Union[str, Path]] = [
+    sys.executable,
+    "-c",
+    "import sys; sum(range(3_000_000)); print('done'); sys.exit(3)",
+]
+
+
+def usage(**kwargs: Any) -> ResourceUsage:
+    data: dict[str, Any] = dict(
+        user_time=1.0,
+        system_time=0.5,
+        max_rss=1000,
+        block_input=1,
+        block_output=2,
+        voluntary_context_switches=3,
+        involuntary_context_switches=4,
+        read_bytes=5,
+        write_bytes=6,
+    )
+    data.update(kwargs)
+    return ResourceUsage(**data)
+
+
+class TestClassResourceUsage:
+    def test_total(self) -> None:
+        total = ResourceUsage.total([usage(), usage(max_rss=3000)])
+        assert total == usage(
+            user_time=2.0,
+            system_time=1.0,
+            max_rss=3000,
+            block_input=2,
+            block_output=4,
+            voluntary_context_switches=6,
+            involuntary_context_switches=8,
+            read_bytes=10,
+            write_bytes=12,
+        )
+        assert total is not None and total.cpu_time == 3.0
+
+    def test_total_without_io(self) -> None:
+        total = ResourceUsage.total([usage(), ResourceUsage(1.0, 0.5, 10, 0, 0, 0, 0)])
+        assert total is not None
+        assert total.read_bytes is None
+        assert "read_bytes" not in total.performance_data
+
+    def test_total_empty(self) -> None:
+        assert ResourceUsage.total([]) is None
+
+    def test_performance_data(self) -> None:
+        assert usage().performance_data == {
+            "user_time": 1.0,
+            "system_time": 0.5,
+            "max_rss": 1000,
+            "block_input": 1,
+            "block_output": 2,
+            "voluntary_context_switches": 3,
+            "involuntary_context_switches": 4,
+            "read_bytes": 5,
+            "write_bytes": 6,
+        }
+
+
+def test_read_proc_io() -> None:
+    counters = read_proc_io(os.getpid())
+    if counters is not None:
+        assert "read_bytes" in counters
+        assert "write_bytes" in counters
+
+
+def test_command_executor() -> None:
+    process = CommandExecutor(BUSY_COMMAND, echo="none")
+    assert process.returncode == 3
+    assert process.stdout == "done"
+    assert process.usage is not None
+    assert process.usage.cpu_time > 0
+    assert process.usage.max_rss > 1024 * 1024
+
+
+def test_watch_final_report() -> None:
+    watch = Watch(
+        config_file=CONF,
+        service_name="test",
+        report_channels=[],
+        raise_exceptions=False,
+        echo="none",
+    )
+    watch.run(BUSY_COMMAND)
+    watch.run(BUSY_COMMAND)
+    total = watch.usage
+    assert total is not None
+    assert total.cpu_time > 0
+    message = watch.final_report(performance_data={"user_time": "custom"})
+    assert "execution_time=" in message.performance_data
+    assert "max_rss=" in message.performance_data
+    assert "user_time=custom" in message.performance_data